@@ -1,61 +1,88 @@
-
-from langchain_openai.chat_models import ChatOpenAI
-
+from agents.risk_manager import risk_window_bars
 from agents.state import AgentState
-from tools.api import search_line_items, get_financial_metrics, get_insider_trades, get_market_cap, get_prices
+from agents.technicals import TECHNICAL_WARMUP_BARS
+from tools.api import get_market_cap, get_prices, get_recent_prices
+from tools.fundamentals_index import fundamentals_index
+from tools.insider_store import insider_store
+from tools.lookback_planner import bars_per_session, plan_start_date
 
 from datetime import datetime
 
-llm = ChatOpenAI(model="gpt-4o-mini")
+def price_history_bars(bars_per_day: float = 1) -> int:
+    """Bars of price history needed by the agents downstream, for bars_per_day bars per session."""
+    return max(TECHNICAL_WARMUP_BARS, risk_window_bars(bars_per_day))
+
+# Daily bars of price history needed by the agents downstream
+PRICE_HISTORY_BARS = price_history_bars()
 
 def market_data_agent(state: AgentState):
     """Responsible for gathering and preprocessing market data"""
     messages = state["messages"]
     data = state["data"]
 
+    # Bar interval: daily unless intraday bars were asked for
+    interval = data.get("interval", "day")
+    interval_multiplier = data.get("interval_multiplier", 1)
+    bars_per_day = bars_per_session(interval, interval_multiplier)
+    history_bars = price_history_bars(bars_per_day)
+
     # Set default dates
     end_date = data["end_date"] or datetime.now().strftime('%Y-%m-%d')
     if not data["start_date"]:
-        # Calculate 3 months before end_date
-        end_date_obj = datetime.strptime(end_date, '%Y-%m-%d')
-        start_date = end_date_obj.replace(month=end_date_obj.month - 3) if end_date_obj.month > 3 else \
-            end_date_obj.replace(year=end_date_obj.year - 1, month=end_date_obj.month + 9)
-        start_date = start_date.strftime('%Y-%m-%d')
+        # Just enough history for every indicator's warm-up
+        start_date = plan_start_date(end_date, history_bars, bars_per_day=bars_per_day)
     else:
         start_date = data["start_date"]
 
-    # Get the historical price data
-    prices = get_prices(
-        ticker=data["ticker"], 
-        start_date=start_date, 
-        end_date=end_date,
-    )
+    # Get the historical price data, unless the caller supplied it (e.g. live bars)
+    if data.get("prices"):
+        prices = data["prices"]
+    elif not data["start_date"] and bars_per_day > 1:
+        # Only the latest intraday bars, not whole sessions
+        prices = get_recent_prices(
+            ticker=data["ticker"],
+            end_date=end_date,
+            bars=history_bars,
+            interval=interval,
+            interval_multiplier=interval_multiplier,
+        )
+    else:
+        prices = get_prices(
+            ticker=data["ticker"], 
+            start_date=start_date, 
+            end_date=end_date,
+            interval=interval,
+            interval_multiplier=interval_multiplier,
+        )
 
-    # Get the financial metrics
-    financial_metrics = get_financial_metrics(
+    # Get the financial metrics as of the end date (the history is fetched once per ticker)
+    financial_metrics = fundamentals_index.financial_metrics(
         ticker=data["ticker"], 
-        report_period=end_date, 
-        period='ttm', 
+        as_of=end_date, 
         limit=1,
     )
 
-    # Get the insider trades
-    insider_trades = get_insider_trades(
+    # Get the insider trades and their aggregates over trailing windows, from the local store
+    insider_trades = insider_store.trades(
         ticker=data["ticker"], 
-        end_date=end_date,
+        as_of=end_date,
         limit=5,
     )
+    insider_activity = insider_store.activity(
+        ticker=data["ticker"],
+        as_of=end_date,
+    )
 
     # Get the market cap
     market_cap = get_market_cap(
         ticker=data["ticker"],
     )
 
-    # Get the line_items
-    financial_line_items = search_line_items(
+    # Get the line_items as of the end date
+    financial_line_items = fundamentals_index.line_items(
         ticker=data["ticker"], 
         line_items=["free_cash_flow", "net_income", "depreciation_and_amortization", "capital_expenditure", "working_capital"],
-        period='ttm',
+        as_of=end_date,
         limit=2,
     )
 
@@ -68,6 +95,7 @@ def market_data_agent(state: AgentState):
             "end_date": end_date,
             "financial_metrics": financial_metrics,
             "insider_trades": insider_trades,
+            "insider_activity": insider_activity,
             "market_cap": market_cap,
             "financial_line_items": financial_line_items,
         }
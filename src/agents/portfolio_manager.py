@@ -1,8 +1,20 @@
+from functools import lru_cache
+
 from langchain_core.messages import HumanMessage
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_openai.chat_models import ChatOpenAI
 
 from agents.state import AgentState, show_agent_reasoning
+from tools.node_metrics import record_llm_usage
+
+
+@lru_cache(maxsize=None)
+def get_llm():
+    """
+    The portfolio manager's LLM client, created on first use (the OpenAI client is the
+    slowest import in the pipeline) and reused so its connections stay open.
+    """
+    from langchain_openai.chat_models import ChatOpenAI
+    return ChatOpenAI(model="gpt-4o")
 
 
 ##### Portfolio Management Agent #####
@@ -108,8 +120,8 @@ def portfolio_management_agent(state: AgentState):
         }
     )
     # Invoke the LLM
-    llm = ChatOpenAI(model="gpt-4o")
-    result = llm.invoke(prompt)
+    result = get_llm().invoke(prompt)
+    record_llm_usage(result)
 
     # Create the portfolio management message
     message = HumanMessage(
@@ -1,12 +1,51 @@
-import math
-
 from langchain_core.messages import HumanMessage
+import numpy as np
 
 from agents.state import AgentState, show_agent_reasoning
 from tools.api import prices_to_df
+from tools.lookback_planner import bars_per_session
+from tools.stress_engine import (
+    MARKET_SHOCKS,
+    UNIFORM_SHOCKS,
+    combine_scenarios,
+    factor_shock_scenarios,
+    historical_scenarios,
+    run_stress_tests,
+    scenario_results,
+    uniform_shock_scenarios,
+    volatility_spike_scenarios,
+)
 
 import json
 import ast
+import math
+
+# Risk scores (out of 10) at which the risk manager holds or reduces instead of following valuation
+HOLD_RISK_SCORE = 8
+REDUCE_RISK_SCORE = 6
+
+# Risk metrics are measured over the last 21 returns (a month of daily bars), whatever the
+# length of the price history fetched for the other agents
+RISK_WINDOW_BARS = 22
+
+TRADING_DAYS_PER_YEAR = 252
+
+# Market risk bands: annualized volatility, daily VaR (95%) and drawdown beyond which each
+# adds 2 (high) or 1 (moderate) to the market risk score
+VOLATILITY_HIGH = 0.30
+VOLATILITY_MODERATE = 0.20
+VAR_HIGH = -0.03
+VAR_MODERATE = -0.02
+DRAWDOWN_SEVERE = -0.20
+DRAWDOWN_MODERATE = -0.10
+
+# Largest daily CVaR (95%) of a multi-asset book, as a fraction of the portfolio value,
+# before position limits are scaled down
+PORTFOLIO_CVAR_BUDGET = 0.02
+
+def risk_window_bars(bars_per_day: float = 1) -> int:
+    """Bars covering the risk window's month of sessions, for bars_per_day bars per session."""
+    return max(RISK_WINDOW_BARS, math.ceil((RISK_WINDOW_BARS - 1) * bars_per_day) + 1)
 
 ##### Risk Management Agent #####
 def risk_management_agent(state: AgentState):
@@ -15,7 +54,8 @@ def risk_management_agent(state: AgentState):
     portfolio = state["data"]["portfolio"]
     data = state["data"]
 
-    prices_df = prices_to_df(data["prices"])
+    bars_per_day = bars_per_session(data.get("interval", "day"), data.get("interval_multiplier", 1))
+    prices_df = prices_to_df(data["prices"]).iloc[-risk_window_bars(bars_per_day):]
 
     # Fetch messages from other agents
     technical_message = next(msg for msg in state["messages"] if msg.name == "technical_analyst_agent")
@@ -41,38 +81,49 @@ def risk_management_agent(state: AgentState):
     }
 
     # 1. Calculate Risk Metrics
+    # Intraday bars are scaled to daily moves, so the daily thresholds below apply to any interval
     returns = prices_df['close'].pct_change().dropna()
-    daily_vol = returns.std()
-    volatility = daily_vol * (252 ** 0.5)  # Annualized volatility approximation
-    var_95 = returns.quantile(0.05)         # Simple historical VaR at 95% confidence
+    daily_vol = returns.std() * (bars_per_day ** 0.5)
+    volatility = daily_vol * (TRADING_DAYS_PER_YEAR ** 0.5)  # Annualized volatility approximation
+    var_95 = returns.quantile(0.05) * (bars_per_day ** 0.5)  # Simple historical VaR at 95% confidence
     max_drawdown = (prices_df['close'] / prices_df['close'].cummax() - 1).min()
 
+    # Covariance-based risk of the whole book, when trading a multi-asset portfolio
+    portfolio_risk = portfolio.get('portfolio_risk')
+
     # 2. Market Risk Assessment
     market_risk_score = 0
 
     # Volatility scoring
-    if volatility > 0.30:     # High volatility
+    if volatility > VOLATILITY_HIGH:
         market_risk_score += 2
-    elif volatility > 0.20:   # Moderate volatility
+    elif volatility > VOLATILITY_MODERATE:
         market_risk_score += 1
 
-    # VaR scoring
+    # VaR scoring, on the worse of the ticker's VaR and the book's
     # Note: var_95 is typically negative. The more negative, the worse.
-    if var_95 < -0.03:
+    scored_var = var_95
+    if portfolio_risk:
+        scored_var = min(var_95, -portfolio_risk['parametric_var'])
+    if scored_var < VAR_HIGH:
         market_risk_score += 2
-    elif var_95 < -0.02:
+    elif scored_var < VAR_MODERATE:
         market_risk_score += 1
 
     # Max Drawdown scoring
-    if max_drawdown < -0.20:  # Severe drawdown
+    if max_drawdown < DRAWDOWN_SEVERE:
         market_risk_score += 2
-    elif max_drawdown < -0.10:
+    elif max_drawdown < DRAWDOWN_MODERATE:
         market_risk_score += 1
 
     # 3. Position Size Limits
     # Consider total portfolio value, not just cash
     current_stock_value = portfolio['stock'] * prices_df['close'].iloc[-1]
-    total_portfolio_value = portfolio['cash'] + current_stock_value
+    # In a multi-asset book, the other holdings count towards the portfolio value too
+    other_positions_value = sum(
+        value for ticker, value in portfolio.get('position_values', {}).items() if ticker != data['ticker']
+    )
+    total_portfolio_value = portfolio['cash'] + current_stock_value + other_positions_value
 
     base_position_size = total_portfolio_value * 0.25  # Start with 25% max position of total portfolio
     
@@ -86,23 +137,27 @@ def risk_management_agent(state: AgentState):
         # Keep base size for low risk
         max_position_size = base_position_size
 
-    # 4. Stress Testing
-    stress_test_scenarios = {
-        "market_crash": -0.20,
-        "moderate_decline": -0.10,
-        "slight_decline": -0.05
-    }
+    # Scale the limit down while the book's expected shortfall is over its budget
+    if portfolio_risk:
+        gross_positions_value = abs(current_stock_value) + sum(
+            abs(value) for ticker, value in portfolio.get('position_values', {}).items() if ticker != data['ticker']
+        )
+        portfolio_cvar = portfolio_risk['parametric_cvar'] * gross_positions_value
+        cvar_budget = PORTFOLIO_CVAR_BUDGET * total_portfolio_value
+        if portfolio_cvar > cvar_budget:
+            max_position_size *= cvar_budget / portfolio_cvar
 
-    stress_test_results = {}
-    current_position_value = current_stock_value
-
-    for scenario, decline in stress_test_scenarios.items():
-        potential_loss = current_position_value * decline
-        portfolio_impact = potential_loss / (portfolio['cash'] + current_position_value) if (portfolio['cash'] + current_position_value) != 0 else math.nan
-        stress_test_results[scenario] = {
-            "potential_loss": potential_loss,
-            "portfolio_impact": portfolio_impact
-        }
+    # 4. Stress Testing
+    # Uniform declines, historical replay windows, market shocks (unit beta) and volatility
+    # spikes, all applied to the position in one matrix product
+    scenarios = combine_scenarios(
+        uniform_shock_scenarios(1),
+        historical_scenarios(returns.to_numpy()),
+        factor_shock_scenarios(np.ones((1, 1)), MARKET_SHOCKS),
+        volatility_spike_scenarios(daily_vol),
+    )
+    stress_test_results = scenario_results(current_stock_value, scenarios, total_portfolio_value, list(UNIFORM_SHOCKS))
+    scenario_grid = run_stress_tests(current_stock_value, scenarios, total_portfolio_value)
 
     # 5. Risk-Adjusted Signals Analysis
     # Convert all confidences to numeric for proper comparison
@@ -126,24 +181,30 @@ def risk_management_agent(state: AgentState):
     # 6. Generate Trading Action
     # If risk is very high, hold. If moderately high, consider reducing.
     # Else, follow valuation signal as a baseline.
-    if risk_score >= 8:
+    if risk_score >= HOLD_RISK_SCORE:
         trading_action = "hold"
-    elif risk_score >= 6:
+    elif risk_score >= REDUCE_RISK_SCORE:
         trading_action = "reduce"
     else:
         trading_action = agent_signals['valuation']['signal']
 
+    risk_metrics = {
+        "volatility": float(volatility),
+        "value_at_risk_95": float(var_95),
+        "max_drawdown": float(max_drawdown),
+        "market_risk_score": market_risk_score,
+        "stress_test_results": stress_test_results,
+        "scenario_grid": scenario_grid
+    }
+
+    if portfolio_risk:
+        risk_metrics["portfolio_risk"] = portfolio_risk
+
     message_content = {
         "max_position_size": float(max_position_size),
         "risk_score": risk_score,
         "trading_action": trading_action,
-        "risk_metrics": {
-            "volatility": float(volatility),
-            "value_at_risk_95": float(var_95),
-            "max_drawdown": float(max_drawdown),
-            "market_risk_score": market_risk_score,
-            "stress_test_results": stress_test_results
-        },
+        "risk_metrics": risk_metrics,
         "reasoning": f"Risk Score {risk_score}/10: Market Risk={market_risk_score}, "
                      f"Volatility={volatility:.2%}, VaR={var_95:.2%}, "
                      f"Max Drawdown={max_drawdown:.2%}"
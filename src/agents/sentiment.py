@@ -5,27 +5,21 @@ from agents.state import AgentState, show_agent_reasoning
 
 import json
 
+# Trailing window of insider activity used for the signal
+SENTIMENT_WINDOW = "365d"
+
 ##### Sentiment Agent #####
 def sentiment_agent(state: AgentState):
     """Analyzes market sentiment and generates trading signals."""
     data = state["data"]
-    insider_trades = data["insider_trades"]
     show_reasoning = state["metadata"]["show_reasoning"]
 
-    # Loop through the insider trades, if transaction_shares is negative, then it is a sell, which is bearish, if positive, then it is a buy, which is bullish
-    signals = []
-    for trade in insider_trades:
-        transaction_shares = trade["transaction_shares"]
-        if not transaction_shares:
-            continue
-        if transaction_shares < 0:
-            signals.append("bearish")
-        else:
-            signals.append("bullish")
+    # Insider buys are bullish and insider sells are bearish, counted over a trailing window
+    activity = data["insider_activity"][SENTIMENT_WINDOW]
+    bullish_signals = int(activity["buys"])
+    bearish_signals = int(activity["sells"])
 
     # Determine overall signal
-    bullish_signals = signals.count("bullish")
-    bearish_signals = signals.count("bearish")
     if bullish_signals > bearish_signals:
         overall_signal = "bullish"
     elif bearish_signals > bullish_signals:
@@ -34,13 +28,16 @@ def sentiment_agent(state: AgentState):
         overall_signal = "neutral"
 
     # Calculate confidence level based on the proportion of indicators agreeing
-    total_signals = len(signals)
-    confidence = max(bullish_signals, bearish_signals) / total_signals
+    total_signals = bullish_signals + bearish_signals
+    confidence = max(bullish_signals, bearish_signals) / total_signals if total_signals else 0
 
     message_content = {
         "signal": overall_signal,
         "confidence": f"{round(confidence * 100)}%",
-        "reasoning": f"Bullish signals: {bullish_signals}, Bearish signals: {bearish_signals}"
+        "reasoning": (
+            f"Bullish signals: {bullish_signals}, Bearish signals: {bearish_signals} over {SENTIMENT_WINDOW}, "
+            f"Net shares: {activity['net_shares']:,.0f}, Net value: ${activity['net_value']:,.0f}"
+        )
     }
 
     # Print the reasoning if the flag is set
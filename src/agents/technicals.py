@@ -10,6 +10,41 @@ import pandas as pd
 import numpy as np
 
 from tools.api import prices_to_df
+from tools.lookback_planner import required_bars, warmup
+
+# Weights of each strategy in the technical ensemble
+STRATEGY_WEIGHTS = {
+    'trend': 0.25,
+    'mean_reversion': 0.20,
+    'momentum': 0.25,
+    'volatility': 0.15,
+    'stat_arb': 0.15
+}
+
+# Weighted ensemble score beyond which the combined signal is bullish/bearish
+SIGNAL_THRESHOLD = 0.2
+
+# Fast, medium and slow EMA spans of the trend following strategy
+TREND_EMA_SPANS = (8, 21, 55)
+
+# RSI below/above which a ticker is oversold (bullish) or overbought (bearish)
+RSI_OVERSOLD = 30
+RSI_OVERBOUGHT = 70
+
+# Mean reversion: z-score of the close against its 50-bar mean, and position within the
+# Bollinger Bands (0 = lower band, 1 = upper band), beyond which price is stretched
+MEAN_REVERSION_Z_SCORE = 2
+BOLLINGER_LOWER_POSITION = 0.2
+BOLLINGER_UPPER_POSITION = 0.8
+
+# Weighted 1/3/6-month return beyond which momentum is bullish/bearish
+MOMENTUM_THRESHOLD = 0.05
+
+# Volatility regime (21-bar volatility over its 63-bar mean) and its z-score beyond which
+# volatility is low (bullish) or high (bearish)
+VOL_REGIME_LOW = 0.8
+VOL_REGIME_HIGH = 1.2
+VOL_Z_SCORE = 1
 
 
 ##### Technical Analyst #####
@@ -52,9 +87,9 @@ def technical_analyst_agent(state: AgentState):
         signals.append('neutral')
     
     # RSI signal
-    if rsi.iloc[-1] < 30:
+    if rsi.iloc[-1] < RSI_OVERSOLD:
         signals.append('bullish')
-    elif rsi.iloc[-1] > 70:
+    elif rsi.iloc[-1] > RSI_OVERBOUGHT:
         signals.append('bearish')
     else:
         signals.append('neutral')
@@ -140,13 +175,7 @@ def technical_analyst_agent(state: AgentState):
     stat_arb_signals = calculate_stat_arb_signals(prices_df)
     
     # Combine all signals using a weighted ensemble approach
-    strategy_weights = {
-        'trend': 0.25,
-        'mean_reversion': 0.20,
-        'momentum': 0.25,
-        'volatility': 0.15,
-        'stat_arb': 0.15
-    }
+    strategy_weights = STRATEGY_WEIGHTS
     
     combined_signal = weighted_signal_combination({
         'trend': trend_signals,
@@ -203,14 +232,14 @@ def technical_analyst_agent(state: AgentState):
         "data": data,
     }
 
+# Ichimoku's 52-bar spans shifted forward 26 bars, then longest EMA (55) and ADX
+@warmup(78)
 def calculate_trend_signals(prices_df):
     """
     Advanced trend following strategy using multiple timeframes and indicators
     """
     # Calculate EMAs for multiple timeframes
-    ema_8 = calculate_ema(prices_df, 8)
-    ema_21 = calculate_ema(prices_df, 21)
-    ema_55 = calculate_ema(prices_df, 55)
+    ema_8, ema_21, ema_55 = (calculate_ema(prices_df, span) for span in TREND_EMA_SPANS)
     
     # Calculate ADX for trend strength
     adx = calculate_adx(prices_df, 14)
@@ -245,6 +274,7 @@ def calculate_trend_signals(prices_df):
         }
     }
 
+@warmup(50)
 def calculate_mean_reversion_signals(prices_df):
     """
     Mean reversion strategy using statistical measures and Bollinger Bands
@@ -262,14 +292,14 @@ def calculate_mean_reversion_signals(prices_df):
     rsi_28 = calculate_rsi(prices_df, 28)
     
     # Mean reversion signals
-    extreme_z_score = abs(z_score.iloc[-1]) > 2
+    extreme_z_score = abs(z_score.iloc[-1]) > MEAN_REVERSION_Z_SCORE
     price_vs_bb = (prices_df['close'].iloc[-1] - bb_lower.iloc[-1]) / (bb_upper.iloc[-1] - bb_lower.iloc[-1])
     
     # Combine signals
-    if z_score.iloc[-1] < -2 and price_vs_bb < 0.2:
+    if z_score.iloc[-1] < -MEAN_REVERSION_Z_SCORE and price_vs_bb < BOLLINGER_LOWER_POSITION:
         signal = 'bullish'
         confidence = min(abs(z_score.iloc[-1]) / 4, 1.0)
-    elif z_score.iloc[-1] > 2 and price_vs_bb > 0.8:
+    elif z_score.iloc[-1] > MEAN_REVERSION_Z_SCORE and price_vs_bb > BOLLINGER_UPPER_POSITION:
         signal = 'bearish'
         confidence = min(abs(z_score.iloc[-1]) / 4, 1.0)
     else:
@@ -287,6 +317,8 @@ def calculate_mean_reversion_signals(prices_df):
         }
     }
 
+# 126-day returns (127 prices)
+@warmup(127)
 def calculate_momentum_signals(prices_df):
     """
     Multi-factor momentum strategy
@@ -314,10 +346,10 @@ def calculate_momentum_signals(prices_df):
     # Volume confirmation
     volume_confirmation = volume_momentum.iloc[-1] > 1.0
     
-    if momentum_score > 0.05 and volume_confirmation:
+    if momentum_score > MOMENTUM_THRESHOLD and volume_confirmation:
         signal = 'bullish'
         confidence = min(abs(momentum_score) * 5, 1.0)
-    elif momentum_score < -0.05 and volume_confirmation:
+    elif momentum_score < -MOMENTUM_THRESHOLD and volume_confirmation:
         signal = 'bearish'
         confidence = min(abs(momentum_score) * 5, 1.0)
     else:
@@ -335,6 +367,8 @@ def calculate_momentum_signals(prices_df):
         }
     }
 
+# 21-day volatility, then its 63-day z-score
+@warmup(84)
 def calculate_volatility_signals(prices_df):
     """
     Volatility-based trading strategy
@@ -360,10 +394,10 @@ def calculate_volatility_signals(prices_df):
     current_vol_regime = vol_regime.iloc[-1]
     vol_z = vol_z_score.iloc[-1]
     
-    if current_vol_regime < 0.8 and vol_z < -1:
+    if current_vol_regime < VOL_REGIME_LOW and vol_z < -VOL_Z_SCORE:
         signal = 'bullish'  # Low vol regime, potential for expansion
         confidence = min(abs(vol_z) / 3, 1.0)
-    elif current_vol_regime > 1.2 and vol_z > 1:
+    elif current_vol_regime > VOL_REGIME_HIGH and vol_z > VOL_Z_SCORE:
         signal = 'bearish'  # High vol regime, potential for contraction
         confidence = min(abs(vol_z) / 3, 1.0)
     else:
@@ -381,6 +415,8 @@ def calculate_volatility_signals(prices_df):
         }
     }
 
+# 63-day return skew and kurtosis
+@warmup(64)
 def calculate_stat_arb_signals(prices_df):
     """
     Statistical arbitrage signals based on price action analysis
@@ -419,7 +455,7 @@ def calculate_stat_arb_signals(prices_df):
         }
     }
 
-def weighted_signal_combination(signals, weights):
+def weighted_signal_combination(signals, weights, threshold=SIGNAL_THRESHOLD):
     """
     Combines multiple trading signals using a weighted approach
     """
@@ -448,9 +484,9 @@ def weighted_signal_combination(signals, weights):
         final_score = 0
     
     # Convert back to signal
-    if final_score > 0.2:
+    if final_score > threshold:
         signal = 'bullish'
-    elif final_score < -0.2:
+    elif final_score < -threshold:
         signal = 'bearish'
     else:
         signal = 'neutral'
@@ -472,6 +508,8 @@ def normalize_pandas(obj):
         return [normalize_pandas(item) for item in obj]
     return obj
 
+# Slow EMA (26) plus signal EMA (9)
+@warmup(35)
 def calculate_macd(prices_df: pd.DataFrame) -> tuple[pd.Series, pd.Series]:
     ema_12 = prices_df['close'].ewm(span=12, adjust=False).mean()
     ema_26 = prices_df['close'].ewm(span=26, adjust=False).mean()
@@ -479,6 +517,7 @@ def calculate_macd(prices_df: pd.DataFrame) -> tuple[pd.Series, pd.Series]:
     signal_line = macd_line.ewm(span=9, adjust=False).mean()
     return macd_line, signal_line
 
+@warmup(15)
 def calculate_rsi(prices_df: pd.DataFrame, period: int = 14) -> pd.Series:
     delta = prices_df['close'].diff()
     gain = (delta.where(delta > 0, 0)).fillna(0)
@@ -489,6 +528,7 @@ def calculate_rsi(prices_df: pd.DataFrame, period: int = 14) -> pd.Series:
     rsi = 100 - (100 / (1 + rs))
     return rsi
 
+@warmup(20)
 def calculate_bollinger_bands(
     prices_df: pd.DataFrame,
     window: int = 20
@@ -512,6 +552,7 @@ def calculate_ema(df: pd.DataFrame, window: int) -> pd.Series:
     """
     return df['close'].ewm(span=window, adjust=False).mean()
 
+@warmup(28)
 def calculate_adx(df: pd.DataFrame, period: int = 14) -> pd.DataFrame:
     """
     Calculate Average Directional Index (ADX)
@@ -554,6 +595,7 @@ def calculate_adx(df: pd.DataFrame, period: int = 14) -> pd.DataFrame:
     
     return df[['adx', '+di', '-di']]
 
+@warmup(78)
 def calculate_ichimoku(df: pd.DataFrame) -> Dict[str, pd.Series]:
     """
     Calculate Ichimoku Cloud indicators
@@ -593,6 +635,7 @@ def calculate_ichimoku(df: pd.DataFrame) -> Dict[str, pd.Series]:
         'chikou_span': chikou_span
     }
 
+@warmup(15)
 def calculate_atr(df: pd.DataFrame, period: int = 14) -> pd.Series:
     """
     Calculate Average True Range
@@ -639,14 +682,24 @@ def calculate_hurst_exponent(price_series: pd.Series, max_lag: int = 20) -> floa
         # Return 0.5 (random walk) if calculation fails
         return 0.5
 
+@warmup(6)
 def calculate_obv(prices_df: pd.DataFrame) -> pd.Series:
-    obv = [0]
-    for i in range(1, len(prices_df)):
-        if prices_df['close'].iloc[i] > prices_df['close'].iloc[i - 1]:
-            obv.append(obv[-1] + prices_df['volume'].iloc[i])
-        elif prices_df['close'].iloc[i] < prices_df['close'].iloc[i - 1]:
-            obv.append(obv[-1] - prices_df['volume'].iloc[i])
-        else:
-            obv.append(obv[-1])
-    prices_df['OBV'] = obv
+    # Volume added on up bars and subtracted on down bars, vectorized for long intraday series
+    direction = np.sign(prices_df['close'].diff()).fillna(0)
+    prices_df['OBV'] = (direction * prices_df['volume']).cumsum()
     return prices_df['OBV']
+
+
+# Indicators and strategies run by the technical analyst, and the price history they need
+TECHNICAL_INDICATORS = [
+    calculate_macd,
+    calculate_rsi,
+    calculate_bollinger_bands,
+    calculate_obv,
+    calculate_trend_signals,
+    calculate_mean_reversion_signals,
+    calculate_momentum_signals,
+    calculate_volatility_signals,
+    calculate_stat_arb_signals,
+]
+TECHNICAL_WARMUP_BARS = required_bars(*TECHNICAL_INDICATORS)
@@ -1,5 +1,6 @@
 from langchain_core.messages import HumanMessage
 from agents.state import AgentState, show_agent_reasoning
+from tools.valuation_engine import VALUATION_GAP_THRESHOLD, monte_carlo_valuation
 import json
 
 def valuation_agent(state: AgentState):
@@ -41,26 +42,53 @@ def valuation_agent(state: AgentState):
     owner_earnings_gap = (owner_earnings_value - market_cap) / market_cap
     valuation_gap = (dcf_gap + owner_earnings_gap) / 2
 
-    if valuation_gap > 0.15:  # More than 15% undervalued
+    if valuation_gap > VALUATION_GAP_THRESHOLD:  # More than 15% undervalued
         signal = 'bullish'
-    elif valuation_gap < -0.15:  # More than 15% overvalued
+    elif valuation_gap < -VALUATION_GAP_THRESHOLD:  # More than 15% overvalued
         signal = 'bearish'
     else:
         signal = 'neutral'
 
     reasoning["dcf_analysis"] = {
-        "signal": "bullish" if dcf_gap > 0.15 else "bearish" if dcf_gap < -0.15 else "neutral",
+        "signal": "bullish" if dcf_gap > VALUATION_GAP_THRESHOLD else "bearish" if dcf_gap < -VALUATION_GAP_THRESHOLD else "neutral",
         "details": f"Intrinsic Value: ${dcf_value:,.2f}, Market Cap: ${market_cap:,.2f}, Gap: {dcf_gap:.1%}"
     }
 
     reasoning["owner_earnings_analysis"] = {
-        "signal": "bullish" if owner_earnings_gap > 0.15 else "bearish" if owner_earnings_gap < -0.15 else "neutral",
+        "signal": "bullish" if owner_earnings_gap > VALUATION_GAP_THRESHOLD else "bearish" if owner_earnings_gap < -VALUATION_GAP_THRESHOLD else "neutral",
         "details": f"Owner Earnings Value: ${owner_earnings_value:,.2f}, Market Cap: ${market_cap:,.2f}, Gap: {owner_earnings_gap:.1%}"
     }
 
+    confidence = abs(valuation_gap)
+
+    # Optional Monte Carlo mode: the signal and confidence come from the distribution of the gap
+    monte_carlo = state["metadata"].get("monte_carlo")
+    if monte_carlo:
+        simulation = monte_carlo_valuation(
+            market_cap=market_cap,
+            free_cash_flow=current_financial_line_item.get('free_cash_flow'),
+            net_income=current_financial_line_item.get('net_income'),
+            depreciation=current_financial_line_item.get('depreciation_and_amortization'),
+            capex=current_financial_line_item.get('capital_expenditure'),
+            working_capital_change=working_capital_change,
+            growth_rate=metrics["earnings_growth"],
+            config=monte_carlo if isinstance(monte_carlo, dict) else None,
+        )
+        signal = simulation["signal"]
+        confidence = simulation["probability"]
+        reasoning["monte_carlo_analysis"] = {
+            "signal": signal,
+            "details": (
+                f"P(undervalued): {simulation.get('probability_undervalued', 0):.0%}, "
+                f"P(overvalued): {simulation.get('probability_overvalued', 0):.0%}, "
+                f"Median Gap: {simulation.get('gap_percentiles', {}).get('p50', float('nan')):.1%}, "
+                f"Paths: {simulation['valid_paths']:,} in {simulation['elapsed_ms']:.0f} ms"
+            )
+        }
+
     message_content = {
         "signal": signal,
-        "confidence": f"{abs(valuation_gap):.0%}",
+        "confidence": f"{confidence:.0%}",
         "reasoning": reasoning
     }
 
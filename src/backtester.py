@@ -1,20 +1,157 @@
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
+from functools import partial
+import os
 
-import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
 
-from main import run_hedge_fund
-from tools.api import get_price_data
+from main import run_analysts, run_decision, run_hedge_fund
+from portfolio import ACTION_CODES, Portfolio
+from tools.api import get_price_data, prices_to_df
+from tools.risk_engine import RiskEngine
+from tools.signal_cache import signal_cache
+from tools.lookback_planner import plan_start_date
+from tools.node_metrics import node_metrics
+from tools.price_panel import PricePanel, attach_price_panel, use_price_panel
+from tools.profiler import node_profiler
+from tools.trading_calendar import TradingCalendar
+
+
+def run_analysts_measured(ticker, start_date, end_date, monte_carlo=None, metrics_path=None, trace_memory=False, profile=False):
+    """
+    run_analysts in a worker process, returning the analyst state with the worker's node
+    records, profile samples and signal cache hit counts.
+    """
+    node_metrics.path, node_metrics.trace_memory = metrics_path, trace_memory
+    if profile:
+        node_profiler.start()
+    try:
+        state = run_analysts(ticker, start_date, end_date, monte_carlo=monte_carlo)
+    finally:
+        # Stop sampling between tasks, so an idle worker does not keep a sampler thread busy
+        node_profiler.stop()
+    return state, node_metrics.drain(), node_profiler.drain(), signal_cache.drain_counts()
+
 
 class Backtester:
-    def __init__(self, agent, ticker, start_date, end_date, initial_capital):
+    def __init__(
+        self, agent, ticker, start_date, end_date, initial_capital, workers=None, monte_carlo=None,
+        checkpoint_path=None, checkpoint_every=1,
+    ):
         self.agent = agent
-        self.ticker = ticker
+        # A single ticker or a list of tickers trading from shared capital
+        self.tickers = [ticker] if isinstance(ticker, str) else list(ticker)
+        self.ticker = self.tickers[0]
         self.start_date = start_date
         self.end_date = end_date
         self.initial_capital = initial_capital
-        self.portfolio = {"cash": initial_capital, "stock": 0}
+        self.workers = workers
+        # Optional Monte Carlo valuation settings (True for the defaults)
+        self.monte_carlo = monte_carlo
+        self.portfolio = Portfolio(self.tickers, initial_capital)
         self.portfolio_values = []
+        self.last_prices = np.full(len(self.tickers), np.nan)
+        # Each day's action codes, requested and executed quantities and prices, per ticker
+        self.decisions = []
+        # Optional checkpoint file, written every `checkpoint_every` days
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_every = checkpoint_every
+        # Multi-asset books also track covariance-based portfolio risk
+        self.risk_engine = RiskEngine(self.tickers, shrinkage="ledoit-wolf") if len(self.tickers) > 1 else None
+        self.calendar = None
+
+    def build_calendar(self):
+        """
+        Trading sessions from the tickers' own price history, falling back to the NYSE
+        holiday rules when the history cannot be fetched.
+        """
+        # Imported here so that importing the backtester does not load the agents
+        from agents.market_data import PRICE_HISTORY_BARS
+
+        history_start = plan_start_date(self.start_date, PRICE_HISTORY_BARS)
+        try:
+            dates = pd.DatetimeIndex([])
+            for ticker in self.tickers:
+                dates = dates.union(get_price_data(ticker, history_start, self.end_date).index)
+            return TradingCalendar.from_prices(dates)
+        except Exception:
+            return TradingCalendar.nyse(history_start, self.end_date)
+
+    def lookback_start(self, current_date):
+        """Start of the shortest price window ending on current_date that covers every indicator's warm-up."""
+        from agents.market_data import PRICE_HISTORY_BARS
+
+        return plan_start_date(current_date.strftime("%Y-%m-%d"), PRICE_HISTORY_BARS, self.calendar)
+
+    def save_checkpoint(self):
+        """
+        Write the portfolio, its value history, every day's decisions and the risk engine
+        state to the checkpoint file as one compressed NumPy archive, replacing the previous
+        checkpoint only once the new one is safely on disk.
+        """
+        n = len(self.tickers)
+        decisions = {
+            f"decision_{field}": np.array([day[field] for day in self.decisions], dtype=float).reshape(-1, n)
+            for field in ("actions", "quantities", "executed", "prices")
+        }
+        risk_state = self.risk_engine.state() if self.risk_engine is not None else {}
+
+        temporary_path = f"{self.checkpoint_path}.tmp"
+        with open(temporary_path, "wb") as f:
+            np.savez_compressed(
+                f,
+                tickers=np.array(self.tickers),
+                start_date=np.array(self.start_date),
+                initial_capital=np.array(self.initial_capital, dtype=float),
+                cash=np.array(self.portfolio.cash),
+                positions=self.portfolio.positions,
+                last_prices=self.last_prices,
+                dates=np.array([value["Date"] for value in self.portfolio_values], dtype="datetime64[D]"),
+                values=np.array([value["Portfolio Value"] for value in self.portfolio_values], dtype=float),
+                **decisions,
+                **{f"risk_{key}": value for key, value in risk_state.items()},
+            )
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temporary_path, self.checkpoint_path)
+
+    def load_checkpoint(self):
+        """
+        Restore the state written by save_checkpoint. Returns the last completed date, or
+        None when there is no checkpoint yet.
+        """
+        if not self.checkpoint_path or not os.path.exists(self.checkpoint_path):
+            return None
+        with np.load(self.checkpoint_path) as archive:
+            if archive["tickers"].tolist() != self.tickers or str(archive["start_date"]) != self.start_date \
+                    or float(archive["initial_capital"]) != float(self.initial_capital):
+                raise ValueError(
+                    f"Checkpoint {self.checkpoint_path} is for a different backtest "
+                    f"({archive['tickers'].tolist()} from {archive['start_date']} with {float(archive['initial_capital']):g})"
+                )
+            self.portfolio.cash = float(archive["cash"])
+            self.portfolio.positions = archive["positions"].astype(float)
+            self.last_prices = archive["last_prices"].astype(float)
+            dates = pd.to_datetime(archive["dates"])
+            self.portfolio_values = [
+                {"Date": date, "Portfolio Value": float(value)} for date, value in zip(dates, archive["values"])
+            ]
+            self.decisions = [
+                {
+                    "date": date,
+                    "actions": archive["decision_actions"][i].astype(np.int8),
+                    "quantities": archive["decision_quantities"][i],
+                    "executed": archive["decision_executed"][i],
+                    "prices": archive["decision_prices"][i],
+                }
+                for i, date in enumerate(dates)
+            ]
+            if self.risk_engine is not None:
+                self.risk_engine.restore({
+                    key[len("risk_"):]: archive[key] for key in archive.files if key.startswith("risk_")
+                })
+        return dates[-1] if len(dates) else None
 
     def parse_action(self, agent_output):
         try:
@@ -26,82 +163,195 @@ class Backtester:
             print(f"Error parsing action: {agent_output}")
             return "hold", 0
 
-    def execute_trade(self, action, quantity, current_price):
-        """Validate and execute trades based on portfolio constraints"""
-        if action == "buy" and quantity > 0:
-            cost = quantity * current_price
-            if cost <= self.portfolio["cash"]:
-                self.portfolio["stock"] += quantity
-                self.portfolio["cash"] -= cost
-                return quantity
-            else:
-                # Calculate maximum affordable quantity
-                max_quantity = self.portfolio["cash"] // current_price
-                if max_quantity > 0:
-                    self.portfolio["stock"] += max_quantity
-                    self.portfolio["cash"] -= max_quantity * current_price
-                    return max_quantity
-                return 0
-        elif action == "sell" and quantity > 0:
-            quantity = min(quantity, self.portfolio["stock"])
-            if quantity > 0:
-                self.portfolio["cash"] += quantity * current_price
-                self.portfolio["stock"] -= quantity
-                return quantity
-            return 0
-        return 0
-
-    def run_backtest(self):
-        dates = pd.date_range(self.start_date, self.end_date, freq="B")
-
-        print("\nStarting backtest...")
-        print(f"{'Date':<12} {'Ticker':<6} {'Action':<6} {'Quantity':>8} {'Price':>8} {'Cash':>12} {'Stock':>8} {'Total Value':>12}")
-        print("-" * 100)
-
-        for current_date in dates:
-            lookback_start = (current_date - timedelta(days=30)).strftime("%Y-%m-%d")
-            current_date_str = current_date.strftime("%Y-%m-%d")
-
-            agent_output = self.agent(
-                ticker=self.ticker,
-                start_date=lookback_start,
-                end_date=current_date_str,
-                portfolio=self.portfolio
+    def execute_trade(self, action, quantity, current_price, ticker=None):
+        """Validate and execute a single trade based on portfolio constraints"""
+        ticker = ticker or self.ticker
+        actions = np.zeros(len(self.tickers), dtype=np.int8)
+        quantities = np.zeros(len(self.tickers))
+        prices = np.full(len(self.tickers), np.nan)
+        i = self.portfolio.ticker_index[ticker]
+        actions[i], quantities[i], prices[i] = ACTION_CODES.get(action, 0), quantity, current_price
+        return self.portfolio.execute_trades(actions, quantities, prices)[i]
+
+    def precompute_signals(self, dates, price_panel=None):
+        """
+        Phase one of a two-phase backtest: run the portfolio-independent market data and
+        analyst agents for every ticker and date in parallel across a process pool. Workers
+        read prices from the shared price panel, when one is given.
+        """
+        jobs = [
+            (ticker, self.lookback_start(current_date), current_date.strftime("%Y-%m-%d"))
+            for current_date in dates
+            for ticker in self.tickers
+        ]
+
+        print(f"\nPrecomputing analyst signals for {len(jobs)} ticker-dates with {self.workers} workers...")
+        with ProcessPoolExecutor(
+            max_workers=self.workers,
+            **({"initializer": attach_price_panel, "initargs": (price_panel.share(),)} if price_panel else {}),
+        ) as executor:
+            results = executor.map(
+                partial(
+                    run_analysts_measured,
+                    monte_carlo=self.monte_carlo,
+                    metrics_path=node_metrics.path,
+                    trace_memory=node_metrics.trace_memory,
+                    profile=node_profiler.running,
+                ),
+                *zip(*jobs),
             )
+            analyst_states = {}
+            for (ticker, _, end_date), (state, records, stacks, cache_counts) in zip(jobs, results):
+                analyst_states[(ticker, end_date)] = state
+                node_metrics.extend(records)
+                node_profiler.merge(stacks)
+                signal_cache.merge_counts(cache_counts)
+            return analyst_states
+
+    def run_day(self, current_date, analyst_states=None):
+        """Decide on every ticker for one trading session and fill the trades as one batch."""
+        lookback_start = self.lookback_start(current_date)
+        current_date_str = current_date.strftime("%Y-%m-%d")
+
+        # Collect the day's decisions for every ticker, then fill them as one batch
+        actions = []
+        quantities = np.zeros(len(self.tickers))
+        prices = np.full(len(self.tickers), np.nan)
+        closes = {}
+        portfolio_risk = None
+        if self.risk_engine is not None:
+            portfolio_risk = self.risk_engine.portfolio_risk(self.portfolio.market_value(self.last_prices))
+
+        for i, ticker in enumerate(self.tickers):
+            portfolio = self.portfolio.view(ticker, self.last_prices)
+            if portfolio_risk:
+                portfolio["portfolio_risk"] = portfolio_risk
+            if analyst_states is not None:
+                analyst_state = analyst_states[(ticker, current_date_str)]
+                agent_output = run_decision(analyst_state, portfolio)
+                df = prices_to_df(analyst_state["data"]["prices"])
+            else:
+                agent_output = self.agent(
+                    ticker=ticker,
+                    start_date=lookback_start,
+                    end_date=current_date_str,
+                    portfolio=portfolio,
+                    **({"monte_carlo": self.monte_carlo} if self.monte_carlo else {})
+                )
+                df = get_price_data(ticker, lookback_start, current_date_str)
 
             action, quantity = self.parse_action(agent_output)
-            df = get_price_data(self.ticker, lookback_start, current_date_str)
-            current_price = df.iloc[-1]['close']
+            actions.append(action)
+            quantities[i] = quantity
+            prices[i] = df.iloc[-1]['close']
+            closes[ticker] = df['close']
 
-            # Execute the trade with validation
-            executed_quantity = self.execute_trade(action, quantity, current_price)
+        if self.risk_engine is not None:
+            if self.risk_engine.last_prices is None:
+                # Seed the covariance from the first day's lookback history
+                history = pd.concat(closes, axis=1)[self.tickers].ffill()
+                for bar in history.to_numpy():
+                    self.risk_engine.update(bar)
+            else:
+                self.risk_engine.update(prices)
 
-            # Update total portfolio value
-            total_value = self.portfolio["cash"] + self.portfolio["stock"] * current_price
-            self.portfolio["portfolio_value"] = total_value
+        # Execute the trades with validation
+        action_codes = np.array([ACTION_CODES.get(action, 0) for action in actions], dtype=np.int8)
+        executed_quantities = self.portfolio.execute_trades(action_codes, quantities, prices)
+        self.last_prices = prices
 
-            # Log the current state with executed quantity
+        # Update total portfolio value
+        total_value = self.portfolio.total_value(prices)
+
+        # Log the current state with executed quantity
+        for i, ticker in enumerate(self.tickers):
             print(
-                f"{current_date.strftime('%Y-%m-%d'):<12} {self.ticker:<6} {action:<6} {executed_quantity:>8} {current_price:>8.2f} "
-                f"{self.portfolio['cash']:>12.2f} {self.portfolio['stock']:>8} {total_value:>12.2f}"
+                f"{current_date.strftime('%Y-%m-%d'):<12} {ticker:<6} {actions[i]:<6} {executed_quantities[i]:>8g} {prices[i]:>8.2f} "
+                f"{self.portfolio.cash:>12.2f} {self.portfolio.positions[i]:>8g} {total_value:>12.2f}"
             )
 
-            # Record the portfolio value
-            self.portfolio_values.append(
-                {"Date": current_date, "Portfolio Value": total_value}
+        # Record the portfolio value and the day's decisions
+        self.portfolio_values.append(
+            {"Date": current_date, "Portfolio Value": total_value}
+        )
+        self.decisions.append({
+            "date": current_date,
+            "actions": action_codes,
+            "quantities": quantities,
+            "executed": executed_quantities,
+            "prices": prices,
+        })
+
+    def run_backtest(self, resume=False):
+        # Never start over on top of the days an earlier run completed
+        if not resume and self.checkpoint_path and os.path.exists(self.checkpoint_path):
+            raise ValueError(
+                f"Checkpoint {self.checkpoint_path} already exists; resume it (--resume) or delete it to start over"
             )
 
+        # Step over real trading sessions only
+        self.calendar = self.calendar or self.build_calendar()
+        dates = self.calendar.sessions_in_range(self.start_date, self.end_date)
+
+        # Continue after the last day completed by an earlier run
+        if resume:
+            last_completed = self.load_checkpoint()
+            if last_completed is not None:
+                dates = dates[dates > last_completed]
+                print(f"\nResuming after {last_completed.strftime('%Y-%m-%d')} ({len(self.portfolio_values)} days restored)")
+
+        # With workers, the prices are loaded once into a panel shared with them, analyst
+        # signals are precomputed in parallel and only the portfolio-dependent risk sizing
+        # and decision steps run sequentially
+        price_panel = None
+        if self.workers and len(dates):
+            price_panel = PricePanel.load(
+                self.tickers, self.lookback_start(dates[0]), dates[-1].strftime("%Y-%m-%d")
+            )
+            use_price_panel(price_panel)
+
+        try:
+            analyst_states = self.precompute_signals(dates, price_panel) if price_panel else None
+
+            print("\nStarting backtest...")
+            print(f"{'Date':<12} {'Ticker':<6} {'Action':<6} {'Quantity':>8} {'Price':>8} {'Cash':>12} {'Stock':>8} {'Total Value':>12}")
+            print("-" * 100)
+
+            for current_date in dates:
+                self.run_day(current_date, analyst_states)
+                if self.checkpoint_path and len(self.portfolio_values) % self.checkpoint_every == 0:
+                    self.save_checkpoint()
+        finally:
+            # Keep every completed day, also when the run is interrupted or fails
+            if self.checkpoint_path:
+                self.save_checkpoint()
+            if price_panel:
+                use_price_panel(None)
+                price_panel.release()
+
+        # Report how often memoized analysts reused a signal, including in worker processes
+        hit_rates = signal_cache.hit_rates()
+        if hit_rates:
+            print("\nSignal cache hit rates:")
+            for node, rates in hit_rates.items():
+                print(f"{node:<20} {rates['hits']:>6} hits {rates['misses']:>6} misses {rates['hit_rate']:>8.1%}")
+
+        # Per-node latency percentiles, including the nodes run in worker processes
+        node_metrics.print_summary()
+
     def analyze_performance(self):
         # Convert portfolio values to DataFrame
         performance_df = pd.DataFrame(self.portfolio_values).set_index("Date")
 
         # Calculate total return
         total_return = (
-                           self.portfolio["portfolio_value"] - self.initial_capital
+                           performance_df["Portfolio Value"].iloc[-1] - self.initial_capital
                        ) / self.initial_capital
         print(f"Total Return: {total_return * 100:.2f}%")
 
         # Plot the portfolio value over time
+        import matplotlib.pyplot as plt
+
         performance_df["Portfolio Value"].plot(
             title="Portfolio Value Over Time", figsize=(12, 6)
         )
@@ -132,22 +382,47 @@ if __name__ == "__main__":
     
     # Set up argument parser
     parser = argparse.ArgumentParser(description='Run backtesting simulation')
-    parser.add_argument('--ticker', type=str, help='Stock ticker symbol (e.g., AAPL)')
+    parser.add_argument('--ticker', type=str, required=True, help='Stock ticker symbol, or comma-separated symbols for a multi-asset book (e.g., AAPL or AAPL,MSFT)')
     parser.add_argument('--end_date', type=str, default=datetime.now().strftime('%Y-%m-%d'), help='End date in YYYY-MM-DD format')
     parser.add_argument('--start_date', type=str, default=(datetime.now() - timedelta(days=90)).strftime('%Y-%m-%d'), help='Start date in YYYY-MM-DD format')
     parser.add_argument('--initial_capital', type=float, default=100000, help='Initial capital amount (default: 100000)')
+    parser.add_argument('--workers', type=int, help='Precompute analyst signals across this many worker processes before the sequential decision pass')
+    parser.add_argument('--monte_carlo', action='store_true', help='Use Monte Carlo valuation in every backtest step')
+    parser.add_argument('--node_metrics', type=str, help='Append per-node timing, payload, API call and token records to this JSON lines file')
+    parser.add_argument('--trace_memory', action='store_true', help='Also measure each node\'s peak memory with tracemalloc')
+    parser.add_argument('--profile', type=str, nargs='?', const='profiles', help='Sample each node\'s stacks and write collapsed stacks to this directory (default: profiles)')
+    parser.add_argument('--profile_top', type=int, default=20, help='Number of hot functions to report when profiling')
+    parser.add_argument('--checkpoint', type=str, help='Checkpoint the backtest state and daily decisions to this file')
+    parser.add_argument('--checkpoint_every', type=int, default=1, help='Trading days between checkpoints (default: 1)')
+    parser.add_argument('--resume', action='store_true', help='Continue from the last completed day in the checkpoint')
 
     args = parser.parse_args()
+    if args.resume and not args.checkpoint:
+        parser.error("--resume requires --checkpoint")
+    if args.checkpoint and not args.resume and os.path.exists(args.checkpoint):
+        parser.error(f"checkpoint {args.checkpoint} already exists; pass --resume to continue it, or delete it to start over")
+    node_metrics.path = args.node_metrics or node_metrics.path
+    node_metrics.trace_memory = args.trace_memory
+    if args.profile:
+        node_profiler.start()
 
     # Create an instance of Backtester
     backtester = Backtester(
         agent=run_hedge_fund,
-        ticker=args.ticker,
+        ticker=args.ticker.split(','),
         start_date=args.start_date,
         end_date=args.end_date,
         initial_capital=args.initial_capital,
+        workers=args.workers,
+        monte_carlo=args.monte_carlo,
+        checkpoint_path=args.checkpoint,
+        checkpoint_every=args.checkpoint_every,
     )
 
     # Run the backtesting process
-    backtester.run_backtest()
+    backtester.run_backtest(resume=args.resume)
+    if args.profile:
+        node_profiler.stop()
+        node_profiler.print_hot_functions(args.profile_top)
+        print(f"\nCollapsed stacks written to {', '.join(node_profiler.write_collapsed(args.profile))}")
     performance_df = backtester.analyze_performance()
@@ -0,0 +1,262 @@
+"""
+Streaming live-bar mode.
+
+Reads bars from a local feed (a JSON lines file being appended to, or a TCP socket), one
+price record per line with its ticker. Each bar is appended to the ticker's in-memory
+series and its technical and risk metrics are updated incrementally. The full agent
+pipeline is only re-run on the in-memory bars when one of the bucketed signals (trend,
+momentum, mean reversion, RSI, volatility regime, volatility, VaR, drawdown) crosses a
+threshold. Bar-update and tick-to-decision latencies are reported at the end.
+
+    poetry run python src/live.py --replay --tickers AAPL --start-date 2024-01-01 --end-date 2024-06-30 --feed bars.jsonl --delay 0.5
+    poetry run python src/live.py --tickers AAPL --feed bars.jsonl
+"""
+import argparse
+import json
+import socket
+import time
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+
+from agents.market_data import price_history_bars
+from portfolio import ACTION_CODES, Portfolio
+from tools.api import get_prices, get_recent_prices
+from tools.live_signals import LiveSignals
+from tools.lookback_planner import SESSION_BARS, bars_per_session
+
+
+def tail_bars(path: str, follow: bool = True, poll_interval: float = 0.05) -> Iterator[Dict[str, Any]]:
+    """Bars from a JSON lines file, waiting for new lines at the end when following."""
+    with open(path) as f:
+        buffer = ""
+        while True:
+            line = f.readline()
+            if not line:
+                if not follow:
+                    return
+                time.sleep(poll_interval)
+                continue
+            buffer += line
+            # A line is only complete once its newline has been written
+            if buffer.endswith("\n"):
+                if buffer.strip():
+                    yield json.loads(buffer)
+                buffer = ""
+
+
+def socket_bars(host: str, port: int) -> Iterator[Dict[str, Any]]:
+    """Bars sent as JSON lines over a TCP connection, until the sender closes it."""
+    with socket.create_connection((host, port)) as connection, connection.makefile() as lines:
+        for line in lines:
+            if line.strip():
+                yield json.loads(line)
+
+
+def replay_bars(
+    tickers: List[str],
+    start_date: str,
+    end_date: str,
+    write: Callable[[str], None],
+    delay: float = 0.0,
+    interval: str = "day",
+    interval_multiplier: int = 1,
+) -> int:
+    """Replay stored bars of the tickers in time order through `write`, one JSON line each."""
+    bars = []
+    for ticker in tickers:
+        bars.extend(
+            {**bar, "ticker": ticker}
+            for bar in get_prices(ticker, start_date, end_date, interval, interval_multiplier)
+        )
+    bars.sort(key=lambda bar: (bar["time"], bar["ticker"]))
+    for bar in bars:
+        write(json.dumps(bar) + "\n")
+        if delay:
+            time.sleep(delay)
+    return len(bars)
+
+
+def parse_decision(output: str):
+    try:
+        decision = json.loads(output)
+        return decision["action"], decision["quantity"]
+    except Exception:
+        print(f"Error parsing decision: {output}")
+        return "hold", 0
+
+
+class LiveTrader:
+    """Incremental signals per ticker, with decisions re-run on threshold crossings."""
+
+    def __init__(
+        self,
+        tickers: List[str],
+        initial_capital: float,
+        decide: Optional[Callable] = None,
+        monte_carlo=None,
+        interval: str = "day",
+        interval_multiplier: int = 1,
+    ):
+        """
+        Args:
+            tickers: Tickers traded from shared capital
+            initial_capital: Starting cash
+            decide: Decision function with run_hedge_fund's signature. Defaults to run_hedge_fund
+            monte_carlo: Optional Monte Carlo valuation settings passed to every decision
+            interval: Interval of the feed's bars
+            interval_multiplier: Interval multiplier of the feed's bars (e.g. 5 minute bars)
+        """
+        if decide is None:
+            from main import run_hedge_fund as decide
+        self.tickers = list(tickers)
+        self.decide = decide
+        self.monte_carlo = monte_carlo
+        self.interval = interval
+        self.interval_multiplier = interval_multiplier
+        self.bars_per_day = bars_per_session(interval, interval_multiplier)
+        self.history_bars = price_history_bars(self.bars_per_day)
+        self.portfolio = Portfolio(self.tickers, initial_capital)
+        self.last_prices = np.full(len(self.tickers), np.nan)
+        self.signals: Dict[str, LiveSignals] = {}
+        # Signal states each ticker's last decision was made on
+        self.decided_states: Dict[str, Dict[str, str]] = {}
+        self.update_latencies: List[float] = []
+        self.decision_latencies: List[float] = []
+
+    def _seed(self, ticker: str, first_bar_date: str) -> LiveSignals:
+        """Signals warmed up on the stored history before the first live bar."""
+        signals = LiveSignals(self.history_bars, self.bars_per_day)
+        history_end = (datetime.strptime(first_bar_date, '%Y-%m-%d') - timedelta(days=1)).strftime('%Y-%m-%d')
+        try:
+            signals.seed(get_recent_prices(ticker, history_end, self.history_bars, self.interval, self.interval_multiplier))
+        except ValueError:
+            pass
+        return signals
+
+    def on_bar(self, bar: Dict[str, Any], received: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        """
+        Process one bar. Returns the decision taken, or None when no signal crossed a
+        threshold.
+        """
+        received = received if received is not None else time.perf_counter()
+        ticker = bar["ticker"]
+        if ticker not in self.signals:
+            self.signals[ticker] = self._seed(ticker, bar["time"][:10])
+        signals = self.signals[ticker]
+        signals.update(bar)
+        i = self.portfolio.ticker_index[ticker]
+        self.last_prices[i] = float(bar["close"])
+        states = signals.signal_states()
+        self.update_latencies.append((time.perf_counter() - received) * 1000)
+
+        previous = self.decided_states.get(ticker)
+        if previous == states:
+            return None
+        crossed = sorted(name for name, state in states.items() if previous is None or previous[name] != state)
+
+        bars = list(signals.bars)
+        output = self.decide(
+            ticker=ticker,
+            start_date=bars[0]["time"][:10],
+            end_date=bar["time"][:10],
+            portfolio=self.portfolio.view(ticker, self.last_prices),
+            prices=bars,
+            interval=self.interval,
+            interval_multiplier=self.interval_multiplier,
+            **({"monte_carlo": self.monte_carlo} if self.monte_carlo else {})
+        )
+        action, quantity = parse_decision(output)
+        actions = np.zeros(len(self.tickers), dtype=np.int8)
+        quantities = np.zeros(len(self.tickers))
+        actions[i], quantities[i] = ACTION_CODES.get(action, 0), quantity
+        executed = self.portfolio.execute_trades(actions, quantities, self.last_prices)[i]
+        self.decided_states[ticker] = states
+
+        latency_ms = (time.perf_counter() - received) * 1000
+        self.decision_latencies.append(latency_ms)
+        return {
+            "time": bar["time"],
+            "ticker": ticker,
+            "crossed": crossed,
+            "action": action,
+            "quantity": float(executed),
+            "price": float(bar["close"]),
+            "latency_ms": latency_ms,
+        }
+
+    def run(self, bars: Iterable[Dict[str, Any]], default_ticker: Optional[str] = None) -> None:
+        """Process a feed until it ends, printing every decision."""
+        for bar in bars:
+            received = time.perf_counter()
+            if "ticker" not in bar:
+                bar["ticker"] = default_ticker
+            if bar["ticker"] not in self.portfolio.ticker_index:
+                continue
+            decision = self.on_bar(bar, received)
+            if decision:
+                total_value = self.portfolio.total_value(self.last_prices)
+                print(
+                    f"{decision['time']:<25} {decision['ticker']:<6} {decision['action']:<6} {decision['quantity']:>8g} "
+                    f"{decision['price']:>8.2f} {total_value:>12.2f} {decision['latency_ms']:>9.1f}ms  {','.join(decision['crossed'])}"
+                )
+
+    def report(self) -> None:
+        print(f"\nBars processed: {len(self.update_latencies)}, decisions: {len(self.decision_latencies)}")
+        for name, latencies in (("Bar update", self.update_latencies), ("Tick to decision", self.decision_latencies)):
+            if latencies:
+                p50, p90, p99 = np.percentile(latencies, [50, 90, 99])
+                print(f"{name:<17} p50 {p50:>9.2f}ms  p90 {p90:>9.2f}ms  p99 {p99:>9.2f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Trade on a live bar feed, re-deciding when signals cross thresholds')
+    parser.add_argument('--tickers', type=str, required=True, help='Comma-separated tickers to trade (or to replay)')
+    parser.add_argument('--feed', type=str, help='JSON lines bar file to follow (or to replay into)')
+    parser.add_argument('--host', type=str, default='127.0.0.1', help='Host of a socket feed')
+    parser.add_argument('--port', type=int, help='Port of a socket feed (or to serve a replay on)')
+    parser.add_argument('--no-follow', action='store_true', help='Stop at the end of the feed file instead of waiting for more bars')
+    parser.add_argument('--interval', type=str, default='day', choices=list(SESSION_BARS), help='Interval of the feed\'s bars (default: day)')
+    parser.add_argument('--interval-multiplier', type=int, default=1, help='Interval multiplier of the feed\'s bars, e.g. 5 with --interval minute (default: 1)')
+    parser.add_argument('--initial-capital', type=float, default=100000, help='Initial capital amount (default: 100000)')
+    parser.add_argument('--monte-carlo', action='store_true', help='Use Monte Carlo valuation in every decision')
+    parser.add_argument('--replay', action='store_true', help='Replay stored bars into the feed instead of trading')
+    parser.add_argument('--start-date', type=str, help='First replayed date (YYYY-MM-DD)')
+    parser.add_argument('--end-date', type=str, help='Last replayed date (YYYY-MM-DD)')
+    parser.add_argument('--delay', type=float, default=0.0, help='Seconds between replayed bars')
+    args = parser.parse_args()
+
+    tickers = args.tickers.split(',')
+    if not args.feed and args.port is None:
+        parser.error("--feed or --port is required")
+
+    if args.replay:
+        if not (args.start_date and args.end_date):
+            parser.error("--replay requires --start-date and --end-date")
+        if args.port is not None:
+            with socket.create_server((args.host, args.port)) as server:
+                print(f"Waiting for a reader on {args.host}:{args.port}...")
+                connection, _ = server.accept()
+                with connection:
+                    count = replay_bars(tickers, args.start_date, args.end_date, lambda line: connection.sendall(line.encode()), args.delay, args.interval, args.interval_multiplier)
+        else:
+            with open(args.feed, "a") as feed:
+                def write(line):
+                    feed.write(line)
+                    feed.flush()
+                count = replay_bars(tickers, args.start_date, args.end_date, write, args.delay, args.interval, args.interval_multiplier)
+        print(f"Replayed {count} bars")
+    else:
+        trader = LiveTrader(
+            tickers, args.initial_capital, monte_carlo=args.monte_carlo,
+            interval=args.interval, interval_multiplier=args.interval_multiplier,
+        )
+        bars = socket_bars(args.host, args.port) if args.port is not None else tail_bars(args.feed, follow=not args.no_follow)
+        print(f"{'Time':<25} {'Ticker':<6} {'Action':<6} {'Quantity':>8} {'Price':>8} {'Total Value':>12} {'Latency':>11}  Crossed")
+        print("-" * 110)
+        try:
+            trader.run(bars, default_ticker=tickers[0])
+        except KeyboardInterrupt:
+            pass
+        trader.report()
@@ -4,24 +4,50 @@ import os
 # Load environment variables from .env file
 load_dotenv()
 
-from langchain_core.messages import HumanMessage
-from langgraph.graph import END, StateGraph
-
-from agents.fundamentals import fundamentals_agent
-from agents.market_data import market_data_agent
-from agents.portfolio_manager import portfolio_management_agent
-from agents.technicals import technical_analyst_agent
-from agents.risk_manager import risk_management_agent
-from agents.sentiment import sentiment_agent
-from agents.state import AgentState
-from agents.valuation import valuation_agent
-
 import argparse
 from datetime import datetime
+from functools import lru_cache
 
 
 ##### Run the Hedge Fund #####
-def run_hedge_fund(ticker: str, start_date: str, end_date: str, portfolio: dict, show_reasoning: bool = False):
+def run_hedge_fund(ticker: str, start_date: str, end_date: str, portfolio: dict, show_reasoning: bool = False, monte_carlo=None, thread_id: str = None, prices: list = None, interval: str = "day", interval_multiplier: int = 1):
+    """
+    Runs the full pipeline. With a thread_id, every step is checkpointed: invoking the same
+    thread again after a failure resumes at the failed node, and invoking a completed thread
+    returns its decision without running anything. A thread only resumes the request it was
+    started for: invoking it with a different ticker, dates, portfolio or interval raises
+    ValueError. Supplied prices (e.g. live bars) are used instead of fetching the price
+    history. The agents work on bars of interval_multiplier intervals (e.g. 5 "minute"),
+    daily by default.
+    """
+    from langchain_core.messages import HumanMessage
+
+    request = None
+    if thread_id:
+        app = get_app(checkpointed=True)
+        config = {"configurable": {"thread_id": thread_id}}
+        # A missing end date means today, so that a thread never resumes on another day's data
+        end_date = end_date or datetime.now().strftime('%Y-%m-%d')
+        request = {
+            "ticker": ticker,
+            "start_date": start_date,
+            "end_date": end_date,
+            "portfolio": portfolio,
+            "interval": interval,
+            "interval_multiplier": interval_multiplier,
+        }
+        snapshot = app.get_state(config)
+        if snapshot.values:
+            stored = snapshot.values.get("metadata", {}).get("thread_request")
+            if stored is not None and stored != request:
+                changed = ", ".join(key for key in request if stored.get(key) != request[key])
+                raise ValueError(f"Thread {thread_id} was started for a different request (different {changed}); use a new thread id")
+            # Resume the remaining nodes, if any, instead of starting over
+            final_state = app.invoke(None, config) if snapshot.next else snapshot.values
+            return final_state["messages"][-1].content
+    else:
+        app, config = get_app(), None
+
     final_state = app.invoke(
         {
             "messages": [
@@ -34,48 +60,173 @@ def run_hedge_fund(ticker: str, start_date: str, end_date: str, portfolio: dict,
                 "portfolio": portfolio,
                 "start_date": start_date,
                 "end_date": end_date,
+                **({"prices": prices} if prices else {}),
+                "interval": interval,
+                "interval_multiplier": interval_multiplier,
             },
             "metadata": {
                 "show_reasoning": show_reasoning,
+                "monte_carlo": monte_carlo,
+                **({"thread_request": request} if request else {}),
             }
         },
+        config,
     )
     return final_state["messages"][-1].content
 
-# Define the new workflow
-workflow = StateGraph(AgentState)
-
-# Add nodes
-workflow.add_node("market_data_agent", market_data_agent)
-workflow.add_node("technical_analyst_agent", technical_analyst_agent)
-workflow.add_node("fundamentals_agent", fundamentals_agent)
-workflow.add_node("sentiment_agent", sentiment_agent)
-workflow.add_node("risk_management_agent", risk_management_agent)
-workflow.add_node("portfolio_management_agent", portfolio_management_agent)
-workflow.add_node("valuation_agent", valuation_agent)
-
-# Define the workflow
-workflow.set_entry_point("market_data_agent")
-workflow.add_edge("market_data_agent", "technical_analyst_agent")
-workflow.add_edge("market_data_agent", "fundamentals_agent")
-workflow.add_edge("market_data_agent", "sentiment_agent")
-workflow.add_edge("market_data_agent", "valuation_agent")
-workflow.add_edge("technical_analyst_agent", "risk_management_agent")
-workflow.add_edge("fundamentals_agent", "risk_management_agent")
-workflow.add_edge("sentiment_agent", "risk_management_agent")
-workflow.add_edge("valuation_agent", "risk_management_agent")
-workflow.add_edge("risk_management_agent", "portfolio_management_agent")
-workflow.add_edge("portfolio_management_agent", END)
-
-app = workflow.compile()
+##### Run the Hedge Fund in two phases #####
+def run_analysts(ticker: str, start_date: str, end_date: str, show_reasoning: bool = False, monte_carlo=None):
+    """Runs the portfolio-independent part of the pipeline: market data and the analyst agents."""
+    from langchain_core.messages import HumanMessage
+
+    return get_analyst_app().invoke(
+        {
+            "messages": [
+                HumanMessage(
+                    content="Make a trading decision based on the provided data.",
+                )
+            ],
+            "data": {
+                "ticker": ticker,
+                "start_date": start_date,
+                "end_date": end_date,
+            },
+            "metadata": {
+                "show_reasoning": show_reasoning,
+                "monte_carlo": monte_carlo,
+            }
+        },
+    )
+
+def run_decision(analyst_state: dict, portfolio: dict, show_reasoning: bool = False):
+    """Runs the portfolio-dependent risk sizing and decision steps on top of run_analysts output."""
+    final_state = get_decision_app().invoke(
+        {
+            "messages": analyst_state["messages"],
+            "data": {**analyst_state["data"], "portfolio": portfolio},
+            "metadata": {
+                "show_reasoning": show_reasoning,
+            }
+        },
+    )
+    return final_state["messages"][-1].content
+
+ANALYST_NODES = ["technical_analyst_agent", "fundamentals_agent", "sentiment_agent", "valuation_agent"]
+
+# The graphs, and the agent modules behind them, are only built on first use so that
+# importing this module (CLI --help, pool workers, the backtester) stays cheap
+
+def add_node(workflow, node, agent):
+    """Registers a node, instrumented so that every call is timed, measured and can be profiled."""
+    from tools.node_metrics import instrument_node
+    from tools.profiler import profile_node
+
+    workflow.add_node(node, instrument_node(node, profile_node(node, agent)))
+
+def add_analyst_nodes(workflow):
+    """Adds the market data agent and the analysts that fan out from it."""
+    from agents.fundamentals import fundamentals_agent
+    from agents.market_data import market_data_agent
+    from agents.sentiment import sentiment_agent
+    from agents.technicals import technical_analyst_agent
+    from agents.valuation import valuation_agent
+    from tools.signal_cache import memoize_node
+
+    add_node(workflow, "market_data_agent", market_data_agent)
+    add_node(workflow, "technical_analyst_agent", technical_analyst_agent)
+    # Analysts whose inputs only change with new reports or filings reuse their last signal
+    add_node(workflow, "fundamentals_agent", memoize_node("fundamentals_agent", fundamentals_agent, ["financial_metrics"]))
+    add_node(workflow, "sentiment_agent", memoize_node("sentiment_agent", sentiment_agent, ["insider_activity"]))
+    add_node(workflow, "valuation_agent", memoize_node(
+        "valuation_agent", valuation_agent, ["financial_metrics", "financial_line_items", "market_cap"], ["monte_carlo"]
+    ))
+
+    workflow.set_entry_point("market_data_agent")
+    workflow.add_edge("market_data_agent", "technical_analyst_agent")
+    workflow.add_edge("market_data_agent", "fundamentals_agent")
+    workflow.add_edge("market_data_agent", "sentiment_agent")
+    workflow.add_edge("market_data_agent", "valuation_agent")
+
+def add_decision_nodes(workflow):
+    """Adds the portfolio-dependent risk sizing and decision agents."""
+    from agents.portfolio_manager import portfolio_management_agent
+    from agents.risk_manager import risk_management_agent
+
+    add_node(workflow, "risk_management_agent", risk_management_agent)
+    add_node(workflow, "portfolio_management_agent", portfolio_management_agent)
+    workflow.add_edge("risk_management_agent", "portfolio_management_agent")
+
+@lru_cache(maxsize=None)
+def get_checkpointer():
+    """The SQLite checkpointer shared by checkpointed graphs."""
+    from tools.graph_checkpoint import SQLiteCheckpointSaver, get_graph_checkpoint_path
+
+    return SQLiteCheckpointSaver(get_graph_checkpoint_path())
+
+@lru_cache(maxsize=None)
+def get_app(checkpointed: bool = False):
+    """
+    The full pipeline: market data, analysts, risk management and portfolio management.
+    A checkpointed app saves its state after every step and must be invoked with a thread_id.
+    """
+    from langgraph.graph import END, StateGraph
+    from agents.state import AgentState
+
+    workflow = StateGraph(AgentState)
+    add_analyst_nodes(workflow)
+    add_decision_nodes(workflow)
+    for analyst in ANALYST_NODES:
+        workflow.add_edge(analyst, "risk_management_agent")
+    workflow.add_edge("portfolio_management_agent", END)
+    return workflow.compile(checkpointer=get_checkpointer() if checkpointed else None)
+
+@lru_cache(maxsize=None)
+def get_analyst_app():
+    """Portfolio-independent analyst workflow."""
+    from langgraph.graph import END, StateGraph
+    from agents.state import AgentState
+
+    analyst_workflow = StateGraph(AgentState)
+    add_analyst_nodes(analyst_workflow)
+    for analyst in ANALYST_NODES:
+        analyst_workflow.add_edge(analyst, END)
+    return analyst_workflow.compile()
+
+@lru_cache(maxsize=None)
+def get_decision_app():
+    """Portfolio-dependent decision workflow."""
+    from langgraph.graph import END, StateGraph
+    from agents.state import AgentState
+
+    decision_workflow = StateGraph(AgentState)
+    add_decision_nodes(decision_workflow)
+    decision_workflow.set_entry_point("risk_management_agent")
+    decision_workflow.add_edge("portfolio_management_agent", END)
+    return decision_workflow.compile()
+
+_APPS = {"app": get_app, "analyst_app": get_analyst_app, "decision_app": get_decision_app}
+
+def __getattr__(name):
+    # Compiled graphs used to be module attributes
+    if name in _APPS:
+        return _APPS[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 # Add this at the bottom of the file
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='Run the hedge fund trading system')
     parser.add_argument('--ticker', type=str, required=True, help='Stock ticker symbol')
-    parser.add_argument('--start-date', type=str, help='Start date (YYYY-MM-DD). Defaults to 3 months before end date')
+    parser.add_argument('--start-date', type=str, help='Start date (YYYY-MM-DD). Defaults to just enough history for the technical indicators')
     parser.add_argument('--end-date', type=str, help='End date (YYYY-MM-DD). Defaults to today')
+    parser.add_argument('--interval', type=str, default='day', choices=['second', 'minute', 'hour', 'day', 'week', 'month', 'year'], help='Bar interval (default: day)')
+    parser.add_argument('--interval-multiplier', type=int, default=1, help='Bar interval multiplier, e.g. 5 with --interval minute for 5-minute bars (default: 1)')
     parser.add_argument('--show-reasoning', action='store_true', help='Show reasoning from each agent')
+    parser.add_argument('--monte-carlo', action='store_true', help='Value the stock over a Monte Carlo distribution of growth, discount and terminal rates')
+    parser.add_argument('--thread-id', type=str, help='Checkpoint every step under this id; rerunning with the same id resumes a failed run at the failed node')
+    parser.add_argument('--node-metrics', type=str, help='Append per-node timing, payload, API call and token records to this JSON lines file')
+    parser.add_argument('--trace-memory', action='store_true', help='Also measure each node\'s peak memory with tracemalloc')
+    parser.add_argument('--profile', type=str, nargs='?', const='profiles', help='Sample each node\'s stacks and write collapsed stacks to this directory (default: profiles)')
+    parser.add_argument('--profile-top', type=int, default=20, help='Number of hot functions to report when profiling')
     
     args = parser.parse_args()
     
@@ -98,12 +249,31 @@ if __name__ == "__main__":
         "stock": 0         # No initial stock position
     }
     
+    if args.node_metrics or args.trace_memory:
+        from tools.node_metrics import node_metrics
+        node_metrics.path = args.node_metrics or node_metrics.path
+        node_metrics.trace_memory = args.trace_memory
+
+    if args.profile:
+        from tools.profiler import node_profiler
+        node_profiler.start()
+
     result = run_hedge_fund(
         ticker=args.ticker,
         start_date=args.start_date,
         end_date=args.end_date,
         portfolio=portfolio,
-        show_reasoning=args.show_reasoning
+        show_reasoning=args.show_reasoning,
+        monte_carlo=args.monte_carlo,
+        thread_id=args.thread_id,
+        interval=args.interval,
+        interval_multiplier=args.interval_multiplier,
     )
     print("\nFinal Result:")
-    print(result)
\ No newline at end of file
+    print(result)
+    if args.node_metrics or args.trace_memory:
+        node_metrics.print_summary()
+    if args.profile:
+        node_profiler.stop()
+        node_profiler.print_hot_functions(args.profile_top)
+        print(f"\nCollapsed stacks written to {', '.join(node_profiler.write_collapsed(args.profile))}")
@@ -0,0 +1,220 @@
+"""
+Parallel parameter sweeps over the rule-only backtest.
+
+The parameter-independent features (strategy signals, fundamentals signal, valuation gap,
+market risk score and closes) are computed once in the parent process and shared with the
+worker processes through shared memory. Each worker then only re-combines the signals with
+its parameters and runs the vectorized simulation.
+"""
+import itertools
+import json
+import random
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from agents.risk_manager import HOLD_RISK_SCORE, REDUCE_RISK_SCORE
+from agents.technicals import SIGNAL_THRESHOLD, STRATEGY_WEIGHTS
+from agents.valuation import VALUATION_GAP_THRESHOLD
+from tools.shared_arrays import attach_arrays, release_arrays, share_arrays
+from vectorized_backtester import (
+    VectorizedBacktester,
+    calculate_performance_metrics,
+    calculate_rule_actions,
+    compute_rule_features,
+    load_rule_inputs,
+    stack_by_ticker,
+)
+
+# Parameters that can be swept, with the values the agents use today
+PARAMETER_DEFAULTS = {
+    **STRATEGY_WEIGHTS,
+    'signal_threshold': SIGNAL_THRESHOLD,
+    'valuation_threshold': VALUATION_GAP_THRESHOLD,
+    'hold_risk_score': HOLD_RISK_SCORE,
+    'reduce_risk_score': REDUCE_RISK_SCORE,
+}
+
+DEFAULT_SEARCH_SPACE = {
+    'trend': [0.15, 0.25, 0.35],
+    'momentum': [0.15, 0.25, 0.35],
+    'signal_threshold': [0.1, 0.2, 0.3],
+    'valuation_threshold': [0.10, 0.15, 0.25],
+    'hold_risk_score': [7, 8, 9],
+    'reduce_risk_score': [5, 6, 7],
+}
+
+SearchSpace = Dict[str, Union[Sequence[Any], Tuple[float, float]]]
+
+
+def grid_search_space(space: SearchSpace) -> List[Dict[str, Any]]:
+    """Every combination of the listed values of each parameter."""
+    names = list(space)
+    return [dict(zip(names, values)) for values in itertools.product(*(space[name] for name in names))]
+
+
+def random_search_space(space: SearchSpace, n_samples: int, seed: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Random combinations of parameters. Lists are sampled uniformly, and (low, high) tuples are
+    sampled as integers when both bounds are integers and as floats otherwise.
+    """
+    rng = random.Random(seed)
+
+    def sample(values):
+        if isinstance(values, tuple):
+            low, high = values
+            if isinstance(low, int) and isinstance(high, int):
+                return rng.randint(low, high)
+            return rng.uniform(low, high)
+        return rng.choice(list(values))
+
+    return [{name: sample(values) for name, values in space.items()} for _ in range(n_samples)]
+
+
+def rule_action_params(params: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a flat parameter combination into calculate_rule_actions keyword arguments."""
+    params = {**PARAMETER_DEFAULTS, **params}
+    return {
+        'strategy_weights': {strategy: params[strategy] for strategy in STRATEGY_WEIGHTS},
+        'signal_threshold': params['signal_threshold'],
+        'valuation_threshold': params['valuation_threshold'],
+        'hold_risk_score': params['hold_risk_score'],
+        'reduce_risk_score': params['reduce_risk_score'],
+    }
+
+
+##### Sweep workers #####
+_shared_blocks = None
+_shared_features = None
+
+
+def _init_worker(specs):
+    """Attach the shared feature arrays once per worker process."""
+    global _shared_blocks, _shared_features
+    _shared_blocks, _shared_features = attach_arrays(specs)
+
+
+def run_combination(features: Dict[str, np.ndarray], params: Dict[str, Any], initial_capital: float) -> Dict[str, Any]:
+    """Backtest one parameter combination across all tickers and summarize the combined book."""
+    actions = calculate_rule_actions(features, **rule_action_params(params))
+    backtester = VectorizedBacktester(
+        prices=features['close'],
+        actions=actions['action'],
+        max_position_fraction=actions['max_position_fraction'],
+        initial_capital=initial_capital,
+    )
+    values = backtester.run_backtest()
+
+    # Each ticker trades its own capital; performance is measured on the sum
+    book_values = values.sum(axis=1, keepdims=True)
+    metrics = calculate_performance_metrics(book_values, initial_capital * values.shape[1])
+    return {
+        **params,
+        **{name: float(value[0]) for name, value in metrics.items()},
+        "Trades": int((backtester.executed_quantities != 0).sum()),
+    }
+
+
+def _run_shared_combination(params, initial_capital):
+    return run_combination(_shared_features, params, initial_capital)
+
+
+def run_parameter_sweep(
+    features_by_ticker: Dict[str, pd.DataFrame],
+    combinations: List[Dict[str, Any]],
+    workers: Optional[int] = None,
+    initial_capital: float = 100000,
+    rank_by: str = "Sharpe Ratio",
+    results_path: Optional[str] = None,
+) -> pd.DataFrame:
+    """
+    Backtest every parameter combination across a process pool.
+
+    Results are streamed as they complete: each one is printed and, when results_path is
+    given, appended to it as a JSON line.
+
+    Args:
+        features_by_ticker: compute_rule_features output per ticker
+        combinations: Parameter combinations, e.g. from grid_search_space or random_search_space
+        workers: Number of worker processes
+        initial_capital: Starting cash for each ticker
+        rank_by: Metric used to rank the results
+        results_path: Optional JSON lines file to stream results into
+
+    Returns:
+        DataFrame of all results, best first
+    """
+    stacked = stack_by_ticker(features_by_ticker)
+    arrays = {key: value for key, value in stacked.items() if key not in ("dates", "tickers")}
+    blocks, specs = share_arrays(arrays)
+
+    results = []
+    results_file = open(results_path, "a") if results_path else None
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(specs,)) as executor:
+            futures = [executor.submit(_run_shared_combination, params, initial_capital) for params in combinations]
+            for completed, future in enumerate(as_completed(futures), 1):
+                result = future.result()
+                results.append(result)
+                if results_file:
+                    results_file.write(json.dumps(result) + "\n")
+                    results_file.flush()
+                best = max(results, key=lambda r: np.nan_to_num(r[rank_by], nan=-np.inf))
+                print(f"[{completed}/{len(combinations)}] {rank_by}: {result[rank_by]:.4f} (best {best[rank_by]:.4f})")
+    finally:
+        if results_file:
+            results_file.close()
+        release_arrays(blocks, unlink=True)
+
+    return pd.DataFrame(results).sort_values(rank_by, ascending=False, na_position='last').reset_index(drop=True)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Run a parallel parameter sweep over the rule-only backtest')
+    parser.add_argument('--tickers', type=str, required=True, help='Comma-separated stock ticker symbols (e.g., AAPL,MSFT)')
+    parser.add_argument('--end_date', type=str, default=datetime.now().strftime('%Y-%m-%d'), help='End date in YYYY-MM-DD format')
+    parser.add_argument('--start_date', type=str, default=(datetime.now() - timedelta(days=365)).strftime('%Y-%m-%d'), help='Start date in YYYY-MM-DD format')
+    parser.add_argument('--initial_capital', type=float, default=100000, help='Initial capital amount per ticker (default: 100000)')
+    parser.add_argument('--space', type=str, help='JSON file mapping parameters to lists of values, or to {"low": ..., "high": ...} ranges for random search')
+    parser.add_argument('--samples', type=int, help='Number of random samples. Defaults to a full grid search')
+    parser.add_argument('--seed', type=int, help='Random search seed')
+    parser.add_argument('--workers', type=int, help='Number of worker processes')
+    parser.add_argument('--rank_by', type=str, default='Sharpe Ratio', help='Metric to rank by (default: Sharpe Ratio)')
+    parser.add_argument('--results', type=str, help='JSON lines file to stream results into')
+    parser.add_argument('--top', type=int, default=20, help='Number of top results to print (default: 20)')
+
+    args = parser.parse_args()
+
+    if args.space:
+        with open(args.space) as f:
+            space = {
+                name: (values["low"], values["high"]) if isinstance(values, dict) else values
+                for name, values in json.load(f).items()
+            }
+    else:
+        space = DEFAULT_SEARCH_SPACE
+
+    if args.samples:
+        combinations = random_search_space(space, args.samples, args.seed)
+    else:
+        combinations = grid_search_space(space)
+
+    features_by_ticker = {
+        ticker: compute_rule_features(**load_rule_inputs(ticker, args.start_date, args.end_date))
+        for ticker in args.tickers.split(',')
+    }
+
+    results = run_parameter_sweep(
+        features_by_ticker,
+        combinations,
+        workers=args.workers,
+        initial_capital=args.initial_capital,
+        rank_by=args.rank_by,
+        results_path=args.results,
+    )
+    print(results.head(args.top).to_string(float_format=lambda x: f"{x:.4f}"))
@@ -0,0 +1,77 @@
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+# Numeric codes for trading actions in batch trades
+ACTION_CODES = {"buy": 1, "sell": -1, "hold": 0}
+
+
+class Portfolio:
+    """Shared cash plus array-backed share holdings for a fixed list of tickers."""
+
+    def __init__(self, tickers: List[str], cash: float):
+        self.tickers = list(tickers)
+        self.ticker_index = {ticker: i for i, ticker in enumerate(self.tickers)}
+        self.cash = float(cash)
+        self.positions = np.zeros(len(self.tickers))
+
+    def market_value(self, prices: np.ndarray) -> np.ndarray:
+        """Market value of each position."""
+        return self.positions * np.nan_to_num(prices)
+
+    def total_value(self, prices: np.ndarray) -> float:
+        """Cash plus the market value of all positions."""
+        return self.cash + float(self.market_value(prices).sum())
+
+    def execute_trades(self, actions: np.ndarray, quantities: np.ndarray, prices: np.ndarray) -> np.ndarray:
+        """
+        Validate and execute one batch of trades across all positions.
+
+        Sells are filled first, capped at the shares held. Buys are then filled from the
+        available cash; when the batch costs more than the cash, every buy is scaled down
+        by the same factor to the affordable whole-share quantity.
+
+        Args:
+            actions: Action code per ticker (1 buy, -1 sell, 0 hold)
+            quantities: Requested quantity per ticker
+            prices: Execution price per ticker
+
+        Returns:
+            Executed quantity per ticker (always non-negative)
+        """
+        actions = np.asarray(actions)
+        quantities = np.asarray(quantities, dtype=float)
+        prices = np.asarray(prices, dtype=float)
+        tradable = np.isfinite(prices) & (prices > 0) & (quantities > 0)
+
+        sell_quantity = np.where(tradable & (actions == -1), np.minimum(quantities, self.positions), 0)
+        self.positions -= sell_quantity
+        self.cash += float((sell_quantity * np.where(tradable, prices, 0)).sum())
+
+        buy_request = np.where(tradable & (actions == 1), quantities, 0)
+        buy_prices = np.where(buy_request > 0, prices, 1.0)
+        cost = float((buy_request * buy_prices).sum())
+        if cost > self.cash:
+            # Each buy gets its share of the cash and as many whole shares as that affords
+            # (floor division, so a single buy fills cash // price like a scalar fill)
+            budgets = self.cash * (buy_request * buy_prices / cost)
+            buy_quantity = np.where(buy_request > 0, np.floor_divide(budgets, buy_prices), 0)
+        else:
+            buy_quantity = buy_request
+        self.positions += buy_quantity
+        self.cash -= float((buy_quantity * buy_prices).sum())
+
+        return sell_quantity + buy_quantity
+
+    def view(self, ticker: str, prices: Optional[np.ndarray] = None) -> Dict[str, Any]:
+        """
+        The portfolio as seen by the agents when deciding on one ticker: the shared cash,
+        the shares held in that ticker and the market value of every holding.
+        """
+        values = self.market_value(prices) if prices is not None else np.zeros(len(self.tickers))
+        return {
+            "cash": self.cash,
+            "stock": float(self.positions[self.ticker_index[ticker]]),
+            "positions": dict(zip(self.tickers, self.positions.tolist())),
+            "position_values": dict(zip(self.tickers, values.tolist())),
+        }
@@ -0,0 +1,86 @@
+"""
+Universe screening with the fundamentals agent's scoring.
+
+The four scoring blocks (profitability, growth, financial health and price ratios) are
+applied to every ticker's latest report at once over a columnar fundamentals table. Only
+the top-ranked candidates are then sent through the full agent pipeline.
+"""
+import os
+from datetime import datetime
+from typing import List, Optional
+
+import numpy as np
+import pandas as pd
+
+from tools.fundamentals_table import FundamentalsTable
+from vectorized_backtester import calculate_fundamentals_block_signals
+
+
+def screen_fundamentals(table: FundamentalsTable, as_of: str, tickers: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Score every ticker's latest report on or before as_of and rank the universe.
+
+    Args:
+        table: Financial metrics table
+        as_of: Screening date
+        tickers: Tickers to screen. Defaults to every ticker in the table
+
+    Returns:
+        DataFrame indexed by ticker with the report period, the four block signals, the
+        fundamentals signal and confidence, and a score (bullish minus bearish blocks),
+        best first
+    """
+    latest = table.latest(as_of, tickers)
+    blocks = calculate_fundamentals_block_signals(latest)
+    bullish = (blocks.to_numpy() == 1).sum(axis=1)
+    bearish = (blocks.to_numpy() == -1).sum(axis=1)
+
+    screen = pd.concat([latest[['report_period']], blocks], axis=1)
+    screen['signal'] = np.select([bullish > bearish, bearish > bullish], ['bullish', 'bearish'], 'neutral')
+    screen['confidence'] = np.maximum(bullish, bearish) / blocks.shape[1]
+    screen['score'] = bullish - bearish
+    return screen.sort_values(['score', 'confidence'], ascending=False, kind='stable')
+
+
+if __name__ == "__main__":
+    import argparse
+
+    from tools.local_store import list_tickers
+
+    parser = argparse.ArgumentParser(description='Rank a universe by fundamentals and run the top candidates through the hedge fund')
+    parser.add_argument('--tickers', type=str, help='Comma-separated stock ticker symbols. Defaults to every ticker in the local data store')
+    parser.add_argument('--end_date', type=str, default=datetime.now().strftime('%Y-%m-%d'), help='Screening date in YYYY-MM-DD format')
+    parser.add_argument('--table', type=str, help='Fundamentals table (.npz) to load, or to save after fetching if it does not exist')
+    parser.add_argument('--top', type=int, default=10, help='Number of top candidates (default: 10)')
+    parser.add_argument('--run', action='store_true', help='Send the top candidates through the full agent pipeline')
+
+    args = parser.parse_args()
+
+    if args.table and os.path.exists(args.table):
+        table = FundamentalsTable.load(args.table)
+    else:
+        tickers = args.tickers.split(',') if args.tickers else list_tickers()
+        table = FundamentalsTable.from_api(tickers, args.end_date)
+        if args.table:
+            table.save(args.table)
+
+    screen_tickers = args.tickers.split(',') if args.tickers else None
+    missing = [ticker for ticker in screen_tickers or [] if ticker not in table.ticker_index]
+    if missing:
+        print(f"Not in {args.table}, skipped (rebuild the table to include them): {', '.join(missing)}")
+
+    screen = screen_fundamentals(table, args.end_date, screen_tickers)
+    print(screen.head(args.top).to_string())
+
+    if args.run:
+        from main import run_hedge_fund
+
+        for ticker in screen.index[:args.top]:
+            result = run_hedge_fund(
+                ticker=ticker,
+                # The market data agent plans the price history the indicators need
+                start_date=None,
+                end_date=args.end_date,
+                portfolio={"cash": 100000.0, "stock": 0},
+            )
+            print(f"\n{ticker}: {result}")
@@ -0,0 +1,227 @@
+"""
+Long-running decision service.
+
+Keeps the compiled agent graph, the data caches (fundamentals index, insider store, signal
+cache) and the LLM client warm in one process. The fundamentals index refetches a ticker's
+reports for dates later than its last fetch, and the signal cache keeps a bounded number of
+signals in memory, so the caches neither go stale nor grow without limit. Decisions are
+served over HTTP on localhost:
+
+    POST /decide  {"ticker": "AAPL", "end_date": "2024-12-31", "portfolio": {"cash": 100000, "stock": 0}}
+    GET  /stats   throughput, latency percentiles and queue depth
+    GET  /health
+
+At most `concurrency` decisions run at once and at most `queue_size` more wait for a slot.
+Beyond that, requests are turned away with 429 so that clients back off instead of piling
+up work the service cannot keep up with.
+"""
+import argparse
+import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+
+import numpy as np
+
+from main import get_app, run_hedge_fund
+
+DEFAULT_PORTFOLIO = {"cash": 100000.0, "stock": 0}
+
+# Completed decisions kept for the latency percentiles and recent throughput
+LATENCY_SAMPLES = 1000
+THROUGHPUT_WINDOW_SECONDS = 60
+
+
+class DecisionService:
+    """Runs decision jobs on a bounded pool, with admission control and running statistics."""
+
+    def __init__(self, concurrency: int = 4, queue_size: int = 32):
+        """
+        Args:
+            concurrency: Decisions run at the same time
+            queue_size: Decisions allowed to wait for a free slot
+        """
+        self.concurrency = concurrency
+        self.queue_size = queue_size
+        self.executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="decision")
+        self._slots = threading.BoundedSemaphore(concurrency + queue_size)
+        self._lock = threading.Lock()
+        self.started = time.time()
+        self.counts = {"accepted": 0, "completed": 0, "failed": 0, "rejected": 0}
+        self.running = 0
+        # (finish time, total ms, queue ms) of recent decisions
+        self.recent = deque(maxlen=LATENCY_SAMPLES)
+
+    def warm_up(self) -> None:
+        """Compile the graph and create the LLM client before the first request."""
+        from agents.portfolio_manager import get_llm
+
+        get_app()
+        get_llm()
+
+    def submit(self, job: Dict[str, Any]) -> Optional[Future]:
+        """Queue a decision job. None when the service is saturated."""
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self.counts["rejected"] += 1
+            return None
+        with self._lock:
+            self.counts["accepted"] += 1
+        return self.executor.submit(self._run, job, time.perf_counter())
+
+    def _run(self, job: Dict[str, Any], submitted: float) -> Dict[str, Any]:
+        started = time.perf_counter()
+        with self._lock:
+            self.running += 1
+        succeeded = False
+        try:
+            output = run_hedge_fund(
+                ticker=job["ticker"],
+                start_date=job.get("start_date"),
+                end_date=job.get("end_date"),
+                portfolio=job.get("portfolio") or dict(DEFAULT_PORTFOLIO),
+                monte_carlo=job.get("monte_carlo"),
+                thread_id=job.get("thread_id"),
+            )
+            succeeded = True
+        finally:
+            finished = time.perf_counter()
+            with self._lock:
+                self.running -= 1
+                self.counts["completed" if succeeded else "failed"] += 1
+                self.recent.append((time.time(), (finished - submitted) * 1000, (started - submitted) * 1000))
+            self._slots.release()
+
+        try:
+            decision = json.loads(output)
+        except (TypeError, ValueError):
+            decision = output
+        return {
+            "decision": decision,
+            "latency_ms": (finished - submitted) * 1000,
+            "queue_ms": (started - submitted) * 1000,
+        }
+
+    def stats(self) -> Dict[str, Any]:
+        """Job counts, queue depth, throughput and latency percentiles."""
+        with self._lock:
+            counts = dict(self.counts)
+            running = self.running
+            recent = list(self.recent)
+
+        now = time.time()
+        uptime = now - self.started
+        finished = counts["completed"] + counts["failed"]
+        stats = {
+            **counts,
+            "running": running,
+            "queued": counts["accepted"] - finished - running,
+            "concurrency": self.concurrency,
+            "queue_size": self.queue_size,
+            "uptime_s": uptime,
+            "throughput_per_s": finished / uptime if uptime > 0 else 0.0,
+            "recent_throughput_per_s": sum(
+                1 for finished_at, _, _ in recent if finished_at >= now - THROUGHPUT_WINDOW_SECONDS
+            ) / min(THROUGHPUT_WINDOW_SECONDS, max(uptime, 1e-9)),
+        }
+        if recent:
+            latency = np.array([total for _, total, _ in recent])
+            queue = np.array([waited for _, _, waited in recent])
+            stats["latency_ms"] = dict(zip(("p50", "p90", "p99"), np.percentile(latency, [50, 90, 99]).tolist()))
+            stats["queue_ms"] = dict(zip(("p50", "p90", "p99"), np.percentile(queue, [50, 90, 99]).tolist()))
+        return stats
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=True)
+
+
+def parse_job(body: Dict[str, Any]) -> Dict[str, Any]:
+    """Validate a decision request. Raises ValueError describing the first problem found."""
+    if not isinstance(body, dict) or not isinstance(body.get("ticker"), str) or not body["ticker"]:
+        raise ValueError("ticker is required")
+    for field in ("start_date", "end_date"):
+        if body.get(field) is not None:
+            try:
+                datetime.strptime(body[field], '%Y-%m-%d')
+            except (TypeError, ValueError):
+                raise ValueError(f"{field} must be in YYYY-MM-DD format")
+    portfolio = body.get("portfolio")
+    if portfolio is not None and not (isinstance(portfolio, dict) and "cash" in portfolio and "stock" in portfolio):
+        raise ValueError("portfolio must have cash and stock")
+    return body
+
+
+def make_handler(service: DecisionService, timeout: float):
+    """HTTP request handler bound to a service; requests wait up to `timeout` seconds for a decision."""
+    class DecisionHandler(BaseHTTPRequestHandler):
+        def _send(self, status: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> None:
+            body = json.dumps(payload).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            for name, value in (headers or {}).items():
+                self.send_header(name, value)
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/health":
+                self._send(200, {"status": "ok"})
+            elif self.path == "/stats":
+                self._send(200, service.stats())
+            else:
+                self._send(404, {"error": f"Unknown path {self.path}"})
+
+        def do_POST(self):
+            if self.path != "/decide":
+                self._send(404, {"error": f"Unknown path {self.path}"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                job = parse_job(json.loads(self.rfile.read(length) or b"{}"))
+            except ValueError as e:
+                self._send(400, {"error": str(e)})
+                return
+
+            future = service.submit(job)
+            if future is None:
+                self._send(429, {"error": "Service saturated, retry later"}, {"Retry-After": "1"})
+                return
+            try:
+                self._send(200, future.result(timeout=timeout))
+            except TimeoutError:
+                self._send(504, {"error": f"Decision not ready after {timeout:g} s"})
+            except Exception as e:
+                self._send(500, {"error": repr(e)})
+
+        def log_message(self, format, *args):
+            # Per-request logging is replaced by /stats
+            pass
+
+    return DecisionHandler
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Serve trading decisions from a warm agent graph')
+    parser.add_argument('--host', type=str, default='127.0.0.1', help='Address to listen on (default: localhost only)')
+    parser.add_argument('--port', type=int, default=8765, help='Port to listen on')
+    parser.add_argument('--concurrency', type=int, default=4, help='Decisions run at the same time')
+    parser.add_argument('--queue-size', type=int, default=32, help='Decisions allowed to wait before requests are rejected')
+    parser.add_argument('--timeout', type=float, default=300, help='Seconds a request waits for its decision')
+    args = parser.parse_args()
+
+    service = DecisionService(args.concurrency, args.queue_size)
+    service.warm_up()
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(service, args.timeout))
+    print(f"Serving decisions on http://{args.host}:{args.port} (concurrency {args.concurrency}, queue {args.queue_size})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
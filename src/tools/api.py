@@ -1,10 +1,16 @@
 import os
-from typing import Dict, Any, List
+from typing import Dict, Any, Iterator, List, Optional
 import pandas as pd
 import requests
 
-import requests
+from tools.bar_store import bar_store, bars_to_df, bars_to_records
+from tools.local_store import load_records, record_file
+from tools.lookback_planner import bars_per_session, plan_start_date
+from tools.price_stream import READ_BLOCK_BYTES, PriceColumns, chunk_days, date_chunks, iter_json_array, read_blocks
+from tools.node_metrics import count_api_calls
+from tools.price_panel import get_price_panel
 
+@count_api_calls
 def get_financial_metrics(
     ticker: str,
     report_period: str,
@@ -12,6 +18,16 @@ def get_financial_metrics(
     limit: int = 1
 ) -> List[Dict[str, Any]]:
     """Fetch financial metrics from the API."""
+    local_metrics = load_records(ticker, "financial_metrics")
+    if local_metrics is not None:
+        financial_metrics = [
+            m for m in local_metrics
+            if m["report_period"] <= report_period and m["period"] == period
+        ][:limit]
+        if not financial_metrics:
+            raise ValueError("No financial metrics returned")
+        return financial_metrics
+
     headers = {"X-API-KEY": os.environ.get("FINANCIAL_DATASETS_API_KEY")}
     url = (
         f"https://api.financialdatasets.ai/financial-metrics/"
@@ -31,6 +47,7 @@ def get_financial_metrics(
         raise ValueError("No financial metrics returned")
     return financial_metrics
 
+@count_api_calls
 def search_line_items(
     ticker: str,
     line_items: List[str],
@@ -38,6 +55,17 @@ def search_line_items(
     limit: int = 1
 ) -> List[Dict[str, Any]]:
     """Fetch cash flow statements from the API."""
+    local_line_items = load_records(ticker, "line_items")
+    if local_line_items is not None:
+        search_results = [
+            {key: item[key] for key in ["ticker", "report_period", "period", *line_items] if key in item}
+            for item in local_line_items
+            if item["period"] == period
+        ][:limit]
+        if not search_results:
+            raise ValueError("No search results returned")
+        return search_results
+
     headers = {"X-API-KEY": os.environ.get("FINANCIAL_DATASETS_API_KEY")}
     url = "https://api.financialdatasets.ai/financials/search/line-items"
 
@@ -58,6 +86,7 @@ def search_line_items(
         raise ValueError("No search results returned")
     return search_results
 
+@count_api_calls
 def get_insider_trades(
     ticker: str,
     end_date: str,
@@ -66,6 +95,13 @@ def get_insider_trades(
     """
     Fetch insider trades for a given ticker and date range.
     """
+    local_trades = load_records(ticker, "insider_trades")
+    if local_trades is not None:
+        insider_trades = [t for t in local_trades if t["filing_date"] <= end_date][:limit]
+        if not insider_trades:
+            raise ValueError("No insider trades returned")
+        return insider_trades
+
     headers = {"X-API-KEY": os.environ.get("FINANCIAL_DATASETS_API_KEY")}
     url = (
         f"https://api.financialdatasets.ai/insider-trades/"
@@ -84,10 +120,15 @@ def get_insider_trades(
         raise ValueError("No insider trades returned")
     return insider_trades
 
+@count_api_calls
 def get_market_cap(
     ticker: str,
 ) -> List[Dict[str, Any]]:
     """Fetch market cap from the API."""
+    local_facts = load_records(ticker, "company_facts")
+    if local_facts is not None:
+        return local_facts.get('market_cap')
+
     headers = {"X-API-KEY": os.environ.get("FINANCIAL_DATASETS_API_KEY")}
     url = (
         f'https://api.financialdatasets.ai/company/facts'
@@ -105,18 +146,45 @@ def get_market_cap(
         raise ValueError("No company facts returned")
     return company_facts.get('market_cap')
 
+@count_api_calls
 def get_prices(
     ticker: str,
     start_date: str,
-    end_date: str
+    end_date: str,
+    interval: str = "day",
+    interval_multiplier: int = 1,
 ) -> List[Dict[str, Any]]:
-    """Fetch price data from the API."""
+    """Fetch price data from the API, in bars of interval_multiplier intervals."""
+    panel = get_price_panel()
+    if interval == "day" and interval_multiplier == 1 and panel is not None and panel.covers(ticker, start_date, end_date):
+        prices = panel.prices(ticker, start_date, end_date)
+        if not prices:
+            raise ValueError("No price data returned")
+        return prices
+    if interval == "day" and interval_multiplier == 1:
+        local_prices = load_records(ticker, "prices")
+        if local_prices is not None:
+            prices = [p for p in local_prices if start_date <= p["time"][:10] <= end_date]
+            if not prices:
+                raise ValueError("No price data returned")
+            return prices
+    elif bar_store.has(ticker, interval, interval_multiplier):
+        # Intraday ranges are better read typed, with get_price_data or get_recent_prices
+        prices = [
+            price
+            for day_bars in bar_store.iter_days(ticker, start_date, end_date, interval, interval_multiplier)
+            for price in bars_to_records(day_bars)
+        ]
+        if not prices:
+            raise ValueError("No price data returned")
+        return prices
+
     headers = {"X-API-KEY": os.environ.get("FINANCIAL_DATASETS_API_KEY")}
     url = (
         f"https://api.financialdatasets.ai/prices/"
         f"?ticker={ticker}"
-        f"&interval=day"
-        f"&interval_multiplier=1"
+        f"&interval={interval}"
+        f"&interval_multiplier={interval_multiplier}"
         f"&start_date={start_date}"
         f"&end_date={end_date}"
     )
@@ -131,6 +199,84 @@ def get_prices(
         raise ValueError("No price data returned")
     return prices
 
+@count_api_calls
+def get_recent_prices(
+    ticker: str,
+    end_date: str,
+    bars: int,
+    interval: str = "day",
+    interval_multiplier: int = 1,
+) -> List[Dict[str, Any]]:
+    """
+    The last `bars` price records up to end_date. Bars in the bar store are read typed from
+    the last few day files, and only those bars are turned into records.
+    """
+    if interval != "day" or interval_multiplier != 1:
+        if bar_store.has(ticker, interval, interval_multiplier):
+            recent = bar_store.tail(ticker, end_date, bars, interval, interval_multiplier)
+            if not len(recent):
+                raise ValueError("No price data returned")
+            return bars_to_records(recent)
+    start_date = plan_start_date(end_date, bars, bars_per_day=bars_per_session(interval, interval_multiplier))
+    return get_prices(ticker, start_date, end_date, interval, interval_multiplier)[-bars:]
+
+@count_api_calls
+def stream_prices(
+    ticker: str,
+    start_date: str,
+    end_date: str,
+    interval: str = "day",
+    interval_multiplier: int = 1,
+    days_per_request: Optional[int] = None,
+) -> Iterator[Dict[str, Any]]:
+    """
+    Price records of the range, streamed one at a time. The range is requested in date
+    chunks of days_per_request days (by default about PRICE_CHUNK_BARS bars each), and each
+    response is parsed as it downloads instead of being loaded whole.
+    """
+    if interval == "day" and interval_multiplier == 1:
+        local_path = record_file(ticker, "prices")
+        if local_path is not None:
+            for price in iter_json_array(read_blocks(local_path)):
+                if start_date <= price["time"][:10] <= end_date:
+                    yield price
+            return
+    elif bar_store.has(ticker, interval, interval_multiplier):
+        for day_bars in bar_store.iter_days(ticker, start_date, end_date, interval, interval_multiplier):
+            yield from bars_to_records(day_bars)
+        return
+
+    headers = {"X-API-KEY": os.environ.get("FINANCIAL_DATASETS_API_KEY")}
+    days = days_per_request or chunk_days(interval, interval_multiplier)
+    for chunk_start, chunk_end in date_chunks(start_date, end_date, days):
+        url = (
+            f"https://api.financialdatasets.ai/prices/"
+            f"?ticker={ticker}"
+            f"&interval={interval}"
+            f"&interval_multiplier={interval_multiplier}"
+            f"&start_date={chunk_start}"
+            f"&end_date={chunk_end}"
+        )
+        with requests.get(url, headers=headers, stream=True) as response:
+            if response.status_code != 200:
+                raise Exception(
+                    f"Error fetching data: {response.status_code} - {response.text}"
+                )
+            yield from iter_json_array(response.iter_content(READ_BLOCK_BYTES), key="prices")
+
+def get_price_columns(
+    ticker: str,
+    start_date: str,
+    end_date: str,
+    interval: str = "day",
+    interval_multiplier: int = 1,
+) -> PriceColumns:
+    """Stream the range's prices into typed column buffers."""
+    columns = PriceColumns().extend(stream_prices(ticker, start_date, end_date, interval, interval_multiplier))
+    if not len(columns):
+        raise ValueError("No price data returned")
+    return columns
+
 def prices_to_df(prices: List[Dict[str, Any]]) -> pd.DataFrame:
     """Convert prices to a DataFrame."""
     df = pd.DataFrame(prices)
@@ -146,7 +292,25 @@ def prices_to_df(prices: List[Dict[str, Any]]) -> pd.DataFrame:
 def get_price_data(
     ticker: str,
     start_date: str,
-    end_date: str
+    end_date: str,
+    interval: str = "day",
+    interval_multiplier: int = 1,
 ) -> pd.DataFrame:
-    prices = get_prices(ticker, start_date, end_date)
-    return prices_to_df(prices)
+    """
+    Prices of the range as a DataFrame, streamed into typed columns (see stream_prices), or
+    read from the shared price panel when one covers the range, or from the bar store's
+    typed intraday bars.
+    """
+    panel = get_price_panel()
+    if interval == "day" and interval_multiplier == 1 and panel is not None and panel.covers(ticker, start_date, end_date):
+        df = panel.frame(ticker, start_date, end_date)
+        if df.empty:
+            raise ValueError("No price data returned")
+        return df
+    if (interval != "day" or interval_multiplier != 1) and bar_store.has(ticker, interval, interval_multiplier):
+        # Typed bars straight from the memory-mapped day files
+        bars = bar_store.load(ticker, start_date, end_date, interval, interval_multiplier)
+        if not len(bars):
+            raise ValueError("No price data returned")
+        return bars_to_df(bars)
+    return get_price_columns(ticker, start_date, end_date, interval, interval_multiplier).to_df()
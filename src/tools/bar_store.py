@@ -0,0 +1,252 @@
+"""
+Memory-mapped store of intraday bars.
+
+A year of minute bars is about 100k bars per ticker, far too many for lists of price
+dicts. The store keeps bars as compact typed records (BAR_DTYPE, 48 bytes a bar) in one
+.npy file per ticker, interval and trading day, and reads them back memory-mapped, so only
+the days in use are paged in. Prices are float64, like the API's, so stored bars give the
+agents exactly the prices the API returned. chunked_indicator runs an indicator over a range one day at
+a time, carrying just the indicator's warm-up bars from one day to the next, so memory
+stays bounded however long the range is.
+"""
+import os
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from tools.local_store import get_local_store_dir
+
+BAR_DTYPE = np.dtype([
+    ("time", "M8[s]"),
+    ("open", "<f8"),
+    ("high", "<f8"),
+    ("low", "<f8"),
+    ("close", "<f8"),
+    ("volume", "<i8"),
+])
+
+PRICE_FIELDS = ["open", "high", "low", "close", "volume"]
+
+
+def get_bar_store_dir() -> Optional[str]:
+    """Returns the bar store directory: BAR_STORE_DIR, or bars/ in the local data store."""
+    root = os.environ.get("BAR_STORE_DIR")
+    if root:
+        return root
+    local_root = get_local_store_dir()
+    return os.path.join(local_root, "bars") if local_root else None
+
+
+def interval_key(interval: str = "day", multiplier: int = 1) -> str:
+    return f"{multiplier}{interval}"
+
+
+def records_to_bars(records: List[Dict[str, Any]]) -> np.ndarray:
+    """Convert price records, as get_prices returns them, to typed bars."""
+    bars = np.empty(len(records), dtype=BAR_DTYPE)
+    if not records:
+        return bars
+    times = pd.to_datetime([r["time"] for r in records], utc=True)
+    bars["time"] = times.tz_localize(None).values.astype("M8[s]")
+    for field in PRICE_FIELDS:
+        bars[field] = [r[field] for r in records]
+    return bars
+
+
+def bars_to_records(bars: np.ndarray) -> List[Dict[str, Any]]:
+    """Convert typed bars back to price records."""
+    times = np.datetime_as_string(bars["time"], unit="s")
+    columns = {field: bars[field].tolist() for field in PRICE_FIELDS}
+    return [
+        {**{field: columns[field][i] for field in PRICE_FIELDS}, "time": f"{times[i]}Z"}
+        for i in range(len(bars))
+    ]
+
+
+def bars_to_df(bars: np.ndarray) -> pd.DataFrame:
+    """DataFrame of typed bars, shaped like prices_to_df's (float64 prices, time index)."""
+    df = pd.DataFrame({field: bars[field].astype(np.float64) for field in PRICE_FIELDS})
+    df.index = pd.DatetimeIndex(bars["time"], name="Date")
+    return df
+
+
+def _load_day(path: str, mmap_mode: Optional[str] = "r") -> np.ndarray:
+    """Bars of one day file. Files written with float32 prices are read as BAR_DTYPE copies."""
+    bars = np.load(path, mmap_mode=mmap_mode)
+    return bars if bars.dtype == BAR_DTYPE else bars.astype(BAR_DTYPE)
+
+
+class BarStore:
+    """Typed bars on disk, one memory-mapped .npy file per ticker, interval and day."""
+
+    def __init__(self, root: Optional[str] = None):
+        """
+        Args:
+            root: Store directory. Defaults to get_bar_store_dir() at each call
+        """
+        self.root = root
+
+    def _dir(self, ticker: str, interval: str, multiplier: int) -> Optional[str]:
+        root = self.root or get_bar_store_dir()
+        return os.path.join(root, ticker, interval_key(interval, multiplier)) if root else None
+
+    def has(self, ticker: str, interval: str = "minute", multiplier: int = 1) -> bool:
+        """Whether any bars of the ticker at this interval are stored."""
+        directory = self._dir(ticker, interval, multiplier)
+        return directory is not None and os.path.isdir(directory)
+
+    def days(
+        self,
+        ticker: str,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        interval: str = "minute",
+        multiplier: int = 1,
+    ) -> List[str]:
+        """The stored days (YYYY-MM-DD) of the ticker within the range, oldest first."""
+        if not self.has(ticker, interval, multiplier):
+            return []
+        days = sorted(name[:-len(".npy")] for name in os.listdir(self._dir(ticker, interval, multiplier)) if name.endswith(".npy"))
+        return [day for day in days if (not start_date or day >= start_date) and (not end_date or day <= end_date)]
+
+    def write(self, ticker: str, bars: np.ndarray, interval: str = "minute", multiplier: int = 1) -> List[str]:
+        """
+        Store bars (typed, or price records), merged with the bars already stored for
+        their days. Returns the written paths.
+        """
+        if not isinstance(bars, np.ndarray):
+            bars = records_to_bars(bars)
+        root = self.root or get_bar_store_dir()
+        if not root:
+            raise ValueError("No bar store configured (set BAR_STORE_DIR or LOCAL_DATA_DIR)")
+        directory = self._dir(ticker, interval, multiplier)
+        os.makedirs(directory, exist_ok=True)
+
+        paths = []
+        bar_days = bars["time"].astype("M8[D]")
+        for day in np.unique(bar_days):
+            day_bars = bars[bar_days == day]
+            path = os.path.join(directory, f"{day}.npy")
+            if os.path.exists(path):
+                day_bars = np.concatenate([_load_day(path, mmap_mode=None), day_bars])
+            # Later bars for the same time replace earlier ones
+            _, last = np.unique(day_bars["time"][::-1], return_index=True)
+            day_bars = day_bars[len(day_bars) - 1 - last]
+            tmp_path = f"{path[:-len('.npy')]}.tmp.npy"
+            np.save(tmp_path, day_bars)
+            os.replace(tmp_path, path)
+            paths.append(path)
+        return paths
+
+    def iter_days(
+        self,
+        ticker: str,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        interval: str = "minute",
+        multiplier: int = 1,
+    ) -> Iterator[np.ndarray]:
+        """Memory-mapped, read-only bars of each stored day in the range, oldest first."""
+        directory = self._dir(ticker, interval, multiplier)
+        for day in self.days(ticker, start_date, end_date, interval, multiplier):
+            yield _load_day(os.path.join(directory, f"{day}.npy"))
+
+    def load(
+        self,
+        ticker: str,
+        start_date: Optional[str] = None,
+        end_date: Optional[str] = None,
+        interval: str = "minute",
+        multiplier: int = 1,
+    ) -> np.ndarray:
+        """Bars of the range in one array (a copy: use iter_days for long ranges)."""
+        chunks = list(self.iter_days(ticker, start_date, end_date, interval, multiplier))
+        return np.concatenate(chunks) if chunks else np.empty(0, dtype=BAR_DTYPE)
+
+    def tail(self, ticker: str, end_date: str, bars: int, interval: str = "minute", multiplier: int = 1) -> np.ndarray:
+        """The last `bars` bars up to end_date, reading only as many days as they span."""
+        directory = self._dir(ticker, interval, multiplier)
+        chunks, count = [], 0
+        for day in reversed(self.days(ticker, end_date=end_date, interval=interval, multiplier=multiplier)):
+            if count >= bars:
+                break
+            chunk = _load_day(os.path.join(directory, f"{day}.npy"))
+            chunks.append(chunk)
+            count += len(chunk)
+        if not chunks:
+            return np.empty(0, dtype=BAR_DTYPE)
+        return np.concatenate(chunks[::-1])[-bars:]
+
+
+def _tail(result: Any, n: int) -> Any:
+    """The last n rows of an indicator result (a Series, DataFrame, tuple or dict of them)."""
+    if isinstance(result, tuple):
+        return tuple(_tail(item, n) for item in result)
+    if isinstance(result, dict):
+        return {key: _tail(value, n) for key, value in result.items()}
+    return result.iloc[-n:]
+
+
+def chunked_indicator(
+    indicator: Callable,
+    chunks: Iterable[np.ndarray],
+    carry_bars: Optional[int] = None,
+) -> Iterator[Any]:
+    """
+    Run an indicator over typed bars chunk by chunk (e.g. BarStore.iter_days), yielding
+    its values for each chunk's bars. Each chunk is prefixed with the last `carry_bars`
+    bars before it (by default the indicator's declared warm-up), so only one chunk and
+    the carry are in memory at a time.
+
+    Window indicators (moving averages, rolling volatility, RSI) match a run over the whole
+    range exactly. Recursive ones (the EMAs in MACD and ADX) restart from the carry and
+    converge to the full-range values as the carry grows; cumulative ones (OBV) restart
+    from zero each chunk, so only their changes are comparable across chunks.
+    """
+    carry_bars = carry_bars or getattr(indicator, "warmup_bars", 1)
+    carry = np.empty(0, dtype=BAR_DTYPE)
+    for chunk in chunks:
+        if not len(chunk):
+            continue
+        bars = np.concatenate([carry, chunk])
+        yield _tail(indicator(bars_to_df(bars)), len(chunk))
+        carry = bars[-carry_bars:]
+
+
+# Shared by the agents in this process
+bar_store = BarStore()
+
+
+if __name__ == "__main__":
+    import argparse
+    from datetime import datetime, timedelta
+
+    from tools.api import get_prices
+
+    parser = argparse.ArgumentParser(description='Download intraday bars into the bar store, one day at a time')
+    parser.add_argument('--tickers', type=str, required=True, help='Comma-separated tickers')
+    parser.add_argument('--start-date', type=str, required=True, help='Start date (YYYY-MM-DD)')
+    parser.add_argument('--end-date', type=str, required=True, help='End date (YYYY-MM-DD)')
+    parser.add_argument('--interval', type=str, default='minute', help='Bar interval (default: minute)')
+    parser.add_argument('--interval-multiplier', type=int, default=1, help='Bar interval multiplier (default: 1)')
+    parser.add_argument('--output', type=str, help='Bar store directory. Defaults to BAR_STORE_DIR, or bars/ in LOCAL_DATA_DIR')
+    args = parser.parse_args()
+
+    store = BarStore(args.output)
+    start = datetime.strptime(args.start_date, '%Y-%m-%d')
+    end = datetime.strptime(args.end_date, '%Y-%m-%d')
+    for ticker in args.tickers.split(','):
+        count = 0
+        day = start
+        while day <= end:
+            day_str = day.strftime('%Y-%m-%d')
+            try:
+                bars = records_to_bars(get_prices(ticker, day_str, day_str, args.interval, args.interval_multiplier))
+            except ValueError:
+                bars = None  # No session that day
+            if bars is not None:
+                store.write(ticker, bars, args.interval, args.interval_multiplier)
+                count += len(bars)
+            day += timedelta(days=1)
+        print(f"{ticker}: {count} bars stored")
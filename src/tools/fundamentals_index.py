@@ -0,0 +1,89 @@
+"""
+Point-in-time fundamentals.
+
+Financial metrics and line items change once a quarter, so each ticker's full report
+history is fetched once and kept sorted by report period. "Latest as of date D" is then a
+binary search over that history: daily steps cost no API calls, and reports from after D
+are never returned. A history is refetched when asked for a date later than the day it was
+fetched on, so a long-running process picks up newly filed reports.
+"""
+from bisect import bisect_right
+from datetime import date
+from typing import Any, Dict, List, Tuple
+
+from tools.api import get_financial_metrics, search_line_items
+
+# Report date far enough in the future to fetch every report
+ALL_REPORTS = "9999-12-31"
+
+
+class FundamentalsIndex:
+    """Per-ticker report histories, fetched on first use and answered as of any date."""
+
+    def __init__(self, period: str = "ttm", history_limit: int = 100):
+        """
+        Args:
+            period: Report period type
+            history_limit: Number of reports fetched per ticker
+        """
+        self.period = period
+        self.history_limit = history_limit
+        # Fetch date, and oldest-first records with their report periods, keyed by ticker (and line items)
+        self._histories: Dict[Tuple, Tuple[str, List[str], List[Dict[str, Any]]]] = {}
+
+    def _history(self, key: Tuple, as_of: str, fetch) -> Tuple[List[str], List[Dict[str, Any]]]:
+        # Reports may have been filed since a history fetched before as_of
+        if key not in self._histories or as_of > self._histories[key][0]:
+            try:
+                records = sorted(fetch(), key=lambda record: record["report_period"])
+            except ValueError:
+                records = []
+            periods = [record["report_period"] for record in records]
+            self._histories[key] = (date.today().isoformat(), periods, records)
+        _, periods, records = self._histories[key]
+        return periods, records
+
+    def _as_of(self, periods: List[str], records: List[Dict[str, Any]], as_of: str, limit: int) -> List[Dict[str, Any]]:
+        """The latest `limit` records on or before as_of, most recent first."""
+        end = bisect_right(periods, as_of)
+        return records[max(end - limit, 0):end][::-1]
+
+    def financial_metrics(self, ticker: str, as_of: str, limit: int = 1) -> List[Dict[str, Any]]:
+        """Financial metrics as get_financial_metrics returns them for report_period=as_of."""
+        periods, records = self._history(
+            ("financial_metrics", ticker),
+            as_of,
+            lambda: get_financial_metrics(ticker, report_period=ALL_REPORTS, period=self.period, limit=self.history_limit),
+        )
+        end = bisect_right(periods, as_of)
+        if end < limit and len(records) >= self.history_limit:
+            # The requested reports are older than the fetched history
+            return get_financial_metrics(ticker, report_period=as_of, period=self.period, limit=limit)
+
+        financial_metrics = self._as_of(periods, records, as_of, limit)
+        if not financial_metrics:
+            raise ValueError("No financial metrics returned")
+        return financial_metrics
+
+    def line_items(self, ticker: str, line_items: List[str], as_of: str, limit: int = 1) -> List[Dict[str, Any]]:
+        """
+        Line items as search_line_items returns them, restricted to reports on or before
+        as_of (the line-item search itself has no date filter).
+        """
+        periods, records = self._history(
+            ("line_items", ticker, tuple(line_items)),
+            as_of,
+            lambda: search_line_items(ticker, line_items, period=self.period, limit=self.history_limit),
+        )
+        search_results = self._as_of(periods, records, as_of, limit)
+        if not search_results:
+            raise ValueError("No search results returned")
+        return search_results
+
+    def clear(self) -> None:
+        """Forget every fetched history, e.g. to pick up newly filed reports."""
+        self._histories.clear()
+
+
+# Shared by the agents in this process
+fundamentals_index = FundamentalsIndex()
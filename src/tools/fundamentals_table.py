@@ -0,0 +1,190 @@
+"""
+Columnar store of report-period data (financial metrics or line items) for a universe.
+
+All tickers' reports live in one set of NumPy columns, sorted by ticker and then by report
+period, so screens and point-in-time lookups run over the whole universe at once.
+"""
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from tools.api import get_financial_metrics, search_line_items
+
+# Record keys that identify a report rather than hold a value
+KEY_FIELDS = ["ticker", "report_period", "period"]
+
+
+def _period_days(report_periods) -> np.ndarray:
+    return np.asarray(report_periods, dtype="datetime64[D]").astype(np.int64)
+
+
+class FundamentalsTable:
+    """
+    Report-period values for many tickers as columns.
+
+    Rows of ticker i are offsets[i]:offsets[i + 1], oldest report first.
+    """
+
+    def __init__(
+        self,
+        tickers: List[str],
+        offsets: np.ndarray,
+        report_periods: np.ndarray,
+        columns: Dict[str, np.ndarray],
+    ):
+        """
+        Args:
+            tickers: Tickers in the table
+            offsets: (n_tickers + 1,) first row of each ticker, then the row count
+            report_periods: (n_rows,) report period of each row as datetime64[D]
+            columns: Field name to (n_rows,) float64 values, NaN where missing
+        """
+        self.tickers = list(tickers)
+        self.ticker_index = {ticker: i for i, ticker in enumerate(self.tickers)}
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.report_periods = np.asarray(report_periods, dtype="datetime64[D]")
+        self.columns = columns
+
+        # Sort key combining the ticker and the report period, for as-of lookups
+        self.ticker_ids = np.repeat(np.arange(len(self.tickers)), np.diff(self.offsets))
+        self._span = int(self.report_periods.astype(np.int64).max(initial=0)) + 1
+        self._keys = self.ticker_ids * self._span + np.maximum(self.report_periods.astype(np.int64), 0)
+
+    def __len__(self) -> int:
+        return len(self.report_periods)
+
+    @classmethod
+    def from_records(
+        cls,
+        records_by_ticker: Dict[str, List[Dict[str, Any]]],
+        fields: Optional[List[str]] = None,
+    ) -> "FundamentalsTable":
+        """
+        Build a table from API-shaped records per ticker, in any order.
+
+        Args:
+            records_by_ticker: Ticker to its list of metric or line-item records
+            fields: Fields to keep. Defaults to every numeric non-key field in the records
+        """
+        if fields is None:
+            non_numeric = {
+                key for records in records_by_ticker.values() for record in records for key, value in record.items()
+                if value is not None and (isinstance(value, bool) or not isinstance(value, (int, float)))
+            }
+            fields = list(dict.fromkeys(
+                key for records in records_by_ticker.values() for record in records for key in record
+                if key not in KEY_FIELDS and key not in non_numeric
+            ))
+
+        tickers = list(records_by_ticker)
+        offsets = np.zeros(len(tickers) + 1, dtype=np.int64)
+        report_periods = []
+        columns = {field: [] for field in fields}
+        for i, ticker in enumerate(tickers):
+            records = sorted(records_by_ticker[ticker], key=lambda record: record["report_period"])
+            offsets[i + 1] = offsets[i] + len(records)
+            report_periods.extend(record["report_period"] for record in records)
+            for field in fields:
+                columns[field].extend(record.get(field) for record in records)
+
+        return cls(
+            tickers,
+            offsets,
+            np.array(report_periods, dtype="datetime64[D]"),
+            {field: np.array(values, dtype=float) for field, values in columns.items()},
+        )
+
+    @classmethod
+    def from_api(
+        cls,
+        tickers: List[str],
+        end_date: str,
+        kind: str = "financial_metrics",
+        line_items: Optional[List[str]] = None,
+        period: str = "ttm",
+        limit: int = 100,
+    ) -> "FundamentalsTable":
+        """
+        Fetch each ticker's report history once and build a table from it.
+
+        Args:
+            tickers: Tickers to fetch
+            end_date: Latest report period to include
+            kind: "financial_metrics" or "line_items"
+            line_items: Line items to fetch when kind is "line_items"
+            period: Report period type
+            limit: Maximum number of reports per ticker
+        """
+        records_by_ticker = {}
+        for ticker in tickers:
+            try:
+                if kind == "financial_metrics":
+                    records = get_financial_metrics(ticker, report_period=end_date, period=period, limit=limit)
+                else:
+                    records = [
+                        item for item in search_line_items(ticker, line_items, period=period, limit=limit)
+                        if item["report_period"] <= end_date
+                    ]
+            except ValueError:
+                records = []
+            records_by_ticker[ticker] = records
+        return cls.from_records(records_by_ticker, fields=line_items if kind == "line_items" else None)
+
+    @classmethod
+    def load(cls, path: str) -> "FundamentalsTable":
+        """Read a table written by save."""
+        with np.load(path) as archive:
+            columns = {key[len("column_"):]: archive[key] for key in archive.files if key.startswith("column_")}
+            return cls(archive["tickers"].tolist(), archive["offsets"], archive["report_periods"], columns)
+
+    def save(self, path: str) -> None:
+        """Write the table as one compressed NumPy archive."""
+        np.savez_compressed(
+            path,
+            tickers=np.array(self.tickers),
+            offsets=self.offsets,
+            report_periods=self.report_periods,
+            **{f"column_{field}": values for field, values in self.columns.items()},
+        )
+
+    def rows(self, ticker: str) -> slice:
+        """The rows of one ticker."""
+        i = self.ticker_index[ticker]
+        return slice(self.offsets[i], self.offsets[i + 1])
+
+    def latest_rows(self, as_of: str, tickers: Optional[List[str]] = None) -> np.ndarray:
+        """
+        Row of the latest report on or before as_of for each ticker, found with a single
+        binary search across the whole table. -1 where a ticker has no such report, or is
+        not in the table.
+        """
+        if tickers is None:
+            ticker_ids = np.arange(len(self.tickers))
+        else:
+            ticker_ids = np.array([self.ticker_index.get(t, -1) for t in tickers], dtype=np.int64)
+        known = ticker_ids >= 0
+        ticker_ids = np.where(known, ticker_ids, 0)
+        as_of_day = min(max(int(_period_days(as_of)), 0), self._span - 1)
+        rows = np.searchsorted(self._keys, ticker_ids * self._span + as_of_day, side="right") - 1
+        return np.where(known & (rows >= self.offsets[ticker_ids]), rows, -1)
+
+    def latest(self, as_of: str, tickers: Optional[List[str]] = None) -> pd.DataFrame:
+        """DataFrame of each ticker's latest report on or before as_of, indexed by ticker."""
+        tickers = self.tickers if tickers is None else list(tickers)
+        rows = self.latest_rows(as_of, tickers)
+        found = rows >= 0
+        frame = pd.DataFrame(
+            {field: values[rows[found]] for field, values in self.columns.items()},
+            index=pd.Index(np.array(tickers)[found], name="ticker"),
+        )
+        frame.insert(0, "report_period", self.report_periods[rows[found]])
+        return frame
+
+    def to_frame(self) -> pd.DataFrame:
+        """The whole table as a DataFrame with one row per ticker and report period."""
+        return pd.DataFrame({
+            "ticker": np.array(self.tickers)[self.ticker_ids] if len(self) else np.array([], dtype=str),
+            "report_period": self.report_periods,
+            **self.columns,
+        })
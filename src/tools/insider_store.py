@@ -0,0 +1,134 @@
+"""
+Local insider-trade store indexed by ticker and filing date.
+
+Each ticker's trades are fetched once, kept sorted by filing date and topped up
+incrementally as new filings appear. Running totals (prefix sums) of trade counts, shares
+and dollar value make any windowed aggregate two binary searches and a subtraction,
+whatever the length of the history.
+"""
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from tools.api import get_insider_trades
+from tools.local_store import load_records, save_records
+
+# Trailing windows, in calendar days, reported to the agents
+INSIDER_ACTIVITY_WINDOWS = (30, 90, 365)
+
+
+def _days(dates) -> np.ndarray:
+    return np.asarray(dates, dtype="datetime64[D]").astype(np.int64)
+
+
+def _trade_key(trade: Dict[str, Any]):
+    return (trade.get("filing_date"), trade.get("transaction_date"), trade.get("name"), trade.get("transaction_shares"))
+
+
+class InsiderTradeStore:
+    """Insider trades per ticker, sorted by filing date, with prefix sums for windowed aggregates."""
+
+    def __init__(self, root: Optional[str] = None, page_size: int = 1000):
+        """
+        Args:
+            root: Optional directory to persist trades in, in the local data store layout
+            page_size: Number of trades requested per API call
+        """
+        self.root = root
+        self.page_size = page_size
+        self._tickers: Dict[str, Dict[str, Any]] = {}
+
+    def _fetch_since(self, ticker: str, end_date: str, after: Optional[str]) -> List[Dict[str, Any]]:
+        """Page backwards from end_date until reaching filings on or before `after`."""
+        trades = []
+        page_end = end_date
+        while True:
+            try:
+                page = get_insider_trades(ticker, end_date=page_end, limit=self.page_size)
+            except ValueError:
+                break
+            trades.extend(page)
+            oldest = min(trade["filing_date"] for trade in page)
+            if len(page) < self.page_size or (after and oldest <= after) or oldest == page_end:
+                break
+            page_end = oldest
+        return trades
+
+    def update(self, ticker: str, end_date: Optional[str] = None) -> None:
+        """
+        Add any trades filed since the last update, up to end_date (default today).
+        Nothing is fetched when the ticker is already synced through end_date.
+        """
+        end_date = end_date or datetime.now().strftime('%Y-%m-%d')
+        state = self._tickers.get(ticker)
+        if state is None:
+            stored = load_records(ticker, "insider_trades", root=self.root) if self.root else None
+            state = self._index(stored or [], synced_through=None)
+        if state["synced_through"] and state["synced_through"] >= end_date:
+            self._tickers[ticker] = state
+            return
+
+        last_filing = state["records"][-1]["filing_date"] if state["records"] else None
+        new_trades = self._fetch_since(ticker, end_date, last_filing)
+
+        # Pages overlap on their boundary filing date, and the first page on the last stored one
+        merged = list({_trade_key(trade): trade for trade in state["records"] + new_trades}.values())
+        self._tickers[ticker] = self._index(merged, synced_through=end_date)
+        if self.root and len(merged) > len(state["records"]):
+            save_records(ticker, "insider_trades", merged[::-1], root=self.root)
+
+    def _index(self, trades: List[Dict[str, Any]], synced_through: Optional[str]) -> Dict[str, Any]:
+        """Sort trades by filing date and build their prefix sums."""
+        records = sorted(trades, key=lambda trade: trade["filing_date"])
+        shares = np.array([trade.get("transaction_shares") or 0.0 for trade in records], dtype=float)
+        prices = np.array([trade.get("transaction_price_per_share") or np.nan for trade in records], dtype=float)
+        values = np.array([abs(trade.get("transaction_value") or np.nan) for trade in records], dtype=float)
+        dollar_value = np.nan_to_num(np.where(np.isfinite(values), values, np.abs(shares) * prices))
+
+        columns = {
+            "trades": (shares != 0).astype(float),
+            "buys": (shares > 0).astype(float),
+            "sells": (shares < 0).astype(float),
+            "net_shares": shares,
+            "buy_value": np.where(shares > 0, dollar_value, 0.0),
+            "sell_value": np.where(shares < 0, dollar_value, 0.0),
+        }
+        return {
+            "records": records,
+            "days": _days([trade["filing_date"][:10] for trade in records]),
+            "prefix": {name: np.concatenate([[0.0], np.cumsum(values)]) for name, values in columns.items()},
+            "synced_through": synced_through,
+        }
+
+    def _state(self, ticker: str, as_of: str) -> Dict[str, Any]:
+        if ticker not in self._tickers or (self._tickers[ticker]["synced_through"] or "") < as_of:
+            self.update(ticker, max(as_of, datetime.now().strftime('%Y-%m-%d')))
+        return self._tickers[ticker]
+
+    def trades(self, ticker: str, as_of: str, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Trades filed on or before as_of, most recent first, as get_insider_trades returns them."""
+        state = self._state(ticker, as_of)
+        end = int(np.searchsorted(state["days"], _days(as_of), side="right"))
+        start = 0 if limit is None else max(end - limit, 0)
+        return state["records"][start:end][::-1]
+
+    def window(self, ticker: str, as_of: str, days: int) -> Dict[str, float]:
+        """
+        Aggregates of the trades filed in the `days` calendar days up to and including as_of:
+        trade, buy and sell counts, net shares, and bought, sold and net dollar value.
+        """
+        state = self._state(ticker, as_of)
+        end_day = _days(as_of)
+        start, end = np.searchsorted(state["days"], [end_day - days, end_day], side="right")
+        aggregates = {name: float(prefix[end] - prefix[start]) for name, prefix in state["prefix"].items()}
+        aggregates["net_value"] = aggregates["buy_value"] - aggregates["sell_value"]
+        return aggregates
+
+    def activity(self, ticker: str, as_of: str, windows: Sequence[int] = INSIDER_ACTIVITY_WINDOWS) -> Dict[str, Dict[str, float]]:
+        """Aggregates over each trailing window, keyed like "90d"."""
+        return {f"{days}d": self.window(ticker, as_of, days) for days in windows}
+
+
+# Shared by the agents in this process
+insider_store = InsiderTradeStore()
@@ -0,0 +1,227 @@
+"""
+Incrementally updated technical and risk metrics for live bars.
+
+Each new bar updates running sums over fixed windows (ring buffers) and recursive EMAs, so
+trend, momentum, mean reversion, RSI, the volatility regime and the risk metrics cost O(1)
+per bar instead of recomputing the whole series. The metrics use the same windows as the
+technical analyst and the risk manager, and are bucketed with the thresholds those agents
+define. A decision only needs to be re-run when one of those states changes.
+"""
+import math
+from collections import deque
+from typing import Any, Dict, Iterable, Optional
+
+import numpy as np
+
+from agents.risk_manager import (
+    DRAWDOWN_MODERATE,
+    DRAWDOWN_SEVERE,
+    TRADING_DAYS_PER_YEAR,
+    VAR_HIGH,
+    VAR_MODERATE,
+    VOLATILITY_HIGH,
+    VOLATILITY_MODERATE,
+    risk_window_bars,
+)
+from agents.technicals import (
+    BOLLINGER_LOWER_POSITION,
+    BOLLINGER_UPPER_POSITION,
+    MEAN_REVERSION_Z_SCORE,
+    MOMENTUM_THRESHOLD,
+    RSI_OVERBOUGHT,
+    RSI_OVERSOLD,
+    TREND_EMA_SPANS,
+    VOL_REGIME_HIGH,
+    VOL_REGIME_LOW,
+    VOL_Z_SCORE,
+)
+
+
+class RollingWindow:
+    """The last `size` values, with their running sum and sum of squares."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.values = np.zeros(size)
+        self.count = 0
+        self.position = 0
+        self.total = 0.0
+        self.total_squares = 0.0
+
+    def push(self, value: float) -> None:
+        if self.count == self.size:
+            evicted = self.values[self.position]
+            self.total -= evicted
+            self.total_squares -= evicted * evicted
+        else:
+            self.count += 1
+        self.values[self.position] = value
+        self.total += value
+        self.total_squares += value * value
+        self.position = (self.position + 1) % self.size
+
+        # Refresh the running sums once per window to stop floating-point drift
+        if self.position == 0:
+            self.total = float(self.values.sum())
+            self.total_squares = float((self.values ** 2).sum())
+
+    @property
+    def full(self) -> bool:
+        return self.count == self.size
+
+    def mean(self) -> float:
+        return self.total / self.count if self.count else math.nan
+
+    def std(self) -> float:
+        """Sample standard deviation (ddof=1, as pandas computes it)."""
+        if self.count < 2:
+            return math.nan
+        variance = (self.total_squares - self.total * self.total / self.count) / (self.count - 1)
+        return math.sqrt(max(variance, 0.0))
+
+
+class RecursiveEMA:
+    """Exponential moving average updated one value at a time (pandas' ewm with adjust=False)."""
+
+    def __init__(self, span: int):
+        self.alpha = 2 / (span + 1)
+        self.value = math.nan
+
+    def push(self, value: float) -> None:
+        self.value = value if math.isnan(self.value) else self.alpha * value + (1 - self.alpha) * self.value
+
+
+class LiveSignals:
+    """Technical and risk metrics of one ticker, updated bar by bar."""
+
+    def __init__(self, history_bars: int, bars_per_day: float = 1):
+        """
+        Args:
+            history_bars: Bars kept for the full agent pipeline when a decision is re-run
+            bars_per_day: Bars per trading session (see bars_per_session), for intraday feeds
+        """
+        self.bars_per_day = bars_per_day
+        self.bars = deque(maxlen=history_bars)
+        self.last_close = None
+        self.emas = [RecursiveEMA(span) for span in TREND_EMA_SPANS]
+        self.momentum = {window: RollingWindow(window) for window in (21, 63, 126)}
+        self.volume = RollingWindow(21)
+        self.closes_50 = RollingWindow(50)
+        self.closes_20 = RollingWindow(20)
+        self.gains = RollingWindow(14)
+        self.losses = RollingWindow(14)
+        # 21-bar volatility over the last 63 bars, for the volatility regime
+        self.historical_vols = RollingWindow(63)
+        # The risk window spans a month of sessions, like the risk manager's
+        self.risk_returns = RollingWindow(risk_window_bars(bars_per_day) - 1)
+        self.risk_closes = deque(maxlen=risk_window_bars(bars_per_day))
+
+    def seed(self, bars: Iterable[Dict[str, Any]]) -> None:
+        """Replay a price history, oldest first, before the live bars arrive."""
+        for bar in bars:
+            self.update(bar)
+
+    def update(self, bar: Dict[str, Any]) -> None:
+        """Add one bar (a price record as get_prices returns it)."""
+        close, volume = float(bar["close"]), float(bar["volume"])
+        self.bars.append(bar)
+        if self.last_close is not None and self.last_close != 0:
+            change = close - self.last_close
+            ret = change / self.last_close
+            for window in self.momentum.values():
+                window.push(ret)
+            self.gains.push(max(change, 0.0))
+            self.losses.push(max(-change, 0.0))
+            self.risk_returns.push(ret)
+            if self.momentum[21].full:
+                self.historical_vols.push(self.momentum[21].std() * math.sqrt(TRADING_DAYS_PER_YEAR))
+        self.last_close = close
+        for ema in self.emas:
+            ema.push(close)
+        self.volume.push(volume)
+        self.closes_50.push(close)
+        self.closes_20.push(close)
+        self.risk_closes.append(close)
+
+    def metrics(self) -> Dict[str, float]:
+        """The latest value of every metric (NaN until its window has filled)."""
+        close = self.last_close if self.last_close is not None else math.nan
+        momentum = {window: rolling.total if rolling.full else math.nan for window, rolling in self.momentum.items()}
+        bb_mean, bb_std = self.closes_20.mean(), self.closes_20.std()
+        bb_upper, bb_lower = bb_mean + 2 * bb_std, bb_mean - 2 * bb_std
+        average_loss = self.losses.mean()
+        risk_closes = np.array(self.risk_closes)
+        historical_vol = self.historical_vols.values[(self.historical_vols.position - 1) % self.historical_vols.size]
+        ema_fast, ema_medium, ema_slow = (ema.value for ema in self.emas)
+        return {
+            "short_trend": ema_fast - ema_medium,
+            "medium_trend": ema_medium - ema_slow,
+            "momentum_score": 0.4 * momentum[21] + 0.3 * momentum[63] + 0.3 * momentum[126],
+            "volume_momentum": self.volume.values[(self.volume.position - 1) % self.volume.size] / self.volume.mean()
+            if self.volume.full else math.nan,
+            "z_score": (close - self.closes_50.mean()) / self.closes_50.std() if self.closes_50.full else math.nan,
+            "price_vs_bb": (close - bb_lower) / (bb_upper - bb_lower) if self.closes_20.full and bb_std > 0 else math.nan,
+            "rsi_14": 100 - 100 / (1 + self.gains.mean() / average_loss)
+            if self.losses.full and average_loss > 0 else (100.0 if self.losses.full else math.nan),
+            "volatility_regime": historical_vol / self.historical_vols.mean() if self.historical_vols.full else math.nan,
+            "volatility_z_score": (historical_vol - self.historical_vols.mean()) / self.historical_vols.std()
+            if self.historical_vols.full else math.nan,
+            # Scaled to daily moves, then annualized, as the risk manager does
+            "volatility": self.risk_returns.std() * math.sqrt(self.bars_per_day * TRADING_DAYS_PER_YEAR)
+            if self.risk_returns.full else math.nan,
+            "var_95": float(np.quantile(self.risk_returns.values, 0.05)) * math.sqrt(self.bars_per_day)
+            if self.risk_returns.full else math.nan,
+            "max_drawdown": float((risk_closes / np.maximum.accumulate(risk_closes) - 1).min()) if len(risk_closes) else math.nan,
+        }
+
+    def signal_states(self, metrics: Optional[Dict[str, float]] = None) -> Dict[str, str]:
+        """Metrics bucketed with the technical analyst's and risk manager's thresholds."""
+        m = metrics or self.metrics()
+        # The trend strategy's direction; ADX only sets its confidence
+        if m["short_trend"] > 0 and m["medium_trend"] > 0:
+            trend = "bullish"
+        elif m["short_trend"] <= 0 and m["medium_trend"] <= 0:
+            trend = "bearish"
+        else:
+            trend = "neutral"
+
+        volume_confirmation = m["volume_momentum"] > 1.0
+        if m["momentum_score"] > MOMENTUM_THRESHOLD and volume_confirmation:
+            momentum = "bullish"
+        elif m["momentum_score"] < -MOMENTUM_THRESHOLD and volume_confirmation:
+            momentum = "bearish"
+        else:
+            momentum = "neutral"
+
+        if m["z_score"] < -MEAN_REVERSION_Z_SCORE and m["price_vs_bb"] < BOLLINGER_LOWER_POSITION:
+            mean_reversion = "bullish"
+        elif m["z_score"] > MEAN_REVERSION_Z_SCORE and m["price_vs_bb"] > BOLLINGER_UPPER_POSITION:
+            mean_reversion = "bearish"
+        else:
+            mean_reversion = "neutral"
+
+        if m["volatility_regime"] < VOL_REGIME_LOW and m["volatility_z_score"] < -VOL_Z_SCORE:
+            volatility_regime = "low"
+        elif m["volatility_regime"] > VOL_REGIME_HIGH and m["volatility_z_score"] > VOL_Z_SCORE:
+            volatility_regime = "high"
+        else:
+            volatility_regime = "normal"
+
+        rsi = "oversold" if m["rsi_14"] < RSI_OVERSOLD else "overbought" if m["rsi_14"] > RSI_OVERBOUGHT else "neutral"
+        volatility = (
+            "high" if m["volatility"] > VOLATILITY_HIGH else "moderate" if m["volatility"] > VOLATILITY_MODERATE else "low"
+        )
+        var = "high" if m["var_95"] < VAR_HIGH else "moderate" if m["var_95"] < VAR_MODERATE else "low"
+        drawdown = (
+            "severe" if m["max_drawdown"] < DRAWDOWN_SEVERE else "moderate" if m["max_drawdown"] < DRAWDOWN_MODERATE else "low"
+        )
+        return {
+            "trend": trend,
+            "momentum": momentum,
+            "mean_reversion": mean_reversion,
+            "rsi": rsi,
+            "volatility_regime": volatility_regime,
+            "volatility": volatility,
+            "var": var,
+            "drawdown": drawdown,
+        }
@@ -0,0 +1,71 @@
+import json
+import os
+from typing import Any, List, Optional
+
+# Record sets kept per ticker, stored in the same shape the API returns them
+RECORD_KINDS = ["prices", "financial_metrics", "line_items", "insider_trades", "company_facts"]
+
+
+def get_local_store_dir() -> Optional[str]:
+    """Returns the local data store directory, if one is configured."""
+    return os.environ.get("LOCAL_DATA_DIR")
+
+
+def _record_path(root: str, ticker: str, kind: str) -> str:
+    if kind not in RECORD_KINDS:
+        raise ValueError(f"Unknown record kind: {kind}")
+    return os.path.join(root, ticker, f"{kind}.json")
+
+
+def save_records(
+    ticker: str,
+    kind: str,
+    records: Any,
+    root: Optional[str] = None,
+) -> str:
+    """Write a ticker's records to the local data store and return the file path."""
+    root = root or get_local_store_dir()
+    if not root:
+        raise ValueError("No local data store configured (set LOCAL_DATA_DIR)")
+    path = _record_path(root, ticker, kind)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w") as f:
+        json.dump(records, f, separators=(",", ":"))
+    return path
+
+
+def record_file(
+    ticker: str,
+    kind: str,
+    root: Optional[str] = None,
+) -> Optional[str]:
+    """Path of a ticker's records in the local data store, or None if they are not stored."""
+    root = root or get_local_store_dir()
+    if not root:
+        return None
+    path = _record_path(root, ticker, kind)
+    return path if os.path.exists(path) else None
+
+
+def load_records(
+    ticker: str,
+    kind: str,
+    root: Optional[str] = None,
+) -> Optional[Any]:
+    """Read a ticker's records from the local data store, or None if they are not stored."""
+    path = record_file(ticker, kind, root)
+    if path is None:
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def list_tickers(root: Optional[str] = None) -> List[str]:
+    """List the tickers present in the local data store."""
+    root = root or get_local_store_dir()
+    if not root or not os.path.isdir(root):
+        return []
+    return sorted(
+        name for name in os.listdir(root)
+        if os.path.isdir(os.path.join(root, name))
+    )
@@ -0,0 +1,61 @@
+"""
+Lookback planning from indicator warm-up requirements.
+
+Each indicator declares how many bars of history it needs before its latest value is
+defined. The planner takes the largest requirement of the indicators in use and turns
+it into the start date of the price history to fetch, for daily or intraday bars.
+"""
+import math
+from datetime import datetime, timedelta
+from typing import Callable, Optional
+
+from tools.trading_calendar import TradingCalendar, trading_days_to_calendar_days
+
+# Bars of each interval (with a multiplier of 1) in one 6.5-hour trading session
+SESSION_BARS = {
+    "second": 23400,
+    "minute": 390,
+    "hour": 6.5,
+    "day": 1,
+    "week": 1 / 5,
+    "month": 1 / 21,
+    "year": 1 / 252,
+}
+
+
+def bars_per_session(interval: str = "day", multiplier: int = 1) -> float:
+    """Bars of the given interval in one trading session."""
+    if interval not in SESSION_BARS:
+        raise ValueError(f"Unknown interval: {interval}")
+    return SESSION_BARS[interval] / multiplier
+
+
+def warmup(bars: int) -> Callable:
+    """Declare that an indicator needs `bars` bars of history for its latest value."""
+    def decorate(indicator: Callable) -> Callable:
+        indicator.warmup_bars = bars
+        return indicator
+    return decorate
+
+
+def required_bars(*indicators: Callable) -> int:
+    """The history, in bars, needed by every given indicator."""
+    return max((getattr(indicator, "warmup_bars", 1) for indicator in indicators), default=1)
+
+
+def plan_start_date(
+    end_date: str,
+    bars: int,
+    calendar: Optional[TradingCalendar] = None,
+    bars_per_day: float = 1,
+) -> str:
+    """
+    Start date of the shortest price history ending on end_date that holds `bars` bars,
+    with `bars_per_day` bars per trading session (see bars_per_session). Exact when a
+    trading calendar is given, otherwise a small calendar-day margin is used.
+    """
+    sessions = max(math.ceil(bars / bars_per_day), 1)
+    if calendar is not None:
+        return calendar.lookback_start(end_date, sessions).strftime('%Y-%m-%d')
+    end = datetime.strptime(end_date, '%Y-%m-%d')
+    return (end - timedelta(days=trading_days_to_calendar_days(sessions))).strftime('%Y-%m-%d')
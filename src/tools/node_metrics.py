@@ -0,0 +1,197 @@
+"""
+Per-node instrumentation of the agent graphs.
+
+Every node registered in main.py is wrapped so that each call records its wall and CPU
+time, the size of the messages it emits, the data API calls it makes, the LLM tokens it
+uses and, optionally, its peak traced memory. Records are kept in memory for summaries
+and, when a path is configured, appended to a JSON lines file.
+"""
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Numeric record fields summarized into percentiles
+SUMMARY_FIELDS = ["wall_ms", "cpu_ms", "peak_memory_kb", "payload_bytes", "api_calls", "total_tokens"]
+
+# Counters of the node running on the current thread (graph nodes run on worker threads)
+_counters = threading.local()
+
+
+def get_node_metrics_path() -> Optional[str]:
+    """Returns the JSON lines file node metrics are exported to, if one is configured."""
+    return os.environ.get("NODE_METRICS_PATH")
+
+
+def count_api_calls(fetch: Callable) -> Callable:
+    """Count calls to a data API function against the node making them."""
+    @functools.wraps(fetch)
+    def counted(*args, **kwargs):
+        counts = getattr(_counters, "node", None)
+        if counts is not None:
+            counts["api_calls"][fetch.__name__] = counts["api_calls"].get(fetch.__name__, 0) + 1
+        return fetch(*args, **kwargs)
+    return counted
+
+
+def record_llm_usage(response: Any) -> None:
+    """Add an LLM response's token usage to the node making the call."""
+    counts = getattr(_counters, "node", None)
+    usage = getattr(response, "usage_metadata", None) or {}
+    if counts is not None:
+        for key in ("input_tokens", "output_tokens", "total_tokens"):
+            counts[key] += usage.get(key) or 0
+
+
+def _payload_bytes(messages: Sequence[Any]) -> int:
+    return sum(len(str(message.content).encode()) for message in messages)
+
+
+class NodeMetrics:
+    """Per-call node records, with an optional JSON lines export and percentile summaries."""
+
+    def __init__(self, path: Optional[str] = None, trace_memory: bool = False):
+        """
+        Args:
+            path: Optional JSON lines file each record is appended to
+            trace_memory: Whether to measure peak memory with tracemalloc (slows every allocation)
+        """
+        self.path = path
+        self.trace_memory = trace_memory
+        self.records: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def record(self, record: Dict[str, Any]) -> None:
+        """Keep a node record and export it."""
+        with self._lock:
+            self.records.append(record)
+            if self.path:
+                with open(self.path, "a") as f:
+                    f.write(json.dumps(record) + "\n")
+
+    def extend(self, records: List[Dict[str, Any]]) -> None:
+        """Keep records made elsewhere, e.g. in a worker process (which exported them itself)."""
+        with self._lock:
+            self.records.extend(records)
+
+    def drain(self) -> List[Dict[str, Any]]:
+        """Return and forget the records kept so far."""
+        with self._lock:
+            records, self.records = self.records, []
+            return records
+
+    def summary(self, percentiles: Sequence[float] = (50, 90, 99)) -> Dict[str, Dict[str, Any]]:
+        """Call count and percentiles of each summary field, per node."""
+        with self._lock:
+            records = list(self.records)
+
+        by_node: Dict[str, List[Dict[str, Any]]] = {}
+        for record in records:
+            by_node.setdefault(record["node"], []).append(record)
+
+        summary = {}
+        for node, node_records in by_node.items():
+            summary[node] = {"calls": len(node_records)}
+            for field in SUMMARY_FIELDS:
+                values = np.array([record[field] for record in node_records if record.get(field) is not None], dtype=float)
+                if len(values):
+                    summary[node][field] = dict(zip((f"p{p:g}" for p in percentiles), np.percentile(values, percentiles)))
+        return summary
+
+    def print_summary(self) -> None:
+        """Median and 90th percentile time, and median payload, API calls and tokens, per node."""
+        summary = self.summary((50, 90))
+        if not summary:
+            return
+        print("\nNode metrics:")
+        print(f"{'Node':<28} {'Calls':>6} {'Wall p50':>9} {'Wall p90':>9} {'CPU p50':>9} {'CPU p90':>9} {'Bytes':>8} {'API':>5} {'Tokens':>7}")
+        for node, stats in summary.items():
+            def p(field, percentile="p50"):
+                return stats.get(field, {}).get(percentile, float("nan"))
+            print(
+                f"{node:<28} {stats['calls']:>6} {p('wall_ms'):>7.1f}ms {p('wall_ms', 'p90'):>7.1f}ms "
+                f"{p('cpu_ms'):>7.1f}ms {p('cpu_ms', 'p90'):>7.1f}ms {p('payload_bytes'):>8.0f} "
+                f"{p('api_calls'):>5.0f} {p('total_tokens'):>7.0f}"
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self.records.clear()
+
+
+def instrument_node(
+    node: str,
+    agent: Callable[[Dict[str, Any]], Dict[str, Any]],
+    metrics: Optional[NodeMetrics] = None,
+) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    """
+    Wrap a graph node so that every call is recorded.
+
+    Peak memory is measured with process-wide tracing, so nodes running concurrently (the
+    analysts) see each other's allocations.
+
+    Args:
+        node: Node name
+        agent: Node function
+        metrics: Recorder to use. Defaults to the shared node_metrics
+
+    Returns:
+        Node function with the agent's signature
+    """
+    def instrumented_agent(state):
+        recorder = metrics or node_metrics
+        counts = {"api_calls": {}, "input_tokens": 0, "output_tokens": 0, "total_tokens": 0}
+        outer_counts = getattr(_counters, "node", None)
+        _counters.node = counts
+
+        if recorder.trace_memory:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+            tracemalloc.reset_peak()
+            baseline = tracemalloc.get_traced_memory()[0]
+        wall_start, cpu_start = time.perf_counter(), time.thread_time()
+        result, error = None, None
+        try:
+            result = agent(state)
+            return result
+        except Exception as e:
+            error = repr(e)
+            raise
+        finally:
+            wall_ms = (time.perf_counter() - wall_start) * 1000
+            cpu_ms = (time.thread_time() - cpu_start) * 1000
+            peak_memory_kb = (tracemalloc.get_traced_memory()[1] - baseline) / 1024 if recorder.trace_memory else None
+            _counters.node = outer_counts
+
+            input_messages = {id(message) for message in state.get("messages", [])}
+            emitted = [message for message in (result or {}).get("messages", []) if id(message) not in input_messages]
+            recorder.record({
+                "node": node,
+                "ticker": state.get("data", {}).get("ticker"),
+                "end_date": state.get("data", {}).get("end_date"),
+                "timestamp": datetime.now().isoformat(),
+                "wall_ms": wall_ms,
+                "cpu_ms": cpu_ms,
+                "peak_memory_kb": peak_memory_kb,
+                "payload_bytes": _payload_bytes(emitted),
+                "api_calls": sum(counts["api_calls"].values()),
+                "api_calls_by_function": counts["api_calls"],
+                "input_tokens": counts["input_tokens"],
+                "output_tokens": counts["output_tokens"],
+                "total_tokens": counts["total_tokens"],
+                "error": error,
+            })
+
+    instrumented_agent.__name__ = agent.__name__
+    instrumented_agent.__doc__ = agent.__doc__
+    return instrumented_agent
+
+
+# Shared by the graph nodes in this process
+node_metrics = NodeMetrics(get_node_metrics_path())
@@ -0,0 +1,149 @@
+"""
+Shared-memory panel of daily prices for process-pool workers.
+
+The parent process loads the (dates x tickers x OHLCV) panel once and copies it into shared
+memory. Workers attach read-only NumPy views to the same memory, so adding workers adds no
+copies of the prices, and only a small spec (block names, shapes and tickers) is pickled to
+each worker. While a panel is in use (use_price_panel), get_prices and get_price_data serve
+daily prices for the ranges it covers from the panel, without fetching or parsing anything.
+"""
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from tools.shared_arrays import attach_arrays, release_arrays, share_arrays
+
+PANEL_FIELDS = ["open", "high", "low", "close", "volume"]
+
+
+class PricePanel:
+    """Daily OHLCV of many tickers as one (n_dates, n_tickers, n_fields) array."""
+
+    def __init__(
+        self,
+        tickers: List[str],
+        dates: np.ndarray,
+        values: np.ndarray,
+        start_date: str,
+        end_date: str,
+    ):
+        """
+        Args:
+            tickers: Tickers in the panel
+            dates: (n_dates,) trading dates as datetime64[D], ascending
+            values: (n_dates, n_tickers, len(PANEL_FIELDS)) prices, NaN where a ticker has no bar
+            start_date: First date the panel was loaded for (YYYY-MM-DD)
+            end_date: Last date the panel was loaded for (YYYY-MM-DD)
+        """
+        self.tickers = list(tickers)
+        self.ticker_index = {ticker: i for i, ticker in enumerate(self.tickers)}
+        self.dates = dates
+        self.values = values
+        self.start_date = start_date
+        self.end_date = end_date
+        self._blocks = []
+        self._owner = False
+        self._spec = None
+
+    @classmethod
+    def load(cls, tickers: List[str], start_date: str, end_date: str) -> "PricePanel":
+        """
+        Load the tickers' daily prices over the range. Tickers whose prices cannot be loaded
+        are left out, so their lookups take the usual path (and raise its error).
+        """
+        from tools.api import get_price_columns
+
+        columns_by_ticker = {}
+        for ticker in tickers:
+            try:
+                columns_by_ticker[ticker] = get_price_columns(ticker, start_date, end_date).arrays()
+            except Exception:
+                continue
+
+        dates = np.unique(np.concatenate([
+            columns["time"].astype("M8[D]") for columns in columns_by_ticker.values()
+        ])) if columns_by_ticker else np.empty(0, dtype="M8[D]")
+        values = np.full((len(dates), len(columns_by_ticker), len(PANEL_FIELDS)), np.nan)
+        for i, columns in enumerate(columns_by_ticker.values()):
+            rows = np.searchsorted(dates, columns["time"].astype("M8[D]"))
+            for j, field in enumerate(PANEL_FIELDS):
+                values[rows, i, j] = columns[field]
+        return cls(list(columns_by_ticker), dates, values, start_date, end_date)
+
+    def share(self) -> Dict[str, Any]:
+        """
+        Copy the panel into shared memory (once) and return the picklable spec that
+        workers pass to attach. The memory is freed by release().
+        """
+        if self._spec is None:
+            self._blocks, arrays = share_arrays({"dates": self.dates, "values": self.values})
+            self._owner = True
+            self._spec = {
+                "tickers": self.tickers,
+                "start_date": self.start_date,
+                "end_date": self.end_date,
+                "arrays": arrays,
+            }
+        return self._spec
+
+    @classmethod
+    def attach(cls, spec: Dict[str, Any]) -> "PricePanel":
+        """A panel of read-only views on a panel shared by another process."""
+        blocks, arrays = attach_arrays(spec["arrays"])
+        panel = cls(spec["tickers"], arrays["dates"], arrays["values"], spec["start_date"], spec["end_date"])
+        panel._blocks = blocks
+        panel._spec = spec
+        return panel
+
+    def release(self) -> None:
+        """Detach from the shared memory, and free it if this process shared it."""
+        release_arrays(self._blocks, unlink=self._owner)
+        self._blocks, self._owner, self._spec = [], False, None
+
+    def covers(self, ticker: str, start_date: str, end_date: str) -> bool:
+        return ticker in self.ticker_index and self.start_date <= start_date and end_date <= self.end_date
+
+    def _window(self, ticker: str, start_date: str, end_date: str):
+        """Dates and (n, n_fields) values of the ticker's bars in the range."""
+        rows = slice(
+            np.searchsorted(self.dates, np.datetime64(start_date, "D")),
+            np.searchsorted(self.dates, np.datetime64(end_date, "D"), side="right"),
+        )
+        values = self.values[rows, self.ticker_index[ticker]]
+        present = ~np.isnan(values[:, PANEL_FIELDS.index("close")])
+        return self.dates[rows][present], values[present]
+
+    def frame(self, ticker: str, start_date: str, end_date: str) -> pd.DataFrame:
+        """The ticker's prices over the range, shaped like prices_to_df's (without the time strings)."""
+        dates, values = self._window(ticker, start_date, end_date)
+        df = pd.DataFrame(values, columns=PANEL_FIELDS)[["open", "close", "high", "low", "volume"]]
+        df.index = pd.DatetimeIndex(dates.astype("M8[ns]"), name="Date")
+        return df
+
+    def prices(self, ticker: str, start_date: str, end_date: str) -> List[Dict[str, Any]]:
+        """The ticker's prices over the range as price records, as get_prices returns them."""
+        dates, values = self._window(ticker, start_date, end_date)
+        return [
+            {**dict(zip(PANEL_FIELDS, row)), "time": str(date)}
+            for date, row in zip(dates, values.tolist())
+        ]
+
+
+# The panel serving prices in this process, if any
+_active_panel: Optional[PricePanel] = None
+
+
+def use_price_panel(panel: Optional[PricePanel]) -> None:
+    """Serve daily prices from the panel in this process (None to stop)."""
+    global _active_panel
+    _active_panel = panel
+
+
+def get_price_panel() -> Optional[PricePanel]:
+    return _active_panel
+
+
+def attach_price_panel(spec: Dict[str, Any]) -> None:
+    """Process-pool initializer: attach to a shared panel and serve prices from it."""
+    use_price_panel(PricePanel.attach(spec))
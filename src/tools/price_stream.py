@@ -0,0 +1,167 @@
+"""
+Streaming ingestion of long price histories.
+
+get_prices holds a range three times over at its peak: the JSON text, the parsed dicts,
+and then the DataFrame copy made by prices_to_df. The streaming path (api.stream_prices)
+requests the range in date chunks and parses each response as it downloads, one record at
+a time. Each record is written straight into typed column buffers, so besides the result
+only one network block and one record are in memory at once.
+"""
+import codecs
+import json
+import re
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+
+from tools.bar_store import BAR_DTYPE
+from tools.lookback_planner import bars_per_session
+
+# Bars requested per date chunk; a chunk of minute bars is then about 5 MB of JSON
+PRICE_CHUNK_BARS = 50_000
+
+# Bytes read at a time from a response or a local file
+READ_BLOCK_BYTES = 1 << 16
+
+PRICE_COLUMNS = {
+    "time": "M8[s]",
+    "open": "f8",
+    "high": "f8",
+    "low": "f8",
+    "close": "f8",
+    "volume": "f8",
+}
+
+_decoder = json.JSONDecoder()
+
+
+def chunk_days(interval: str = "day", multiplier: int = 1) -> int:
+    """Calendar days per request that hold about PRICE_CHUNK_BARS bars of the interval."""
+    trading_days = max(int(PRICE_CHUNK_BARS / bars_per_session(interval, multiplier)), 1)
+    return max(trading_days * 7 // 5, 1)
+
+
+def date_chunks(start_date: str, end_date: str, days: int) -> Iterator[Tuple[str, str]]:
+    """Consecutive (start, end) date ranges of at most `days` days covering the range."""
+    start = datetime.strptime(start_date, '%Y-%m-%d')
+    end = datetime.strptime(end_date, '%Y-%m-%d')
+    while start <= end:
+        chunk_end = min(start + timedelta(days=days - 1), end)
+        yield start.strftime('%Y-%m-%d'), chunk_end.strftime('%Y-%m-%d')
+        start = chunk_end + timedelta(days=1)
+
+
+def read_blocks(path: str, size: int = READ_BLOCK_BYTES) -> Iterator[bytes]:
+    with open(path, "rb") as f:
+        while block := f.read(size):
+            yield block
+
+
+def iter_json_array(blocks: Iterable[Union[str, bytes]], key: Optional[str] = None) -> Iterator[Any]:
+    """
+    Objects of a JSON array, parsed one at a time from blocks of text as they arrive. The
+    array is the whole document, or the value of `key` in the top-level object. Consumed
+    text is dropped, so memory is bounded by one block plus one object.
+    """
+    decode = codecs.getincrementaldecoder("utf-8")().decode
+    blocks = iter(blocks)
+    opening = re.compile(r"\[" if key is None else rf'"{re.escape(key)}"\s*:\s*\[')
+    buffer, position = "", 0
+
+    def read() -> bool:
+        nonlocal buffer
+        block = next(blocks, None)
+        if block is None:
+            return False
+        buffer += decode(block) if isinstance(block, bytes) else block
+        return True
+
+    # Find the start of the array
+    while not (match := opening.search(buffer)):
+        if not read():
+            return
+    position = match.end()
+
+    while True:
+        while position < len(buffer) and buffer[position] in " \t\r\n,":
+            position += 1
+        if position == len(buffer):
+            buffer, position = "", 0
+            if not read():
+                raise ValueError("JSON array ended before its closing bracket")
+            continue
+        if buffer[position] == "]":
+            return
+        try:
+            value, position = _decoder.raw_decode(buffer, position)
+        except json.JSONDecodeError:
+            # The object continues in the next block
+            buffer, position = buffer[position:], 0
+            if not read():
+                raise
+            continue
+        yield value
+        if position >= READ_BLOCK_BYTES:
+            buffer, position = buffer[position:], 0
+
+
+def _parse_time(time: str) -> np.datetime64:
+    try:
+        return np.datetime64(time.rstrip("Z"), "s")
+    except ValueError:
+        # Times with a UTC offset
+        return np.datetime64(pd.Timestamp(time).tz_convert("UTC").tz_localize(None), "s")
+
+
+class PriceColumns:
+    """Typed column buffers that price records are appended to, grown geometrically."""
+
+    def __init__(self, capacity: int = 1024):
+        self.size = 0
+        self.columns = {name: np.empty(capacity, dtype=dtype) for name, dtype in PRICE_COLUMNS.items()}
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _grow(self) -> None:
+        for name, column in self.columns.items():
+            grown = np.empty(max(len(column) * 2, 1), dtype=column.dtype)
+            grown[:self.size] = column[:self.size]
+            self.columns[name] = grown
+
+    def append(self, record: Dict[str, Any]) -> None:
+        """Add one price record, as get_prices returns them."""
+        if self.size == len(self.columns["time"]):
+            self._grow()
+        self.columns["time"][self.size] = _parse_time(record["time"])
+        for name in ("open", "high", "low", "close", "volume"):
+            value = record.get(name)
+            self.columns[name][self.size] = np.nan if value is None else value
+        self.size += 1
+
+    def extend(self, records: Iterable[Dict[str, Any]]) -> "PriceColumns":
+        for record in records:
+            self.append(record)
+        return self
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """Views of the filled part of each column."""
+        return {name: column[:self.size] for name, column in self.columns.items()}
+
+    def to_df(self) -> pd.DataFrame:
+        """A DataFrame shaped like prices_to_df's (time index, sorted), without the time strings."""
+        arrays = self.arrays()
+        order = np.argsort(arrays["time"], kind="stable")
+        df = pd.DataFrame({name: arrays[name][order] for name in ("open", "close", "high", "low", "volume")})
+        df.index = pd.DatetimeIndex(arrays["time"][order].astype("M8[ns]"), name="Date")
+        return df
+
+    def to_bars(self) -> np.ndarray:
+        """The prices as bar store records."""
+        arrays = self.arrays()
+        bars = np.empty(self.size, dtype=BAR_DTYPE)
+        for name in BAR_DTYPE.names:
+            bars[name] = np.nan_to_num(arrays[name]) if name == "volume" else arrays[name]
+        return bars
@@ -0,0 +1,178 @@
+"""
+Sampling profiler scoped to graph nodes.
+
+While profiling, a background thread samples the stack of every thread that is running a
+graph node, from the node function down, and counts each distinct stack per node. The
+samples are written as collapsed stacks (one "frame;frame;frame count" line per stack, the
+input format of flamegraph.pl and speedscope) and summarized into a hot-function table.
+Sampling attributes the concurrently running analysts to the right node, which a
+per-thread deterministic profiler cannot do from one place.
+"""
+import os
+import sys
+import threading
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Seconds between samples
+PROFILE_INTERVAL = 0.002
+
+
+def _frame_name(code) -> str:
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class NodeProfiler:
+    """Collapsed stack samples of the running graph nodes, keyed by node."""
+
+    def __init__(self, interval: float = PROFILE_INTERVAL):
+        """
+        Args:
+            interval: Seconds between samples
+        """
+        self.interval = interval
+        self.stacks: Dict[str, Counter] = {}
+        # Thread id -> (node, frame of the node wrapper) for the nodes running now
+        self._active: Dict[int, Tuple[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._thread_pid = None
+
+    @property
+    def running(self) -> bool:
+        # A forked worker inherits the profiler but not its sampling thread
+        return self._thread is not None and self._thread_pid == os.getpid()
+
+    def start(self) -> None:
+        """Start sampling in a background thread."""
+        if not self.running:
+            if self._thread_pid is not None and self._thread_pid != os.getpid():
+                # The parent's lock may have been held at fork time
+                self._lock = threading.Lock()
+                self._active = {}
+            self._stop = threading.Event()
+            self._thread = threading.Thread(target=self._sample, name="node-profiler", daemon=True)
+            self._thread_pid = os.getpid()
+            self._thread.start()
+
+    def stop(self) -> None:
+        if self.running:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+
+    def enter(self, node: str) -> None:
+        """Mark the calling thread as running `node`; samples start below the caller's frame."""
+        with self._lock:
+            self._active[threading.get_ident()] = (node, sys._getframe(1))
+
+    def exit(self) -> None:
+        with self._lock:
+            self._active.pop(threading.get_ident(), None)
+
+    def _sample(self) -> None:
+        while not self._stop.wait(self.interval):
+            frames = sys._current_frames()
+            with self._lock:
+                for thread_id, (node, entry) in self._active.items():
+                    frame = frames.get(thread_id)
+                    names = []
+                    while frame is not None and frame is not entry:
+                        names.append(_frame_name(frame.f_code))
+                        frame = frame.f_back
+                    if frame is entry and names:
+                        self.stacks.setdefault(node, Counter())[";".join(reversed(names))] += 1
+
+    def merge(self, stacks: Dict[str, Dict[str, int]]) -> None:
+        """Add samples taken elsewhere, e.g. in a worker process."""
+        with self._lock:
+            for node, counts in stacks.items():
+                self.stacks.setdefault(node, Counter()).update(counts)
+
+    def drain(self) -> Dict[str, Dict[str, int]]:
+        """Return and forget the samples taken so far."""
+        with self._lock:
+            stacks, self.stacks = self.stacks, {}
+            return {node: dict(counts) for node, counts in stacks.items()}
+
+    def write_collapsed(self, directory: str) -> List[str]:
+        """
+        Write one collapsed-stack file per node, plus all.folded with every node under its
+        own root frame. Returns the written paths.
+        """
+        os.makedirs(directory, exist_ok=True)
+        paths = []
+        with self._lock:
+            stacks = {node: Counter(counts) for node, counts in self.stacks.items()}
+        for node, counts in stacks.items():
+            path = os.path.join(directory, f"{node}.folded")
+            with open(path, "w") as f:
+                f.writelines(f"{stack} {count}\n" for stack, count in counts.most_common())
+            paths.append(path)
+        path = os.path.join(directory, "all.folded")
+        with open(path, "w") as f:
+            for node, counts in stacks.items():
+                f.writelines(f"{node};{stack} {count}\n" for stack, count in counts.most_common())
+        paths.append(path)
+        return paths
+
+    def hot_functions(self, top: int = 20) -> List[Dict[str, Any]]:
+        """
+        The functions with the most samples, per node: self samples (the function was
+        running) and total samples (the function was on the stack).
+        """
+        rows = []
+        with self._lock:
+            stacks = {node: Counter(counts) for node, counts in self.stacks.items()}
+        for node, counts in stacks.items():
+            node_samples = sum(counts.values())
+            self_samples, total_samples = Counter(), Counter()
+            for stack, count in counts.items():
+                frames = stack.split(";")
+                self_samples[frames[-1]] += count
+                for name in set(frames):
+                    total_samples[name] += count
+            for name, total in total_samples.items():
+                rows.append({
+                    "node": node,
+                    "function": name,
+                    "self": self_samples[name],
+                    "total": total,
+                    "self_share": self_samples[name] / node_samples,
+                    "total_share": total / node_samples,
+                })
+        return sorted(rows, key=lambda row: (row["self"], row["total"]), reverse=True)[:top]
+
+    def print_hot_functions(self, top: int = 20) -> None:
+        rows = self.hot_functions(top)
+        if not rows:
+            return
+        print(f"\nHot functions (sampled every {self.interval * 1000:g} ms):")
+        print(f"{'Node':<28} {'Samples':>8} {'Self %':>7} {'Total %':>8}  Function")
+        for row in rows:
+            print(
+                f"{row['node']:<28} {row['self']:>8} {row['self_share']:>7.1%} "
+                f"{row['total_share']:>8.1%}  {row['function']}"
+            )
+
+
+def profile_node(node: str, agent: Callable, profiler: Optional[NodeProfiler] = None) -> Callable:
+    """Wrap a graph node so that its stack is sampled while the profiler is running."""
+    def profiled_agent(state):
+        active = profiler or node_profiler
+        if not active.running:
+            return agent(state)
+        active.enter(node)
+        try:
+            return agent(state)
+        finally:
+            active.exit()
+
+    profiled_agent.__name__ = agent.__name__
+    profiled_agent.__doc__ = agent.__doc__
+    return profiled_agent
+
+
+# Shared by the graph nodes in this process
+node_profiler = NodeProfiler()
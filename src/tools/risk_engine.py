@@ -0,0 +1,215 @@
+from statistics import NormalDist
+from typing import Dict, List, Optional, Union
+
+import numpy as np
+
+
+class RiskEngine:
+    """
+    Rolling covariance of daily returns across a book of tickers, updated one bar at a time,
+    with portfolio-level parametric and historical VaR/CVaR computed as matrix operations.
+
+    The last `window` returns are kept in a ring buffer alongside running sums of the returns
+    and of their outer products, so each new bar costs O(n^2) instead of a full recomputation.
+    """
+
+    def __init__(
+        self,
+        tickers: List[str],
+        window: int = 63,
+        shrinkage: Optional[Union[float, str]] = None,
+    ):
+        """
+        Args:
+            tickers: Tickers in the book, in the order used by every array argument
+            window: Number of trailing returns in the estimation window
+            shrinkage: None for the sample covariance, a float in [0, 1] to shrink towards the
+                diagonal by that amount, or "ledoit-wolf" to choose the amount from the data
+        """
+        self.tickers = list(tickers)
+        self.window = window
+        self.shrinkage = shrinkage
+
+        n = len(self.tickers)
+        self.returns = np.zeros((window, n))
+        self.count = 0
+        self.position = 0
+        self.sum_returns = np.zeros(n)
+        self.sum_outer = np.zeros((n, n))
+        self.last_prices = None
+
+    @classmethod
+    def from_prices(cls, tickers: List[str], prices: np.ndarray, **kwargs) -> "RiskEngine":
+        """Build an engine from a (n_days, n_tickers) history of closes."""
+        engine = cls(tickers, **kwargs)
+        for bar in np.asarray(prices, dtype=float):
+            engine.update(bar)
+        return engine
+
+    def update(self, prices: np.ndarray) -> None:
+        """Add a new bar of closes, one per ticker."""
+        prices = np.asarray(prices, dtype=float)
+        if self.last_prices is not None:
+            with np.errstate(divide='ignore', invalid='ignore'):
+                returns = prices / self.last_prices - 1
+            self.update_returns(np.nan_to_num(returns, nan=0.0, posinf=0.0, neginf=0.0))
+        self.last_prices = np.where(np.isfinite(prices), prices, self.last_prices if self.last_prices is not None else np.nan)
+
+    def update_returns(self, returns: np.ndarray) -> None:
+        """Add a new bar of returns, evicting the oldest one once the window is full."""
+        if self.count == self.window:
+            evicted = self.returns[self.position]
+            self.sum_returns -= evicted
+            self.sum_outer -= np.outer(evicted, evicted)
+        else:
+            self.count += 1
+
+        self.returns[self.position] = returns
+        self.sum_returns += returns
+        self.sum_outer += np.outer(returns, returns)
+        self.position = (self.position + 1) % self.window
+
+        # Refresh the running sums once per window to stop floating-point drift
+        if self.position == 0:
+            self.sum_returns = self.returns.sum(axis=0)
+            self.sum_outer = self.returns.T @ self.returns
+
+    def state(self) -> Dict[str, np.ndarray]:
+        """The rolling window and running sums, as arrays (e.g. for a checkpoint)."""
+        return {
+            "returns": self.returns,
+            "count": np.array(self.count),
+            "position": np.array(self.position),
+            "sum_returns": self.sum_returns,
+            "sum_outer": self.sum_outer,
+            "last_prices": self.last_prices if self.last_prices is not None else np.array([]),
+        }
+
+    def restore(self, state: Dict[str, np.ndarray]) -> None:
+        """Resume from a state returned by state()."""
+        self.returns = np.array(state["returns"], dtype=float)
+        self.count = int(state["count"])
+        self.position = int(state["position"])
+        self.sum_returns = np.array(state["sum_returns"], dtype=float)
+        self.sum_outer = np.array(state["sum_outer"], dtype=float)
+        self.last_prices = np.array(state["last_prices"], dtype=float) if len(state["last_prices"]) else None
+
+    @property
+    def ready(self) -> bool:
+        """Whether there are enough returns to estimate a covariance."""
+        return self.count >= 2
+
+    def window_returns(self) -> np.ndarray:
+        """The returns currently in the window, oldest first."""
+        if self.count < self.window:
+            return self.returns[:self.count]
+        return np.roll(self.returns, -self.position, axis=0)
+
+    def mean(self) -> np.ndarray:
+        """Mean daily return per ticker."""
+        return self.sum_returns / self.count
+
+    def covariance(self) -> np.ndarray:
+        """Covariance matrix of daily returns, shrunk towards its diagonal if configured."""
+        k = self.count
+        sample = (self.sum_outer - np.outer(self.sum_returns, self.sum_returns) / k) / (k - 1)
+        if not self.shrinkage:
+            return sample
+
+        target = np.diag(np.diag(sample))
+        if self.shrinkage == "ledoit-wolf":
+            intensity = self._ledoit_wolf_intensity(sample, target)
+        else:
+            intensity = float(self.shrinkage)
+        return (1 - intensity) * sample + intensity * target
+
+    def _ledoit_wolf_intensity(self, sample: np.ndarray, target: np.ndarray) -> float:
+        """Shrinkage intensity that minimizes the expected squared error of the estimate."""
+        centered = self.window_returns() - self.mean()
+        k = len(centered)
+        squared = centered ** 2
+        # Variance of the off-diagonal sample covariance entries, estimated from the window
+        pi = squared.T @ squared / k - (sample * (k - 1) / k) ** 2
+        pi = (pi.sum() - np.trace(pi)) / k
+        gamma = ((sample - target) ** 2).sum()
+        if gamma == 0:
+            return 0.0
+        return float(np.clip(pi / gamma, 0.0, 1.0))
+
+    def parametric_var(
+        self,
+        position_values: np.ndarray,
+        confidence: float = 0.95,
+        horizon: int = 1,
+    ) -> Dict[str, np.ndarray]:
+        """
+        Gaussian VaR and CVaR of one or many books.
+
+        Args:
+            position_values: Market value per ticker, shaped (n_tickers,) or (n_books, n_tickers)
+            confidence: Confidence level
+            horizon: Horizon in days
+
+        Returns:
+            Dictionary with var and cvar as positive losses in currency
+        """
+        weights = np.asarray(position_values, dtype=float)
+        covariance = self.covariance()
+        mean = weights @ self.mean() * horizon
+        sigma = np.sqrt(np.maximum(np.einsum('...i,ij,...j->...', weights, covariance, weights), 0) * horizon)
+
+        alpha = 1 - confidence
+        z = NormalDist().inv_cdf(alpha)
+        return {
+            "var": -(mean + z * sigma),
+            "cvar": -(mean - sigma * NormalDist().pdf(z) / alpha),
+        }
+
+    def historical_var(
+        self,
+        position_values: np.ndarray,
+        confidence: float = 0.95,
+    ) -> Dict[str, np.ndarray]:
+        """
+        Historical-simulation VaR and CVaR of one or many books over the window's returns.
+
+        Args:
+            position_values: Market value per ticker, shaped (n_tickers,) or (n_books, n_tickers)
+            confidence: Confidence level
+
+        Returns:
+            Dictionary with var and cvar as positive losses in currency
+        """
+        pnl = self.window_returns() @ np.asarray(position_values, dtype=float).T
+        cutoff = np.quantile(pnl, 1 - confidence, axis=0)
+        tail = np.where(pnl <= cutoff, pnl, np.nan)
+        return {
+            "var": -cutoff,
+            "cvar": -np.nanmean(tail, axis=0),
+        }
+
+    def risk_contributions(self, position_values: np.ndarray) -> np.ndarray:
+        """Each position's contribution to the book's daily volatility (they sum to the total)."""
+        weights = np.asarray(position_values, dtype=float)
+        marginal = self.covariance() @ weights
+        sigma = np.sqrt(max(weights @ marginal, 0))
+        if sigma == 0:
+            return np.zeros_like(weights)
+        return weights * marginal / sigma
+
+    def portfolio_risk(self, position_values: np.ndarray, confidence: float = 0.95) -> Optional[Dict[str, float]]:
+        """Summary of the book's daily risk for the risk manager, as fractions of the positions' value."""
+        if not self.ready:
+            return None
+        gross = float(np.abs(position_values).sum())
+        if gross == 0:
+            return None
+        parametric = self.parametric_var(position_values, confidence)
+        historical = self.historical_var(position_values, confidence)
+        return {
+            "parametric_var": float(parametric["var"]) / gross,
+            "parametric_cvar": float(parametric["cvar"]) / gross,
+            "historical_var": float(historical["var"]) / gross,
+            "historical_cvar": float(historical["cvar"]) / gross,
+            "volatility": float(np.sqrt(max(position_values @ self.covariance() @ position_values, 0))) / gross * (252 ** 0.5),
+        }
@@ -0,0 +1,53 @@
+from multiprocessing import shared_memory
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+# (shared memory block name, shape, dtype) for each shared array
+ArraySpecs = Dict[str, Tuple[str, Tuple[int, ...], str]]
+
+
+def share_arrays(arrays: Dict[str, np.ndarray]) -> Tuple[List[shared_memory.SharedMemory], ArraySpecs]:
+    """
+    Copy arrays into shared memory blocks.
+
+    Returns:
+        The blocks, which the caller must keep alive and release with release_arrays,
+        and picklable specs that worker processes pass to attach_arrays
+    """
+    blocks = []
+    specs = {}
+    for key, array in arrays.items():
+        array = np.ascontiguousarray(array)
+        block = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        np.ndarray(array.shape, dtype=array.dtype, buffer=block.buf)[...] = array
+        blocks.append(block)
+        specs[key] = (block.name, array.shape, array.dtype.str)
+    return blocks, specs
+
+
+def attach_arrays(specs: ArraySpecs) -> Tuple[List[shared_memory.SharedMemory], Dict[str, np.ndarray]]:
+    """
+    Attach read-only NumPy views to arrays shared with share_arrays, without copying.
+
+    Returns:
+        The attached blocks, which must stay referenced while the views are in use,
+        and the views keyed like the shared arrays
+    """
+    blocks = []
+    arrays = {}
+    for key, (name, shape, dtype) in specs.items():
+        block = shared_memory.SharedMemory(name=name)
+        view = np.ndarray(shape, dtype=np.dtype(dtype), buffer=block.buf)
+        view.flags.writeable = False
+        blocks.append(block)
+        arrays[key] = view
+    return blocks, arrays
+
+
+def release_arrays(blocks: List[shared_memory.SharedMemory], unlink: bool = False) -> None:
+    """Close shared memory blocks, and free them if this process created them."""
+    for block in blocks:
+        block.close()
+        if unlink:
+            block.unlink()
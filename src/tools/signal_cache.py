@@ -0,0 +1,224 @@
+"""
+Memoization of agent signals.
+
+An agent node whose signal depends only on a slice of AgentState.data (and metadata) is
+wrapped so that the slice is fingerprinted on every call. When the same fingerprint was
+seen before, by this process or by an earlier run through the persistent backing store,
+the cached signal message is returned instead of recomputing it.
+"""
+import hashlib
+import inspect
+import json
+import os
+import sqlite3
+import sys
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Set
+
+from langchain_core.messages import HumanMessage
+
+from agents.state import AgentState, show_agent_reasoning
+
+# Signals kept in memory per node, least recently used first out; the backing store keeps all
+MEMORY_SIGNALS_PER_NODE = 10_000
+
+
+def get_signal_cache_path() -> Optional[str]:
+    """Returns the persistent signal cache file, if one is configured."""
+    return os.environ.get("SIGNAL_CACHE_PATH")
+
+
+def fingerprint(node: str, inputs: Dict[str, Any]) -> str:
+    """Stable hash of a node's inputs."""
+    payload = json.dumps(inputs, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(f"{node}:{payload}".encode()).hexdigest()
+
+
+def _local_modules(module, root: str, seen: Set[str]) -> None:
+    """Add the module and every module under root that it uses, directly or not, to seen."""
+    if module.__name__ in seen:
+        return
+    seen.add(module.__name__)
+    for value in vars(module).values():
+        used = value if inspect.ismodule(value) else sys.modules.get(getattr(value, "__module__", None) or "")
+        path = getattr(used, "__file__", None)
+        if used is not None and path and os.path.abspath(path).startswith(root):
+            _local_modules(used, root, seen)
+
+
+def source_version(agent: Callable) -> str:
+    """
+    Hash of the source of the agent's module and of every repository module it depends on
+    (e.g. tools/valuation_engine.py for the valuation agent), so that changing a constant or
+    a helper changes the version just like changing the agent itself.
+    """
+    module = sys.modules[agent.__module__]
+    # The source root holds the agents/ and tools/ packages
+    root = os.path.dirname(os.path.dirname(os.path.abspath(module.__file__))) + os.sep
+    seen: Set[str] = set()
+    _local_modules(module, root, seen)
+    digest = hashlib.sha256()
+    for name in sorted(seen):
+        digest.update(name.encode())
+        digest.update(inspect.getsource(sys.modules[name]).encode())
+    return digest.hexdigest()[:16]
+
+
+class SignalCache:
+    """Signal messages keyed by node and input fingerprint, with per-node hit counts."""
+
+    def __init__(self, path: Optional[str] = None, max_signals: int = MEMORY_SIGNALS_PER_NODE):
+        """
+        Args:
+            path: Optional SQLite file backing the cache, shared across runs and processes
+            max_signals: Signals kept in memory per node, so a long-running process stays bounded
+        """
+        self.path = path
+        self.max_signals = max_signals
+        self.signals: Dict[str, OrderedDict] = {}
+        self.hits: Dict[str, int] = {}
+        self.misses: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._connection = None
+        self._connection_pid = None
+
+    def _db(self) -> Optional[sqlite3.Connection]:
+        """The backing store connection, opened once per process (connections do not survive a fork)."""
+        if not self.path:
+            return None
+        if self._connection is None or self._connection_pid != os.getpid():
+            self._connection = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS signals (node TEXT, fingerprint TEXT, content TEXT, PRIMARY KEY (node, fingerprint))"
+            )
+            self._connection.commit()
+            self._connection_pid = os.getpid()
+        return self._connection
+
+    def get(self, node: str, key: str) -> Optional[str]:
+        """Cached message content, or None. Counts a hit or a miss for the node."""
+        with self._lock:
+            content = self.signals.get(node, {}).get(key)
+            db = self._db()
+            if content is not None:
+                self.signals[node].move_to_end(key)
+            elif db is not None:
+                row = db.execute(
+                    "SELECT content FROM signals WHERE node = ? AND fingerprint = ?", (node, key)
+                ).fetchone()
+                if row:
+                    content = row[0]
+                    self._remember(node, key, content)
+
+            counts = self.hits if content is not None else self.misses
+            counts[node] = counts.get(node, 0) + 1
+            return content
+
+    def _remember(self, node: str, key: str, content: str) -> None:
+        """Keep a signal in memory, dropping the node's least recently used one beyond max_signals."""
+        signals = self.signals.setdefault(node, OrderedDict())
+        signals[key] = content
+        signals.move_to_end(key)
+        if len(signals) > self.max_signals:
+            signals.popitem(last=False)
+
+    def put(self, node: str, key: str, content: str) -> None:
+        """Store a node's message content under its input fingerprint."""
+        with self._lock:
+            self._remember(node, key, content)
+            db = self._db()
+            if db is not None:
+                db.execute(
+                    "INSERT OR REPLACE INTO signals (node, fingerprint, content) VALUES (?, ?, ?)", (node, key, content)
+                )
+                db.commit()
+
+    def drain_counts(self) -> Dict[str, Dict[str, int]]:
+        """Return and reset the hit and miss counts, e.g. to send them from a worker process."""
+        with self._lock:
+            counts = {"hits": self.hits, "misses": self.misses}
+            self.hits, self.misses = {}, {}
+            return counts
+
+    def merge_counts(self, counts: Dict[str, Dict[str, int]]) -> None:
+        """Add hit and miss counts taken elsewhere, e.g. in a worker process."""
+        with self._lock:
+            for kind in ("hits", "misses"):
+                totals = getattr(self, kind)
+                for node, count in counts[kind].items():
+                    totals[node] = totals.get(node, 0) + count
+
+    def hit_rates(self) -> Dict[str, Dict[str, float]]:
+        """Hits, misses and hit rate of each node."""
+        nodes = sorted(set(self.hits) | set(self.misses))
+        rates = {}
+        for node in nodes:
+            hits, misses = self.hits.get(node, 0), self.misses.get(node, 0)
+            rates[node] = {"hits": hits, "misses": misses, "hit_rate": hits / (hits + misses)}
+        return rates
+
+    def clear(self) -> None:
+        """Forget every cached signal, in memory and in the backing store."""
+        with self._lock:
+            self.signals.clear()
+            db = self._db()
+            if db is not None:
+                db.execute("DELETE FROM signals")
+                db.commit()
+
+
+def memoize_node(
+    node: str,
+    agent: Callable[[AgentState], Dict[str, Any]],
+    data_keys: List[str],
+    metadata_keys: Optional[List[str]] = None,
+    cache: Optional["SignalCache"] = None,
+) -> Callable[[AgentState], Dict[str, Any]]:
+    """
+    Wrap an agent node so that its signal message is reused whenever its inputs repeat.
+
+    Args:
+        node: Node name, also the cached message's name
+        agent: Agent function returning a single message
+        data_keys: Keys of AgentState.data the agent's signal depends on
+        metadata_keys: Keys of AgentState.metadata the agent's signal depends on
+        cache: Cache to use. Defaults to the shared signal_cache
+
+    Returns:
+        Node function with the agent's signature
+    """
+    metadata_keys = metadata_keys or []
+    # Changing the agent's code, or any repository code it uses, invalidates its persisted signals
+    version = source_version(agent)
+
+    def memoized_agent(state: AgentState):
+        signals = cache or signal_cache
+        data = state["data"]
+        inputs = {
+            "version": version,
+            "data": {key: data.get(key) for key in data_keys},
+            "metadata": {key: state["metadata"].get(key) for key in metadata_keys},
+        }
+        key = fingerprint(node, inputs)
+
+        content = signals.get(node, key)
+        if content is None:
+            result = agent(state)
+            signals.put(node, key, result["messages"][-1].content)
+            return result
+
+        if state["metadata"].get("show_reasoning"):
+            show_agent_reasoning(content, node)
+        return {
+            "messages": [HumanMessage(content=content, name=node)],
+            "data": data,
+        }
+
+    memoized_agent.__name__ = agent.__name__
+    memoized_agent.__doc__ = agent.__doc__
+    return memoized_agent
+
+
+# Shared by the graph nodes in this process
+signal_cache = SignalCache(get_signal_cache_path())
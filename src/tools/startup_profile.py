@@ -0,0 +1,76 @@
+"""
+Import-time profile of a module.
+
+Imports the module in a fresh interpreter under `python -X importtime` and reports where
+startup time goes: the slowest imports by cumulative time, and the total self time spent in
+each top-level package.
+
+    python -m tools.startup_profile --module main --top 15
+"""
+import argparse
+import os
+import subprocess
+import sys
+from typing import Dict, List, Optional
+
+
+def profile_imports(module: str, env: Optional[Dict[str, str]] = None) -> List[Dict]:
+    """
+    Imports `module` in a fresh interpreter and returns one record per imported module with
+    its self and cumulative import time in microseconds, in import order.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+        env={**os.environ, **(env or {})},
+        cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        imports.append({
+            "module": name.strip(),
+            "depth": (len(name) - len(name.lstrip()) - 1) // 2,
+            "self_us": int(self_us),
+            "cumulative_us": int(cumulative_us),
+        })
+    return imports
+
+
+def summarize_imports(imports: List[Dict], top: int = 15) -> Dict:
+    """Total import time, the slowest imports and the self time of each top-level package."""
+    packages: Dict[str, int] = {}
+    for record in imports:
+        package = record["module"].split(".")[0]
+        packages[package] = packages.get(package, 0) + record["self_us"]
+
+    return {
+        "total_ms": sum(record["self_us"] for record in imports) / 1000,
+        "slowest": sorted(imports, key=lambda record: record["cumulative_us"], reverse=True)[:top],
+        "packages": sorted(packages.items(), key=lambda item: item[1], reverse=True)[:top],
+    }
+
+
+def print_import_report(module: str, summary: Dict) -> None:
+    print(f"\nImport profile of {module}: {summary['total_ms']:.0f} ms")
+    print("\nSlowest imports (cumulative):")
+    for record in summary["slowest"]:
+        print(f"  {record['cumulative_us'] / 1000:8.1f} ms  {record['module']}")
+    print("\nTime by top-level package (self):")
+    for package, self_us in summary["packages"]:
+        print(f"  {self_us / 1000:8.1f} ms  {package}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description='Profile the import time of a module')
+    parser.add_argument('--module', type=str, default='main', help='Module to import, relative to src/')
+    parser.add_argument('--top', type=int, default=15, help='Number of imports and packages to report')
+    args = parser.parse_args()
+
+    print_import_report(args.module, summarize_imports(profile_imports(args.module), args.top))
@@ -0,0 +1,167 @@
+"""
+Scenario-grid stress testing.
+
+Scenarios are rows of a (n_scenarios, n_assets) matrix of asset returns, so any number
+of them can be applied to one or many books of positions with a single matrix product.
+"""
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+# Uniform price declines reported by the risk manager
+UNIFORM_SHOCKS = {
+    "market_crash": -0.20,
+    "moderate_decline": -0.10,
+    "slight_decline": -0.05
+}
+
+# Grid of market moves from -30% to +10% in 0.5% steps
+MARKET_SHOCKS = np.linspace(-0.30, 0.10, 81)[:, None]
+
+
+def uniform_shock_scenarios(n_assets: int, shocks: Optional[Dict[str, float]] = None) -> Dict[str, object]:
+    """The same return applied to every asset, one scenario per shock."""
+    shocks = shocks or UNIFORM_SHOCKS
+    return {
+        "names": list(shocks),
+        "returns": np.repeat(np.array(list(shocks.values()), dtype=float)[:, None], n_assets, axis=1),
+    }
+
+
+def historical_scenarios(returns: np.ndarray, horizons: Sequence[int] = (1, 5, 21)) -> Dict[str, object]:
+    """
+    Replay every historical window: the compounded return of each asset over every
+    run of `horizon` consecutive days, for each horizon.
+
+    Args:
+        returns: (n_days, n_assets) daily returns
+        horizons: Window lengths in days
+    """
+    returns = np.asarray(returns, dtype=float)
+    returns = returns.reshape(len(returns), -1)
+    cumulative = np.vstack([np.zeros(returns.shape[1]), np.cumsum(np.log1p(returns), axis=0)])
+
+    names = []
+    scenario_returns = []
+    for horizon in horizons:
+        if horizon > len(returns):
+            continue
+        window_returns = np.expm1(cumulative[horizon:] - cumulative[:-horizon])
+        scenario_returns.append(window_returns)
+        names.extend(f"historical_{horizon}d_{start}" for start in range(len(window_returns)))
+
+    if not scenario_returns:
+        return {"names": [], "returns": np.empty((0, returns.shape[1]))}
+    return {"names": names, "returns": np.vstack(scenario_returns)}
+
+
+def factor_shock_scenarios(betas: np.ndarray, factor_shocks: np.ndarray) -> Dict[str, object]:
+    """
+    Asset returns implied by shocks to common factors.
+
+    Args:
+        betas: (n_assets, n_factors) factor loadings
+        factor_shocks: (n_shocks, n_factors) factor returns, e.g. a grid of market moves
+    """
+    betas = np.asarray(betas, dtype=float).reshape(len(betas), -1)
+    factor_shocks = np.asarray(factor_shocks, dtype=float).reshape(-1, betas.shape[1])
+    return {
+        "names": ["factor_shock_" + "_".join(f"{shock:+.1%}" for shock in shocks) for shocks in factor_shocks],
+        "returns": factor_shocks @ betas.T,
+    }
+
+
+def volatility_spike_scenarios(
+    daily_volatility: np.ndarray,
+    multipliers: Sequence[float] = (1.5, 2.0, 3.0, 4.0),
+    z_scores: Sequence[float] = (-1.0, -2.0, -3.0),
+    horizon: int = 1,
+) -> Dict[str, object]:
+    """
+    Adverse moves of z standard deviations after volatility jumps by each multiplier.
+
+    Args:
+        daily_volatility: (n_assets,) daily return volatility
+        multipliers: Volatility multipliers
+        z_scores: Move sizes in standard deviations of the spiked volatility
+        horizon: Horizon in days
+    """
+    daily_volatility = np.atleast_1d(np.asarray(daily_volatility, dtype=float))
+    grid = np.multiply.outer(np.asarray(multipliers, dtype=float), np.asarray(z_scores, dtype=float)).ravel()
+    return {
+        "names": [f"volatility_{m}x_{z}sd" for m in multipliers for z in z_scores],
+        "returns": np.clip(grid[:, None] * daily_volatility * np.sqrt(horizon), -1.0, None),
+    }
+
+
+def combine_scenarios(*scenario_sets: Dict[str, object]) -> Dict[str, object]:
+    """Stack scenario sets into one scenario matrix."""
+    return {
+        "names": [name for scenarios in scenario_sets for name in scenarios["names"]],
+        "returns": np.vstack([scenarios["returns"] for scenarios in scenario_sets]),
+    }
+
+
+def run_stress_tests(
+    position_values: np.ndarray,
+    scenarios: Dict[str, object],
+    portfolio_value: float,
+    top_n: int = 5,
+) -> Dict[str, object]:
+    """
+    Apply every scenario to the positions at once and summarize the loss distribution.
+
+    Args:
+        position_values: (n_assets,) market value of each position
+        scenarios: Scenario set with names and a (n_scenarios, n_assets) returns matrix
+        portfolio_value: Total portfolio value, for expressing losses as impact
+        top_n: Number of worst scenarios to report
+
+    Returns:
+        Loss percentiles, expected shortfall and the worst scenarios
+    """
+    position_values = np.atleast_1d(np.asarray(position_values, dtype=float))
+    pnl = scenarios["returns"] @ position_values
+    if len(pnl) == 0:
+        return {"scenario_count": 0}
+
+    losses = -pnl
+    worst = np.argsort(losses)[::-1][:top_n]
+    tail_cutoff = np.quantile(losses, 0.95)
+
+    def impact(loss):
+        return float(-loss / portfolio_value) if portfolio_value else float("nan")
+
+    return {
+        "scenario_count": int(len(pnl)),
+        "loss_percentiles": {
+            f"p{p}": float(value) for p, value in zip((50, 95, 99), np.quantile(losses, [0.50, 0.95, 0.99]))
+        },
+        "expected_shortfall_95": float(losses[losses >= tail_cutoff].mean()),
+        "worst_cases": [
+            {
+                "scenario": scenarios["names"][i],
+                "potential_loss": float(pnl[i]),
+                "portfolio_impact": impact(losses[i]),
+            }
+            for i in worst
+        ],
+    }
+
+
+def scenario_results(
+    position_values: np.ndarray,
+    scenarios: Dict[str, object],
+    portfolio_value: float,
+    names: List[str],
+) -> Dict[str, Dict[str, float]]:
+    """Potential loss and portfolio impact of specific named scenarios."""
+    pnl = scenarios["returns"] @ np.atleast_1d(np.asarray(position_values, dtype=float))
+    index = {name: i for i, name in enumerate(scenarios["names"])}
+    return {
+        name: {
+            "potential_loss": float(pnl[index[name]]),
+            "portfolio_impact": float(pnl[index[name]] / portfolio_value) if portfolio_value else float("nan"),
+        }
+        for name in names
+    }
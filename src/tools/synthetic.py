@@ -0,0 +1,331 @@
+"""
+Synthetic market data for load-testing the agents and the backtester at universe scale.
+
+Everything is generated with vectorized NumPy operations from a single seed and is
+returned in exactly the shapes that tools/api.py returns, so the generated universe
+can be written to the local data store and used in place of vendor data.
+"""
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from tools.local_store import save_records
+
+TRADING_DAYS_PER_YEAR = 252
+
+# Market regimes: annualized drift and volatility of each regime
+REGIME_DRIFT = np.array([0.15, 0.02, -0.25])   # bull, sideways, bear
+REGIME_VOL = np.array([0.15, 0.22, 0.40])
+REGIME_SWITCH_PROB = 1 / 126                    # Regimes last ~6 months on average
+
+
+def generate_price_panel(
+    n_tickers: int,
+    n_days: int,
+    seed: Optional[int] = None,
+    start_price: float = 100.0,
+    market_beta: float = 0.5,
+) -> Dict[str, np.ndarray]:
+    """
+    Generate OHLCV series for many tickers at once.
+
+    Closes follow a geometric Brownian motion whose drift and volatility switch between
+    bull, sideways and bear regimes, with returns partly driven by a common market factor.
+    Volume follows an AR(1) process in log space and spikes with large moves, which
+    produces realistic volume clustering.
+
+    Args:
+        n_tickers: Number of tickers (columns)
+        n_days: Number of trading days (rows)
+        seed: Seed for the random generator
+        start_price: Typical starting price
+        market_beta: Loading of each ticker on the common market factor
+
+    Returns:
+        Dictionary of (n_days, n_tickers) arrays keyed by open, high, low, close and volume
+    """
+    rng = np.random.default_rng(seed)
+    shape = (n_days, n_tickers)
+
+    # Regime path: on each switch, jump to one of the other regimes
+    switches = (rng.random(shape) < REGIME_SWITCH_PROB) * rng.integers(1, len(REGIME_DRIFT), size=shape)
+    initial_regime = rng.integers(0, len(REGIME_DRIFT), size=n_tickers)
+    regimes = (initial_regime + np.cumsum(switches, axis=0)) % len(REGIME_DRIFT)
+    del switches
+
+    daily_vol = REGIME_VOL[regimes] / np.sqrt(TRADING_DAYS_PER_YEAR)
+    daily_drift = REGIME_DRIFT[regimes] / TRADING_DAYS_PER_YEAR
+    del regimes
+
+    # Correlated shocks: common market factor plus idiosyncratic noise
+    market_shock = rng.standard_normal((n_days, 1))
+    shocks = market_beta * market_shock + np.sqrt(1 - market_beta ** 2) * rng.standard_normal(shape)
+    log_returns = daily_drift - 0.5 * daily_vol ** 2 + daily_vol * shocks
+
+    first_price = start_price * np.exp(rng.normal(0.0, 0.5, size=n_tickers))
+    close = first_price * np.exp(np.cumsum(log_returns, axis=0))
+    del log_returns
+
+    # Open gaps from the previous close, high/low extend beyond the open-close range
+    previous_close = np.vstack([first_price, close[:-1]])
+    open_ = previous_close * np.exp(0.3 * daily_vol * rng.standard_normal(shape))
+    high = np.maximum(open_, close) * np.exp(0.5 * daily_vol * np.abs(rng.standard_normal(shape)))
+    low = np.minimum(open_, close) * np.exp(-0.5 * daily_vol * np.abs(rng.standard_normal(shape)))
+    del previous_close, daily_vol, daily_drift
+
+    # Volume clustering: persistent log-volume plus a response to the size of the move
+    base_volume = np.log(1_000_000) + rng.normal(0.0, 1.0, size=n_tickers)
+    volume_noise = 0.25 * rng.standard_normal(shape)
+    persistent = np.empty(shape)
+    persistent[0] = volume_noise[0]
+    for day in range(1, n_days):
+        persistent[day] = 0.9 * persistent[day - 1] + volume_noise[day]
+    volume = np.round(np.exp(base_volume + persistent + 0.3 * np.abs(shocks)))
+
+    return {
+        "open": open_,
+        "high": high,
+        "low": low,
+        "close": close,
+        "volume": volume,
+    }
+
+
+def _ar1(
+    rng: np.random.Generator,
+    n_steps: int,
+    n_series: int,
+    mean: np.ndarray,
+    scale: float,
+    phi: float = 0.8,
+) -> np.ndarray:
+    """Persistent noise around a per-series mean, shaped (n_steps, n_series)."""
+    values = np.empty((n_steps, n_series))
+    values[0] = mean + scale * rng.standard_normal(n_series)
+    for step in range(1, n_steps):
+        values[step] = mean + phi * (values[step - 1] - mean) + scale * rng.standard_normal(n_series)
+    return values
+
+
+def generate_fundamentals(
+    n_tickers: int,
+    report_periods: pd.DatetimeIndex,
+    price_at_period: np.ndarray,
+    rng: np.random.Generator,
+) -> Dict[str, np.ndarray]:
+    """
+    Generate quarterly TTM fundamentals for many tickers at once.
+
+    Args:
+        n_tickers: Number of tickers
+        report_periods: Quarter-end report dates
+        price_at_period: (n_periods, n_tickers) close price at each report date
+        rng: Random generator
+
+    Returns:
+        Dictionary of (n_periods, n_tickers) arrays keyed by the metric and line item names
+    """
+    n_periods = len(report_periods)
+
+    shares = np.exp(rng.normal(np.log(500e6), 1.0, size=n_tickers))
+    market_cap = price_at_period * shares
+
+    # Revenue compounds at a persistent, ticker-specific growth rate
+    revenue_growth = _ar1(rng, n_periods, n_tickers, rng.normal(0.08, 0.06, size=n_tickers), 0.04)
+    initial_sales_multiple = np.exp(rng.normal(np.log(3.0), 0.6, size=n_tickers))
+    revenue = (market_cap[0] / initial_sales_multiple) * np.cumprod(1 + revenue_growth / 4, axis=0)
+
+    net_margin = _ar1(rng, n_periods, n_tickers, rng.normal(0.12, 0.08, size=n_tickers), 0.02)
+    operating_margin = net_margin + np.abs(rng.normal(0.05, 0.02, size=(n_periods, n_tickers)))
+    net_income = revenue * net_margin
+
+    book_value_growth = _ar1(rng, n_periods, n_tickers, rng.normal(0.06, 0.04, size=n_tickers), 0.03)
+    book_value = (revenue[0] * np.exp(rng.normal(0.0, 0.4, size=n_tickers))) * np.cumprod(1 + book_value_growth / 4, axis=0)
+
+    earnings_growth = revenue_growth + rng.normal(0.0, 0.05, size=(n_periods, n_tickers))
+    earnings_per_share = net_income / shares
+    free_cash_flow = net_income * rng.normal(1.0, 0.2, size=(n_periods, n_tickers))
+
+    return {
+        "return_on_equity": net_income / book_value,
+        "net_margin": net_margin,
+        "operating_margin": operating_margin,
+        "revenue_growth": revenue_growth,
+        "earnings_growth": earnings_growth,
+        "book_value_growth": book_value_growth,
+        "current_ratio": _ar1(rng, n_periods, n_tickers, np.exp(rng.normal(np.log(1.5), 0.3, size=n_tickers)), 0.1),
+        "debt_to_equity": np.abs(_ar1(rng, n_periods, n_tickers, np.exp(rng.normal(np.log(0.6), 0.5, size=n_tickers)), 0.05)),
+        "earnings_per_share": earnings_per_share,
+        "free_cash_flow_per_share": free_cash_flow / shares,
+        "price_to_earnings_ratio": price_at_period / earnings_per_share,
+        "price_to_book_ratio": market_cap / book_value,
+        "price_to_sales_ratio": market_cap / revenue,
+        "market_cap": market_cap,
+        "outstanding_shares": np.broadcast_to(shares, (n_periods, n_tickers)),
+        "free_cash_flow": free_cash_flow,
+        "net_income": net_income,
+        "depreciation_and_amortization": revenue * 0.04,
+        "capital_expenditure": revenue * 0.05,
+        "working_capital": revenue * np.abs(rng.normal(0.10, 0.05, size=(n_periods, n_tickers))),
+    }
+
+
+METRIC_FIELDS = [
+    "return_on_equity", "net_margin", "operating_margin", "revenue_growth", "earnings_growth",
+    "book_value_growth", "current_ratio", "debt_to_equity", "earnings_per_share",
+    "free_cash_flow_per_share", "price_to_earnings_ratio", "price_to_book_ratio",
+    "price_to_sales_ratio", "market_cap",
+]
+LINE_ITEM_FIELDS = [
+    "free_cash_flow", "net_income", "depreciation_and_amortization",
+    "capital_expenditure", "working_capital",
+]
+
+
+def generate_insider_trades(
+    n_tickers: int,
+    dates: pd.DatetimeIndex,
+    close: np.ndarray,
+    rng: np.random.Generator,
+    trades_per_year: float = 12.0,
+) -> Dict[str, np.ndarray]:
+    """
+    Generate insider trades for many tickers at once as flat column arrays.
+
+    Returns:
+        Dictionary of equal-length arrays: ticker_index, day_index, transaction_shares and price
+    """
+    expected = trades_per_year * len(dates) / TRADING_DAYS_PER_YEAR
+    counts = rng.poisson(expected, size=n_tickers)
+    ticker_index = np.repeat(np.arange(n_tickers), counts)
+    day_index = rng.integers(0, len(dates), size=len(ticker_index))
+
+    # Insiders sell more often than they buy
+    direction = np.where(rng.random(len(ticker_index)) < 0.35, 1, -1)
+    shares = direction * np.round(np.exp(rng.normal(np.log(5000), 1.0, size=len(ticker_index))))
+
+    return {
+        "ticker_index": ticker_index,
+        "day_index": day_index,
+        "transaction_shares": shares,
+        "price": close[day_index, ticker_index],
+    }
+
+
+def generate_ticker_records(
+    tickers: List[str],
+    start_date: str,
+    end_date: str,
+    seed: Optional[int] = None,
+) -> Dict[str, Dict[str, Any]]:
+    """
+    Generate prices, financial metrics, line items, insider trades and company facts
+    for a list of tickers, in the shapes returned by tools/api.py.
+
+    Returns:
+        Dictionary mapping each ticker to its records, keyed by local store record kind
+    """
+    rng = np.random.default_rng(seed)
+    n_tickers = len(tickers)
+    dates = pd.bdate_range(start_date, end_date)
+    panel = generate_price_panel(n_tickers, len(dates), seed=rng.integers(2 ** 32))
+
+    # Include a year of reports before the start so the first days have fundamentals
+    report_periods = pd.date_range(
+        pd.Timestamp(start_date) - pd.DateOffset(years=1), end_date, freq=pd.offsets.QuarterEnd()
+    )
+    period_day = np.clip(dates.searchsorted(report_periods, side="right") - 1, 0, len(dates) - 1)
+    fundamentals = generate_fundamentals(n_tickers, report_periods, panel["close"][period_day], rng)
+    trades = generate_insider_trades(n_tickers, dates, panel["close"], rng)
+
+    date_strs = dates.strftime("%Y-%m-%d").tolist()
+    period_strs = report_periods.strftime("%Y-%m-%d").tolist()
+    trade_order = np.lexsort((-trades["day_index"], trades["ticker_index"]))
+    trade_bounds = np.searchsorted(trades["ticker_index"][trade_order], np.arange(n_tickers + 1))
+
+    records = {}
+    for i, ticker in enumerate(tickers):
+        columns = [panel[name][:, i].tolist() for name in ["open", "close", "high", "low", "volume"]]
+        prices = [
+            {"open": o, "close": c, "high": h, "low": l, "volume": int(v), "time": t}
+            for o, c, h, l, v, t in zip(*columns, date_strs)
+        ]
+
+        # Reports are returned most recent first
+        metric_columns = {name: fundamentals[name][::-1, i].tolist() for name in METRIC_FIELDS + LINE_ITEM_FIELDS}
+        periods = period_strs[::-1]
+        financial_metrics = [
+            {"ticker": ticker, "report_period": period, "period": "ttm",
+             **{name: metric_columns[name][j] for name in METRIC_FIELDS}}
+            for j, period in enumerate(periods)
+        ]
+        line_items = [
+            {"ticker": ticker, "report_period": period, "period": "ttm",
+             **{name: metric_columns[name][j] for name in LINE_ITEM_FIELDS}}
+            for j, period in enumerate(periods)
+        ]
+
+        insider_trades = []
+        for k in trade_order[trade_bounds[i]:trade_bounds[i + 1]]:
+            day = int(trades["day_index"][k])
+            shares = float(trades["transaction_shares"][k])
+            price = float(trades["price"][k])
+            insider_trades.append({
+                "ticker": ticker,
+                "name": f"Insider {k % 7 + 1}",
+                "title": "Director" if k % 3 else "Officer",
+                "transaction_date": date_strs[max(day - 2, 0)],
+                "transaction_shares": shares,
+                "transaction_price_per_share": price,
+                "transaction_value": shares * price,
+                "filing_date": date_strs[day],
+            })
+
+        records[ticker] = {
+            "prices": prices,
+            "financial_metrics": financial_metrics,
+            "line_items": line_items,
+            "insider_trades": insider_trades,
+            "company_facts": {"ticker": ticker, "market_cap": float(panel["close"][-1, i] * fundamentals["outstanding_shares"][-1, i])},
+        }
+    return records
+
+
+def write_local_store(
+    tickers: List[str],
+    start_date: str,
+    end_date: str,
+    root: Optional[str] = None,
+    seed: Optional[int] = None,
+    batch_size: int = 250,
+) -> None:
+    """
+    Generate a synthetic universe and write it straight to the local data store.
+
+    Tickers are generated in batches so memory stays bounded for large universes.
+    """
+    seeds = np.random.SeedSequence(seed).spawn((len(tickers) + batch_size - 1) // batch_size)
+    for batch_number, batch_seed in enumerate(seeds):
+        batch = tickers[batch_number * batch_size:(batch_number + 1) * batch_size]
+        records = generate_ticker_records(batch, start_date, end_date, seed=batch_seed)
+        for ticker, ticker_records in records.items():
+            for kind, kind_records in ticker_records.items():
+                save_records(ticker, kind, kind_records, root=root)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Generate a synthetic universe into the local data store')
+    parser.add_argument('--tickers', type=int, default=100, help='Number of synthetic tickers (default: 100)')
+    parser.add_argument('--start-date', type=str, default='2005-01-01', help='Start date (YYYY-MM-DD)')
+    parser.add_argument('--end-date', type=str, default='2024-12-31', help='End date (YYYY-MM-DD)')
+    parser.add_argument('--output', type=str, help='Local data store directory. Defaults to LOCAL_DATA_DIR')
+    parser.add_argument('--seed', type=int, default=42, help='Random seed (default: 42)')
+
+    args = parser.parse_args()
+
+    tickers = [f"SYN{i:04d}" for i in range(args.tickers)]
+    write_local_store(tickers, args.start_date, args.end_date, root=args.output, seed=args.seed)
+    print(f"Wrote {len(tickers)} synthetic tickers to {args.output or 'LOCAL_DATA_DIR'}")
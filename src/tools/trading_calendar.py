@@ -0,0 +1,134 @@
+"""
+Exchange trading calendar.
+
+Sessions come either from the dates present in a price history, or from the NYSE holiday
+rules below (with a table of unscheduled closures) applied to weekdays.
+"""
+from datetime import date, timedelta
+from typing import Iterable, List, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+DateLike = Union[str, date, pd.Timestamp]
+
+# Unscheduled full-day NYSE closures
+SPECIAL_CLOSURES = [
+    "2001-09-11", "2001-09-12", "2001-09-13", "2001-09-14",  # September 11 attacks
+    "2004-06-11",  # Ronald Reagan day of mourning
+    "2007-01-02",  # Gerald Ford day of mourning
+    "2012-10-29", "2012-10-30",  # Hurricane Sandy
+    "2018-12-05",  # George H. W. Bush day of mourning
+    "2025-01-09",  # Jimmy Carter day of mourning
+]
+
+
+def _easter(year: int) -> date:
+    """Gregorian Easter Sunday (anonymous Gregorian algorithm)."""
+    a, b, c = year % 19, year // 100, year % 100
+    d, e = divmod(b, 4)
+    g = (8 * b + 13) // 25
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def _nth_weekday(year: int, month: int, weekday: int, n: int) -> date:
+    """The n-th given weekday (0 = Monday) of a month, counting from the end when n < 0."""
+    if n > 0:
+        first = date(year, month, 1)
+        return first + timedelta(days=(weekday - first.weekday()) % 7 + 7 * (n - 1))
+    last = date(year + month // 12, month % 12 + 1, 1) - timedelta(days=1)
+    return last - timedelta(days=(last.weekday() - weekday) % 7 + 7 * (-n - 1))
+
+
+def _observed(holiday: date) -> date:
+    """Saturday holidays are observed on Friday and Sunday holidays on Monday."""
+    if holiday.weekday() == 5:
+        return holiday - timedelta(days=1)
+    if holiday.weekday() == 6:
+        return holiday + timedelta(days=1)
+    return holiday
+
+
+def nyse_holidays(start_year: int, end_year: int) -> List[date]:
+    """Full-day NYSE holidays in the given years, including unscheduled closures."""
+    holidays = []
+    for year in range(start_year, end_year + 1):
+        # New Year's Day falling on a Saturday is not observed on the Friday before
+        new_year = date(year, 1, 1)
+        if new_year.weekday() != 5:
+            holidays.append(_observed(new_year))
+        if year >= 1998:
+            holidays.append(_nth_weekday(year, 1, 0, 3))  # Martin Luther King Jr. Day
+        holidays.append(_nth_weekday(year, 2, 0, 3))  # Washington's Birthday
+        holidays.append(_easter(year) - timedelta(days=2))  # Good Friday
+        holidays.append(_nth_weekday(year, 5, 0, -1))  # Memorial Day
+        if year >= 2022:
+            holidays.append(_observed(date(year, 6, 19)))  # Juneteenth
+        holidays.append(_observed(date(year, 7, 4)))  # Independence Day
+        holidays.append(_nth_weekday(year, 9, 0, 1))  # Labor Day
+        holidays.append(_nth_weekday(year, 11, 3, 4))  # Thanksgiving
+        holidays.append(_observed(date(year, 12, 25)))  # Christmas
+    holidays.extend(
+        closure for closure in pd.to_datetime(SPECIAL_CLOSURES).date
+        if start_year <= closure.year <= end_year
+    )
+    return sorted(holidays)
+
+
+class TradingCalendar:
+    """An ordered set of trading sessions, with lookups in trading days."""
+
+    def __init__(self, sessions: Iterable[DateLike]):
+        self.sessions = pd.DatetimeIndex(pd.to_datetime(list(sessions))).normalize().unique().sort_values()
+
+    @classmethod
+    def from_prices(cls, dates: Iterable[DateLike]) -> "TradingCalendar":
+        """Calendar of the dates present in a price history."""
+        return cls(dates)
+
+    @classmethod
+    def nyse(cls, start_date: DateLike, end_date: DateLike) -> "TradingCalendar":
+        """Weekdays between the dates that are not NYSE holidays."""
+        start, end = pd.Timestamp(start_date), pd.Timestamp(end_date)
+        weekdays = pd.bdate_range(start, end)
+        holidays = pd.DatetimeIndex(nyse_holidays(start.year, end.year))
+        return cls(weekdays[~weekdays.isin(holidays)])
+
+    def __len__(self) -> int:
+        return len(self.sessions)
+
+    def is_session(self, day: DateLike) -> bool:
+        """Whether the exchange is open on the given day."""
+        return pd.Timestamp(day).normalize() in self.sessions
+
+    def sessions_in_range(self, start_date: DateLike, end_date: DateLike) -> pd.DatetimeIndex:
+        """Sessions between the dates, inclusive."""
+        return self.sessions[(self.sessions >= pd.Timestamp(start_date)) & (self.sessions <= pd.Timestamp(end_date))]
+
+    def offset(self, day: DateLike, sessions: int) -> Optional[pd.Timestamp]:
+        """
+        The session `sessions` trading days from the latest session on or before `day`
+        (negative to go back). None when that falls outside the calendar.
+        """
+        position = int(self.sessions.searchsorted(pd.Timestamp(day), side="right")) - 1 + sessions
+        if position < 0 or position >= len(self.sessions):
+            return None
+        return self.sessions[position]
+
+    def lookback_start(self, day: DateLike, sessions: int) -> pd.Timestamp:
+        """
+        First day of a window that holds `sessions` trading days up to and including `day`.
+        Falls back to the earliest session when the calendar is too short.
+        """
+        start = self.offset(day, -(sessions - 1))
+        return start if start is not None else self.sessions[0]
+
+
+def trading_days_to_calendar_days(trading_days: int) -> int:
+    """Generous number of calendar days that holds the given number of trading days."""
+    return int(np.ceil(trading_days * 7 / 5 * 1.05)) + 10
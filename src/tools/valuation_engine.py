@@ -0,0 +1,416 @@
+"""
+Batch DCF and owner-earnings valuation.
+
+Array versions of the valuation agent's calculate_intrinsic_value and
+calculate_owner_earnings_value. Every input broadcasts against the others, so one call
+values a whole universe of tickers, or a grid of assumptions for each of them.
+"""
+import time
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Valuation gap beyond which a stock is considered under/overvalued
+VALUATION_GAP_THRESHOLD = 0.15
+
+# Monte Carlo valuation settings. Each rate is drawn from a numpy.random.Generator
+# distribution ("normal", "uniform", "triangular", ...) with the given keyword arguments,
+# or held at "value" with the "fixed" distribution. A normal growth rate without a "loc"
+# is centered on the reported earnings growth.
+MONTE_CARLO_DEFAULTS = {
+    "paths": 100_000,
+    "chunk_size": 25_000,
+    "latency_budget_ms": 50,
+    "seed": None,
+    "growth_rate": {"distribution": "normal", "scale": 0.05},
+    "discount_rate": {"distribution": "normal", "loc": 0.10, "scale": 0.01},
+    "terminal_growth_rate": {"distribution": "normal", "loc": 0.03, "scale": 0.005},
+    "required_return": {"distribution": "normal", "loc": 0.15, "scale": 0.02},
+}
+
+
+def calculate_intrinsic_values(
+    free_cash_flow: np.ndarray,
+    growth_rate: np.ndarray = 0.05,
+    discount_rate: np.ndarray = 0.10,
+    terminal_growth_rate: np.ndarray = 0.02,
+    num_years: int = 5,
+) -> np.ndarray:
+    """
+    Discounted cash flow value for every element of the broadcast inputs.
+
+    Args:
+        free_cash_flow: Current free cash flow
+        growth_rate: Expected growth rate
+        discount_rate: Discount rate
+        terminal_growth_rate: Perpetuity growth rate after the projection
+        num_years: Number of years to project
+
+    Returns:
+        DCF values, shaped like the broadcast inputs
+    """
+    free_cash_flow, growth_rate, discount_rate, terminal_growth_rate = np.broadcast_arrays(
+        *(np.asarray(x, dtype=float) for x in (free_cash_flow, growth_rate, discount_rate, terminal_growth_rate))
+    )
+
+    # Project and discount one year at a time; each step is a single pass over all elements
+    cash_flow = free_cash_flow
+    discount_factor = np.ones_like(discount_rate)
+    present_value = np.zeros_like(free_cash_flow)
+    for year in range(num_years):
+        if year:
+            cash_flow = cash_flow * (1 + growth_rate)
+        discount_factor = discount_factor * (1 + discount_rate)
+        present_value = present_value + cash_flow / discount_factor
+
+    terminal_value = cash_flow * (1 + terminal_growth_rate) / (discount_rate - terminal_growth_rate)
+    return present_value + terminal_value / discount_factor
+
+
+def calculate_owner_earnings_values(
+    net_income: np.ndarray,
+    depreciation: np.ndarray,
+    capex: np.ndarray,
+    working_capital_change: np.ndarray,
+    growth_rate: np.ndarray = 0.05,
+    required_return: np.ndarray = 0.15,
+    margin_of_safety: np.ndarray = 0.25,
+    num_years: int = 5,
+) -> np.ndarray:
+    """
+    Owner earnings value with margin of safety for every element of the broadcast inputs.
+
+    As in the scalar version, the value is 0 when an input is missing (NaN) or when owner
+    earnings are not positive.
+
+    Args:
+        net_income: Annual net income
+        depreciation: Annual depreciation and amortization
+        capex: Annual capital expenditures
+        working_capital_change: Annual change in working capital
+        growth_rate: Expected growth rate
+        required_return: Required rate of return
+        margin_of_safety: Margin of safety to apply to final value
+        num_years: Number of years to project
+
+    Returns:
+        Owner earnings values, shaped like the broadcast inputs
+    """
+    net_income, depreciation, capex, working_capital_change, growth_rate, required_return, margin_of_safety = np.broadcast_arrays(
+        *(np.asarray(x, dtype=float) for x in (
+            net_income, depreciation, capex, working_capital_change, growth_rate, required_return, margin_of_safety
+        ))
+    )
+    owner_earnings = net_income + depreciation - capex - working_capital_change
+    valid = np.isfinite(owner_earnings) & (owner_earnings > 0)
+
+    with np.errstate(invalid='ignore', divide='ignore', over='ignore'):
+        discounted_value = owner_earnings
+        total = np.zeros_like(owner_earnings)
+        for _ in range(num_years):
+            discounted_value = discounted_value * (1 + growth_rate) / (1 + required_return)
+            total = total + discounted_value
+
+        # Terminal growth is capped at 3%
+        terminal_growth = np.minimum(growth_rate, 0.03)
+        terminal_value = discounted_value * (1 + terminal_growth) / (required_return - terminal_growth)
+        terminal_value_discounted = terminal_value / (1 + required_return) ** num_years
+
+        intrinsic_value = total + terminal_value_discounted
+
+    return np.where(valid, intrinsic_value * (1 - margin_of_safety), 0.0)
+
+
+def dcf_sensitivity_grid(
+    free_cash_flow: np.ndarray,
+    discount_rates: np.ndarray,
+    growth_rates: np.ndarray,
+    terminal_growth_rate: float = 0.03,
+    num_years: int = 5,
+) -> np.ndarray:
+    """
+    DCF value of every ticker under every discount rate and growth rate.
+
+    Returns:
+        (n_tickers, n_discount_rates, n_growth_rates) array of values
+    """
+    return calculate_intrinsic_values(
+        free_cash_flow=np.atleast_1d(np.asarray(free_cash_flow, dtype=float))[:, None, None],
+        growth_rate=np.asarray(growth_rates, dtype=float)[None, None, :],
+        discount_rate=np.asarray(discount_rates, dtype=float)[None, :, None],
+        terminal_growth_rate=terminal_growth_rate,
+        num_years=num_years,
+    )
+
+
+def owner_earnings_sensitivity_grid(
+    net_income: np.ndarray,
+    depreciation: np.ndarray,
+    capex: np.ndarray,
+    working_capital_change: np.ndarray,
+    required_returns: np.ndarray,
+    growth_rates: np.ndarray,
+    margin_of_safety: float = 0.25,
+    num_years: int = 5,
+) -> np.ndarray:
+    """
+    Owner earnings value of every ticker under every required return and growth rate.
+
+    Returns:
+        (n_tickers, n_required_returns, n_growth_rates) array of values
+    """
+    def column(x):
+        return np.atleast_1d(np.asarray(x, dtype=float))[:, None, None]
+
+    return calculate_owner_earnings_values(
+        net_income=column(net_income),
+        depreciation=column(depreciation),
+        capex=column(capex),
+        working_capital_change=column(working_capital_change),
+        growth_rate=np.asarray(growth_rates, dtype=float)[None, None, :],
+        required_return=np.asarray(required_returns, dtype=float)[None, :, None],
+        margin_of_safety=margin_of_safety,
+        num_years=num_years,
+    )
+
+
+def calculate_valuation_gaps(
+    market_cap: np.ndarray,
+    free_cash_flow: np.ndarray,
+    net_income: np.ndarray,
+    depreciation: np.ndarray,
+    capex: np.ndarray,
+    working_capital_change: np.ndarray,
+    growth_rate: np.ndarray,
+    discount_rate: np.ndarray = 0.10,
+    terminal_growth_rate: np.ndarray = 0.03,
+    required_return: np.ndarray = 0.15,
+) -> Dict[str, np.ndarray]:
+    """
+    Both valuations and their gaps to market cap, by default with the valuation agent's
+    assumptions.
+
+    Returns:
+        Dictionary of arrays: dcf_value, owner_earnings_value, dcf_gap, owner_earnings_gap
+        and valuation_gap (the average of the two gaps)
+    """
+    market_cap = np.asarray(market_cap, dtype=float)
+    owner_earnings_value = calculate_owner_earnings_values(
+        net_income=net_income,
+        depreciation=depreciation,
+        capex=capex,
+        working_capital_change=working_capital_change,
+        growth_rate=growth_rate,
+        required_return=required_return,
+        margin_of_safety=0.25,
+    )
+    dcf_value = calculate_intrinsic_values(
+        free_cash_flow=free_cash_flow,
+        growth_rate=growth_rate,
+        discount_rate=discount_rate,
+        terminal_growth_rate=terminal_growth_rate,
+        num_years=5,
+    )
+
+    with np.errstate(invalid='ignore', divide='ignore'):
+        dcf_gap = (dcf_value - market_cap) / market_cap
+        owner_earnings_gap = (owner_earnings_value - market_cap) / market_cap
+
+    return {
+        "dcf_value": dcf_value,
+        "owner_earnings_value": owner_earnings_value,
+        "dcf_gap": dcf_gap,
+        "owner_earnings_gap": owner_earnings_gap,
+        "valuation_gap": (dcf_gap + owner_earnings_gap) / 2,
+    }
+
+
+def screen_by_valuation_gap(
+    tickers: List[str],
+    market_cap: np.ndarray,
+    free_cash_flow: np.ndarray,
+    net_income: np.ndarray,
+    depreciation: np.ndarray,
+    capex: np.ndarray,
+    working_capital_change: np.ndarray,
+    growth_rate: np.ndarray,
+    threshold: float = VALUATION_GAP_THRESHOLD,
+) -> pd.DataFrame:
+    """
+    Value a universe of tickers in one pass and rank them by valuation gap.
+
+    Returns:
+        DataFrame indexed by ticker with both valuations, their gaps and the valuation
+        agent's signal, most undervalued first
+    """
+    gaps = calculate_valuation_gaps(
+        market_cap, free_cash_flow, net_income, depreciation, capex, working_capital_change, growth_rate
+    )
+    screen = pd.DataFrame(gaps, index=pd.Index(tickers, name="ticker"))
+    screen["signal"] = np.where(
+        screen["valuation_gap"] > threshold, "bullish",
+        np.where(screen["valuation_gap"] < -threshold, "bearish", "neutral"),
+    )
+    return screen.sort_values("valuation_gap", ascending=False, na_position="last")
+
+
+def sample_distribution(rng: np.random.Generator, spec: Dict[str, Any], size: int) -> np.ndarray:
+    """Draw `size` samples from a distribution spec such as {"distribution": "normal", "loc": 0.1, "scale": 0.01}."""
+    params = {key: value for key, value in spec.items() if key != "distribution"}
+    if spec["distribution"] == "fixed":
+        return np.full(size, float(params["value"]))
+    return getattr(rng, spec["distribution"])(size=size, **params)
+
+
+def monte_carlo_valuation(
+    market_cap: float,
+    free_cash_flow: float,
+    net_income: float,
+    depreciation: float,
+    capex: float,
+    working_capital_change: float,
+    growth_rate: float,
+    config: Optional[Dict[str, Any]] = None,
+    threshold: float = VALUATION_GAP_THRESHOLD,
+) -> Dict[str, Any]:
+    """
+    Distribution of the valuation gap under uncertain growth, discount, terminal growth and
+    required return rates.
+
+    Paths are sampled and valued in vectorized chunks. Once the latency budget is spent no
+    further chunks are started, so the result uses however many paths fit in the budget.
+    Paths where a perpetuity rate is not above its growth rate have no finite value and
+    are dropped.
+
+    Args:
+        market_cap: Current market cap
+        free_cash_flow, net_income, depreciation, capex, working_capital_change: Latest
+            reported inputs, as for the point estimates
+        growth_rate: Reported earnings growth
+        config: Overrides for MONTE_CARLO_DEFAULTS
+        threshold: Valuation gap band
+
+    Returns:
+        Signal, its probability, the probability of each side of the band, gap percentiles
+        and the number of paths and milliseconds used
+    """
+    config = {**MONTE_CARLO_DEFAULTS, **(config or {})}
+    rng = np.random.default_rng(config["seed"])
+    growth_spec = config["growth_rate"]
+    if growth_spec["distribution"] == "normal" and "loc" not in growth_spec:
+        growth_spec = {**growth_spec, "loc": growth_rate}
+
+    start = time.perf_counter()
+    deadline = start + config["latency_budget_ms"] / 1000
+    gaps = []
+    paths = 0
+    while paths < config["paths"] and (not gaps or time.perf_counter() < deadline):
+        size = min(config["chunk_size"], config["paths"] - paths)
+        growth = sample_distribution(rng, growth_spec, size)
+        discount = sample_distribution(rng, config["discount_rate"], size)
+        terminal_growth = sample_distribution(rng, config["terminal_growth_rate"], size)
+        required_return = sample_distribution(rng, config["required_return"], size)
+        paths += size
+
+        valid = (discount > terminal_growth) & (required_return > np.minimum(growth, 0.03))
+        chunk = calculate_valuation_gaps(
+            market_cap=market_cap,
+            free_cash_flow=free_cash_flow,
+            net_income=net_income,
+            depreciation=depreciation,
+            capex=capex,
+            working_capital_change=working_capital_change,
+            growth_rate=growth[valid],
+            discount_rate=discount[valid],
+            terminal_growth_rate=terminal_growth[valid],
+            required_return=required_return[valid],
+        )
+        gaps.append(chunk["valuation_gap"][np.isfinite(chunk["valuation_gap"])])
+
+    gaps = np.concatenate(gaps)
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    if len(gaps) == 0:
+        return {"signal": "neutral", "probability": 0.0, "paths": paths, "valid_paths": 0, "elapsed_ms": elapsed_ms}
+
+    probabilities = {
+        "bullish": float((gaps > threshold).mean()),
+        "bearish": float((gaps < -threshold).mean()),
+    }
+    probabilities["neutral"] = 1 - probabilities["bullish"] - probabilities["bearish"]
+    signal = max(probabilities, key=probabilities.get)
+
+    return {
+        "signal": signal,
+        "probability": probabilities[signal],
+        "probability_undervalued": probabilities["bullish"],
+        "probability_overvalued": probabilities["bearish"],
+        "gap_percentiles": {
+            f"p{p}": float(value) for p, value in zip((5, 50, 95), np.quantile(gaps, [0.05, 0.50, 0.95]))
+        },
+        "paths": paths,
+        "valid_paths": int(len(gaps)),
+        "elapsed_ms": elapsed_ms,
+    }
+
+
+def load_valuation_inputs(tickers: List[str], end_date: str) -> Dict[str, np.ndarray]:
+    """
+    Fetch the latest valuation inputs for each ticker, as the market data agent does, and
+    stack them into arrays. Missing values are NaN.
+    """
+    from tools.api import get_financial_metrics, get_market_cap, search_line_items
+
+    columns = {key: [] for key in (
+        "market_cap", "free_cash_flow", "net_income", "depreciation", "capex", "working_capital_change", "growth_rate"
+    )}
+    for ticker in tickers:
+        # A ticker without reports (or company facts) gets NaNs instead of failing the universe
+        try:
+            metrics = get_financial_metrics(ticker=ticker, report_period=end_date, period='ttm', limit=1)
+        except ValueError:
+            metrics = []
+        try:
+            line_items = search_line_items(
+                ticker=ticker,
+                line_items=["free_cash_flow", "net_income", "depreciation_and_amortization", "capital_expenditure", "working_capital"],
+                period='ttm',
+                limit=2,
+            )
+        except ValueError:
+            line_items = []
+        try:
+            market_cap = get_market_cap(ticker=ticker)
+        except ValueError:
+            market_cap = None
+        current = line_items[0] if line_items else {}
+        previous = line_items[1] if len(line_items) > 1 else {}
+
+        def value(item, key):
+            return np.nan if item.get(key) is None else item[key]
+
+        columns["market_cap"].append(market_cap or np.nan)
+        columns["free_cash_flow"].append(value(current, "free_cash_flow"))
+        columns["net_income"].append(value(current, "net_income"))
+        columns["depreciation"].append(value(current, "depreciation_and_amortization"))
+        columns["capex"].append(value(current, "capital_expenditure"))
+        columns["working_capital_change"].append(value(current, "working_capital") - value(previous, "working_capital"))
+        columns["growth_rate"].append(value(metrics[0], "earnings_growth") if metrics else np.nan)
+
+    return {key: np.array(values, dtype=float) for key, values in columns.items()}
+
+
+if __name__ == "__main__":
+    import argparse
+    from datetime import datetime
+
+    parser = argparse.ArgumentParser(description='Screen a universe of tickers by valuation gap')
+    parser.add_argument('--tickers', type=str, required=True, help='Comma-separated stock ticker symbols (e.g., AAPL,MSFT)')
+    parser.add_argument('--end_date', type=str, default=datetime.now().strftime('%Y-%m-%d'), help='End date in YYYY-MM-DD format')
+    parser.add_argument('--top', type=int, default=20, help='Number of tickers to print (default: 20)')
+
+    args = parser.parse_args()
+    tickers = args.tickers.split(',')
+
+    screen = screen_by_valuation_gap(tickers, **load_valuation_inputs(tickers, args.end_date))
+    print(screen.head(args.top).to_string(float_format=lambda x: f"{x:.4f}"))
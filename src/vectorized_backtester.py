@@ -0,0 +1,533 @@
+"""
+Rule-only backtesting over NumPy arrays.
+
+Runs the deterministic part of the pipeline (technical ensemble, fundamentals scores,
+valuation gap and risk-based sizing) without the LLM, for many tickers and thousands
+of days at once. Signals are computed for every date in one pass per ticker, and the
+simulation applies Backtester.execute_trade's cash and position constraints to all
+tickers at once, one day at a time.
+"""
+import math
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Mapping, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from agents.risk_manager import (
+    DRAWDOWN_MODERATE,
+    DRAWDOWN_SEVERE,
+    HOLD_RISK_SCORE,
+    REDUCE_RISK_SCORE,
+    VAR_HIGH,
+    VAR_MODERATE,
+    VOLATILITY_HIGH,
+    VOLATILITY_MODERATE,
+)
+from agents.technicals import (
+    BOLLINGER_LOWER_POSITION,
+    BOLLINGER_UPPER_POSITION,
+    MEAN_REVERSION_Z_SCORE,
+    MOMENTUM_THRESHOLD,
+    SIGNAL_THRESHOLD,
+    STRATEGY_WEIGHTS,
+    TREND_EMA_SPANS,
+    VOL_REGIME_HIGH,
+    VOL_REGIME_LOW,
+    VOL_Z_SCORE,
+    calculate_adx,
+    calculate_bollinger_bands,
+    calculate_ema,
+)
+from agents.valuation import VALUATION_GAP_THRESHOLD
+from tools.api import get_financial_metrics, get_market_cap, get_price_data, search_line_items
+from tools.valuation_engine import calculate_intrinsic_values, calculate_owner_earnings_values
+
+LINE_ITEMS = ["free_cash_flow", "net_income", "depreciation_and_amortization", "capital_expenditure", "working_capital"]
+
+
+##### Signals for every date #####
+def calculate_hurst_series(close: pd.Series, window: int = 126, max_lag: int = 20) -> pd.Series:
+    """
+    Rolling Hurst exponent: the slope of log(sqrt(std(lagged differences))) against log(lag)
+    over a trailing window, solved in closed form for every date at once.
+    """
+    lags = np.arange(2, max_lag)
+    log_lags = np.log(lags)
+    log_tau = pd.concat(
+        [np.log(np.sqrt(close.diff(lag).rolling(window).std(ddof=0)).clip(lower=1e-8)) for lag in lags],
+        axis=1,
+    ).to_numpy()
+    centered_lags = log_lags - log_lags.mean()
+    slope = (log_tau - log_tau.mean(axis=1, keepdims=True)) @ centered_lags / (centered_lags ** 2).sum()
+    return pd.Series(slope, index=close.index)
+
+
+def calculate_strategy_signal_series(prices_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Signal (-1, 0, 1) and confidence of each technical analyst strategy for every date.
+    """
+    close = prices_df['close']
+    returns = close.pct_change()
+
+    # Trend following
+    ema_fast, ema_medium, ema_slow = (calculate_ema(prices_df, span) for span in TREND_EMA_SPANS)
+    short_trend = ema_fast > ema_medium
+    medium_trend = ema_medium > ema_slow
+    adx = calculate_adx(prices_df.copy(), 14)['adx']
+    trend = np.where(short_trend & medium_trend, 1, np.where(~short_trend & ~medium_trend, -1, 0))
+    trend_confidence = np.where(trend != 0, adx / 100.0, 0.5)
+
+    # Mean reversion
+    z_score = (close - close.rolling(window=50).mean()) / close.rolling(window=50).std()
+    bb_upper, bb_lower = calculate_bollinger_bands(prices_df)
+    price_vs_bb = (close - bb_lower) / (bb_upper - bb_lower)
+    mean_reversion = np.where(
+        (z_score < -MEAN_REVERSION_Z_SCORE) & (price_vs_bb < BOLLINGER_LOWER_POSITION), 1,
+        np.where((z_score > MEAN_REVERSION_Z_SCORE) & (price_vs_bb > BOLLINGER_UPPER_POSITION), -1, 0),
+    )
+    mean_reversion_confidence = np.where(mean_reversion != 0, np.minimum(z_score.abs() / 4, 1.0), 0.5)
+
+    # Momentum
+    momentum_score = 0.4 * returns.rolling(21).sum() + 0.3 * returns.rolling(63).sum() + 0.3 * returns.rolling(126).sum()
+    volume_confirmation = prices_df['volume'] / prices_df['volume'].rolling(21).mean() > 1.0
+    momentum = np.where(
+        (momentum_score > MOMENTUM_THRESHOLD) & volume_confirmation, 1,
+        np.where((momentum_score < -MOMENTUM_THRESHOLD) & volume_confirmation, -1, 0),
+    )
+    momentum_confidence = np.where(momentum != 0, np.minimum(momentum_score.abs() * 5, 1.0), 0.5)
+
+    # Volatility
+    hist_vol = returns.rolling(21).std() * math.sqrt(252)
+    vol_ma = hist_vol.rolling(63).mean()
+    vol_regime = hist_vol / vol_ma
+    vol_z = (hist_vol - vol_ma) / hist_vol.rolling(63).std()
+    volatility = np.where(
+        (vol_regime < VOL_REGIME_LOW) & (vol_z < -VOL_Z_SCORE), 1,
+        np.where((vol_regime > VOL_REGIME_HIGH) & (vol_z > VOL_Z_SCORE), -1, 0),
+    )
+    volatility_confidence = np.where(volatility != 0, np.minimum(vol_z.abs() / 3, 1.0), 0.5)
+
+    # Statistical arbitrage
+    skew = returns.rolling(63).skew()
+    hurst = calculate_hurst_series(close)
+    stat_arb = np.where((hurst < 0.4) & (skew > 1), 1, np.where((hurst < 0.4) & (skew < -1), -1, 0))
+    stat_arb_confidence = np.where(stat_arb != 0, (0.5 - hurst) * 2, 0.5)
+
+    return pd.DataFrame({
+        'trend_signal': trend,
+        'trend_confidence': trend_confidence,
+        'mean_reversion_signal': mean_reversion,
+        'mean_reversion_confidence': mean_reversion_confidence,
+        'momentum_signal': momentum,
+        'momentum_confidence': momentum_confidence,
+        'volatility_signal': volatility,
+        'volatility_confidence': volatility_confidence,
+        'stat_arb_signal': stat_arb,
+        'stat_arb_confidence': stat_arb_confidence,
+    }, index=prices_df.index)
+
+
+def combine_strategy_signals(
+    features: Mapping[str, np.ndarray],
+    strategy_weights: Optional[Dict[str, float]] = None,
+    signal_threshold: float = SIGNAL_THRESHOLD,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    weighted_signal_combination applied elementwise to arrays of strategy signals.
+
+    Returns:
+        The combined signal (-1, 0, 1) and confidence arrays
+    """
+    strategy_weights = strategy_weights or STRATEGY_WEIGHTS
+    weighted_sum = 0
+    total_confidence = 0
+    for strategy, weight in strategy_weights.items():
+        confidence = np.nan_to_num(np.asarray(features[f'{strategy}_confidence'], dtype=float))
+        weighted_sum = weighted_sum + np.asarray(features[f'{strategy}_signal']) * weight * confidence
+        total_confidence = total_confidence + weight * confidence
+
+    final_score = np.divide(weighted_sum, total_confidence, out=np.zeros(np.shape(total_confidence)), where=total_confidence > 0)
+    signal = np.where(final_score > signal_threshold, 1, np.where(final_score < -signal_threshold, -1, 0))
+    return signal, np.abs(final_score)
+
+
+def calculate_fundamentals_block_signals(metrics_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Signal (-1, 0, 1) of each of the fundamentals agent's four scoring blocks for every row.
+
+    Args:
+        metrics_df: Financial metrics, one row per report (or per ticker)
+
+    Returns:
+        DataFrame with profitability, growth, financial_health and price_ratios signals
+    """
+    def block_signal(score):
+        return np.where(score >= 2, 1, np.where(score == 0, -1, 0))
+
+    m = metrics_df
+    return pd.DataFrame({
+        'profitability_signal': block_signal(
+            (m['return_on_equity'] > 0.15).astype(int) + (m['net_margin'] > 0.20) + (m['operating_margin'] > 0.15)),
+        'growth_signal': block_signal(
+            (m['revenue_growth'] > 0.10).astype(int) + (m['earnings_growth'] > 0.10) + (m['book_value_growth'] > 0.10)),
+        'financial_health_signal': block_signal(
+            (m['current_ratio'] > 1.5).astype(int) + (m['debt_to_equity'] < 0.5)
+            + (m['free_cash_flow_per_share'] > m['earnings_per_share'] * 0.8)),
+        'price_ratios_signal': block_signal(
+            (m['price_to_earnings_ratio'] < 25).astype(int) + (m['price_to_book_ratio'] < 3) + (m['price_to_sales_ratio'] < 5)),
+    }, index=metrics_df.index)
+
+
+def calculate_fundamentals_signal_series(metrics_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Fundamentals agent scoring applied to every report at once.
+
+    Args:
+        metrics_df: Financial metrics, one row per report period
+
+    Returns:
+        DataFrame with signal (-1, 0, 1) and confidence per report
+    """
+    blocks = calculate_fundamentals_block_signals(metrics_df).to_numpy()
+    bullish = (blocks == 1).sum(axis=1)
+    bearish = (blocks == -1).sum(axis=1)
+
+    return pd.DataFrame({
+        'signal': np.sign(bullish - bearish),
+        'confidence': np.maximum(bullish, bearish) / blocks.shape[1],
+    }, index=metrics_df.index)
+
+
+def calculate_valuation_series(
+    metrics_df: pd.DataFrame,
+    line_items_df: pd.DataFrame,
+) -> pd.DataFrame:
+    """
+    Owner earnings and DCF values for every report, using the valuation agent's assumptions.
+
+    Args:
+        metrics_df: Financial metrics, one row per report period
+        line_items_df: Line items, one row per report period
+
+    Returns:
+        DataFrame with owner_earnings_value and dcf_value per report
+    """
+    line_items_df = line_items_df.sort_index()
+    working_capital_change = line_items_df['working_capital'].diff().fillna(0)
+    growth = metrics_df['earnings_growth'].reindex(line_items_df.index, method='ffill')
+
+    owner_earnings_values = calculate_owner_earnings_values(
+        net_income=line_items_df['net_income'].to_numpy(dtype=float),
+        depreciation=line_items_df['depreciation_and_amortization'].to_numpy(dtype=float),
+        capex=line_items_df['capital_expenditure'].to_numpy(dtype=float),
+        working_capital_change=working_capital_change.to_numpy(dtype=float),
+        growth_rate=growth.to_numpy(dtype=float),
+        required_return=0.15,
+        margin_of_safety=0.25
+    )
+    dcf_values = calculate_intrinsic_values(
+        free_cash_flow=line_items_df['free_cash_flow'].to_numpy(dtype=float),
+        growth_rate=growth.to_numpy(dtype=float),
+        discount_rate=0.10,
+        terminal_growth_rate=0.03,
+        num_years=5,
+    )
+
+    return pd.DataFrame({
+        'owner_earnings_value': owner_earnings_values,
+        'dcf_value': dcf_values,
+    }, index=line_items_df.index)
+
+
+def calculate_market_risk_series(close: pd.Series, window: int = 21) -> pd.Series:
+    """
+    Risk manager's market risk score (0-6) for every date, from volatility, historical
+    VaR and max drawdown over a trailing window of closes.
+    """
+    returns = close.pct_change()
+    volatility = returns.rolling(window).std() * (252 ** 0.5)
+    var_95 = returns.rolling(window).quantile(0.05)
+
+    max_drawdown = np.full(len(close), np.nan)
+    if len(close) >= window:
+        windows = sliding_window_view(close.to_numpy(dtype=float), window)
+        max_drawdown[window - 1:] = (windows / np.maximum.accumulate(windows, axis=1) - 1).min(axis=1)
+
+    score = (
+        np.where(volatility > VOLATILITY_HIGH, 2, np.where(volatility > VOLATILITY_MODERATE, 1, 0))
+        + np.where(var_95 < VAR_HIGH, 2, np.where(var_95 < VAR_MODERATE, 1, 0))
+        + np.where(max_drawdown < DRAWDOWN_SEVERE, 2, np.where(max_drawdown < DRAWDOWN_MODERATE, 1, 0))
+    )
+    return pd.Series(score, index=close.index)
+
+
+def compute_rule_features(
+    prices_df: pd.DataFrame,
+    financial_metrics: List[Dict[str, Any]],
+    financial_line_items: List[Dict[str, Any]],
+    market_cap: float,
+) -> pd.DataFrame:
+    """
+    Parameter-independent inputs to the rule-only decision for every date: the strategy
+    signals, fundamentals signal, valuation gap and market risk score.
+
+    Fundamentals are taken point-in-time (latest report on or before each date), and the
+    market cap on each date is scaled from the current market cap by the close.
+    """
+    close = prices_df['close']
+    dates = prices_df.index
+
+    metrics_df = pd.DataFrame(financial_metrics)
+    metrics_df.index = pd.to_datetime(metrics_df['report_period'])
+    metrics_df = metrics_df.sort_index()
+    line_items_df = pd.DataFrame(financial_line_items)
+    line_items_df.index = pd.to_datetime(line_items_df['report_period'])
+    line_items_df = line_items_df.sort_index()
+
+    fundamentals = calculate_fundamentals_signal_series(metrics_df).reindex(dates, method='ffill')
+
+    # Valuation gap against a daily market cap
+    values = calculate_valuation_series(metrics_df, line_items_df).reindex(dates, method='ffill')
+    daily_market_cap = market_cap * close / close.iloc[-1]
+    dcf_gap = (values['dcf_value'] - daily_market_cap) / daily_market_cap
+    owner_earnings_gap = (values['owner_earnings_value'] - daily_market_cap) / daily_market_cap
+
+    return pd.concat([
+        pd.DataFrame({'close': close}),
+        calculate_strategy_signal_series(prices_df),
+        pd.DataFrame({
+            'fundamentals_signal': fundamentals['signal'],
+            'fundamentals_confidence': fundamentals['confidence'],
+            'valuation_gap': (dcf_gap + owner_earnings_gap) / 2,
+            'market_risk_score': calculate_market_risk_series(close),
+        }),
+    ], axis=1)
+
+
+def calculate_rule_actions(
+    features: Mapping[str, np.ndarray],
+    strategy_weights: Optional[Dict[str, float]] = None,
+    signal_threshold: float = SIGNAL_THRESHOLD,
+    valuation_threshold: float = VALUATION_GAP_THRESHOLD,
+    hold_risk_score: int = HOLD_RISK_SCORE,
+    reduce_risk_score: int = REDUCE_RISK_SCORE,
+) -> Dict[str, np.ndarray]:
+    """
+    The risk manager's trading action and position limit, elementwise over feature arrays
+    of any shape (one ticker's dates, or dates x tickers).
+
+    The sentiment agent is not included, so signal divergence is checked across the
+    technical, fundamentals and valuation signals.
+
+    Returns:
+        Dictionary of arrays: technical_signal, valuation_signal, risk_score,
+        action (1 buy, -1 sell, 0 hold) and max_position_fraction
+    """
+    technical_signal, technical_confidence = combine_strategy_signals(features, strategy_weights, signal_threshold)
+    fundamentals_signal = np.nan_to_num(np.asarray(features['fundamentals_signal'], dtype=float))
+    fundamentals_confidence = np.nan_to_num(np.asarray(features['fundamentals_confidence'], dtype=float))
+    valuation_gap = np.asarray(features['valuation_gap'], dtype=float)
+    market_risk_score = np.nan_to_num(np.asarray(features['market_risk_score'], dtype=float))
+
+    valuation_signal = np.where(valuation_gap > valuation_threshold, 1, np.where(valuation_gap < -valuation_threshold, -1, 0))
+
+    # Risk score: market risk, low-confidence penalty and signal divergence
+    low_confidence = (
+        (np.round(technical_confidence * 100) < 30)
+        | (fundamentals_confidence < 0.30)
+        | (np.round(np.nan_to_num(np.abs(valuation_gap)) * 100) < 30)
+    )
+    signals = np.stack([technical_signal, fundamentals_signal, valuation_signal])
+    signal_divergence = np.where((signals.max(axis=0) == 1) & (signals.min(axis=0) == -1) & (signals == 0).any(axis=0), 2, 0)
+    risk_score = np.minimum(market_risk_score * 2 + np.where(low_confidence, 4, 0) + signal_divergence, 10)
+
+    # Trading action: hold on very high risk, reduce on high risk, otherwise follow valuation
+    action = np.where(risk_score >= hold_risk_score, 0, np.where(risk_score >= reduce_risk_score, -1, valuation_signal))
+    max_position_fraction = 0.25 * np.where(market_risk_score >= 4, 0.5, np.where(market_risk_score >= 2, 0.75, 1.0))
+
+    return {
+        'technical_signal': technical_signal,
+        'valuation_signal': valuation_signal,
+        'risk_score': risk_score,
+        'action': action.astype(np.int8),
+        'max_position_fraction': max_position_fraction,
+    }
+
+
+def compute_rule_signals(
+    prices_df: pd.DataFrame,
+    financial_metrics: List[Dict[str, Any]],
+    financial_line_items: List[Dict[str, Any]],
+    market_cap: float,
+    **params,
+) -> pd.DataFrame:
+    """
+    Deterministic agent signals and the risk manager's trading action for every date.
+
+    Returns:
+        DataFrame indexed by date with the features plus the calculate_rule_actions outputs
+    """
+    features = compute_rule_features(prices_df, financial_metrics, financial_line_items, market_cap)
+    actions = calculate_rule_actions(features, **params)
+    return features.assign(**actions)
+
+
+def load_rule_inputs(ticker: str, start_date: str, end_date: str, limit: int = 100) -> Dict[str, Any]:
+    """Fetch the price, metric and line-item history needed by compute_rule_signals."""
+    return {
+        "prices_df": get_price_data(ticker, start_date, end_date),
+        "financial_metrics": get_financial_metrics(ticker, report_period=end_date, period='ttm', limit=limit),
+        "financial_line_items": search_line_items(ticker, LINE_ITEMS, period='ttm', limit=limit),
+        "market_cap": get_market_cap(ticker),
+    }
+
+
+def stack_by_ticker(frames_by_ticker: Dict[str, pd.DataFrame]) -> Dict[str, Any]:
+    """
+    Align per-ticker rule features or signals on a common date index as (n_days, n_tickers)
+    arrays, one per column. Closes are forward-filled and other gaps are zero-filled.
+    """
+    tickers = list(frames_by_ticker)
+    columns = next(iter(frames_by_ticker.values())).columns
+    stacked = {"tickers": tickers}
+    for column in columns:
+        frame = pd.concat({ticker: frames_by_ticker[ticker][column] for ticker in tickers}, axis=1)
+        frame = frame.ffill() if column == 'close' else frame.fillna(0)
+        stacked[column] = frame.to_numpy(dtype=float)
+        stacked["dates"] = frame.index
+    return stacked
+
+
+##### Vectorized Backtester #####
+def calculate_performance_metrics(values: np.ndarray, initial_capital: float) -> Dict[str, np.ndarray]:
+    """
+    Total return, Sharpe ratio and maximum drawdown of each column of a
+    (n_days, n_columns) array of portfolio values.
+    """
+    daily_returns = values[1:] / values[:-1] - 1
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sharpe_ratio = daily_returns.mean(axis=0) / daily_returns.std(axis=0, ddof=1) * (252 ** 0.5)
+    max_drawdown = (values / np.maximum.accumulate(values, axis=0) - 1).min(axis=0)
+
+    return {
+        "Total Return": (values[-1] - initial_capital) / initial_capital,
+        "Sharpe Ratio": sharpe_ratio,
+        "Maximum Drawdown": max_drawdown,
+    }
+
+
+class VectorizedBacktester:
+    def __init__(
+        self,
+        prices: np.ndarray,
+        actions: np.ndarray,
+        quantities: Optional[np.ndarray] = None,
+        max_position_fraction: Optional[np.ndarray] = None,
+        initial_capital: float = 100000,
+        dates: Optional[pd.DatetimeIndex] = None,
+        tickers: Optional[List[str]] = None,
+    ):
+        """
+        Args:
+            prices: (n_days, n_tickers) execution prices
+            actions: (n_days, n_tickers) 1 for buy, -1 for sell, 0 for hold
+            quantities: (n_days, n_tickers) requested quantities. When omitted, buys top the
+                position up to max_position_fraction of its portfolio value and sells close it
+            max_position_fraction: (n_days, n_tickers) position limit as a fraction of portfolio value
+            initial_capital: Starting cash for each ticker
+            dates: Date index for the rows
+            tickers: Ticker names for the columns
+        """
+        self.prices = np.asarray(prices, dtype=float)
+        self.actions = np.asarray(actions)
+        self.quantities = None if quantities is None else np.asarray(quantities, dtype=float)
+        if max_position_fraction is None:
+            max_position_fraction = np.ones_like(self.prices)
+        self.max_position_fraction = np.asarray(max_position_fraction, dtype=float)
+        self.initial_capital = initial_capital
+        self.dates = dates
+        self.tickers = tickers if tickers is not None else list(range(self.prices.shape[1]))
+
+    def run_backtest(self):
+        """Simulate every ticker at once, applying execute_trade's constraints each day."""
+        n_days, n_tickers = self.prices.shape
+        cash = np.full(n_tickers, float(self.initial_capital))
+        stock = np.zeros(n_tickers)
+
+        self.portfolio_values = np.empty((n_days, n_tickers))
+        self.positions = np.empty((n_days, n_tickers))
+        self.executed_quantities = np.empty((n_days, n_tickers))
+
+        for day in range(n_days):
+            price = self.prices[day]
+            tradable = np.isfinite(price) & (price > 0)
+            safe_price = np.where(tradable, price, 1.0)
+            action = np.where(tradable, self.actions[day], 0)
+
+            if self.quantities is not None:
+                buy_request = sell_request = self.quantities[day]
+            else:
+                position_limit = self.max_position_fraction[day] * (cash + stock * safe_price)
+                buy_request = np.maximum(np.floor(position_limit / safe_price) - stock, 0)
+                sell_request = stock
+
+            # Buy the requested quantity if affordable, otherwise the maximum affordable quantity
+            buy = (action == 1) & (buy_request > 0)
+            affordable = cash // safe_price
+            buy_quantity = np.where(buy, np.where(buy_request * safe_price <= cash, buy_request, affordable), 0)
+
+            # Sell at most the current position
+            sell = (action == -1) & (sell_request > 0)
+            sell_quantity = np.where(sell, np.minimum(sell_request, stock), 0)
+
+            stock += buy_quantity - sell_quantity
+            cash += (sell_quantity - buy_quantity) * safe_price
+
+            self.positions[day] = stock
+            self.executed_quantities[day] = buy_quantity - sell_quantity
+            self.portfolio_values[day] = cash + stock * np.where(tradable, price, 0)
+
+        self.portfolio = {"cash": cash, "stock": stock}
+        return self.portfolio_values
+
+    def analyze_performance(self) -> pd.DataFrame:
+        """Total return, Sharpe ratio and maximum drawdown per ticker."""
+        return pd.DataFrame(
+            calculate_performance_metrics(self.portfolio_values, self.initial_capital),
+            index=pd.Index(self.tickers, name="Ticker"),
+        )
+
+    def equity_curve(self) -> pd.DataFrame:
+        """Portfolio value per ticker over time."""
+        return pd.DataFrame(self.portfolio_values, index=self.dates, columns=self.tickers)
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description='Run a rule-only vectorized backtest')
+    parser.add_argument('--tickers', type=str, required=True, help='Comma-separated stock ticker symbols (e.g., AAPL,MSFT)')
+    parser.add_argument('--end_date', type=str, default=datetime.now().strftime('%Y-%m-%d'), help='End date in YYYY-MM-DD format')
+    parser.add_argument('--start_date', type=str, default=(datetime.now() - timedelta(days=365)).strftime('%Y-%m-%d'), help='Start date in YYYY-MM-DD format')
+    parser.add_argument('--initial_capital', type=float, default=100000, help='Initial capital amount per ticker (default: 100000)')
+
+    args = parser.parse_args()
+
+    signals_by_ticker = {
+        ticker: compute_rule_signals(**load_rule_inputs(ticker, args.start_date, args.end_date))
+        for ticker in args.tickers.split(',')
+    }
+    arrays = stack_by_ticker(signals_by_ticker)
+
+    backtester = VectorizedBacktester(
+        prices=arrays["close"],
+        actions=arrays["action"],
+        max_position_fraction=arrays["max_position_fraction"],
+        initial_capital=args.initial_capital,
+        dates=arrays["dates"],
+        tickers=arrays["tickers"],
+    )
+    backtester.run_backtest()
+    print(backtester.analyze_performance().to_string(float_format=lambda x: f"{x:.4f}"))
@@ -0,0 +1,113 @@
+import numpy as np
+import pytest
+
+from portfolio import ACTION_CODES, Portfolio
+
+BUY, SELL, HOLD = ACTION_CODES["buy"], ACTION_CODES["sell"], ACTION_CODES["hold"]
+
+
+def execute_trade(portfolio, action, quantity, current_price):
+    """The single-ticker fill the backtester used before Portfolio.execute_trades."""
+    if action == "buy" and quantity > 0:
+        cost = quantity * current_price
+        if cost <= portfolio["cash"]:
+            portfolio["stock"] += quantity
+            portfolio["cash"] -= cost
+            return quantity
+        max_quantity = portfolio["cash"] // current_price
+        if max_quantity > 0:
+            portfolio["stock"] += max_quantity
+            portfolio["cash"] -= max_quantity * current_price
+            return max_quantity
+        return 0
+    elif action == "sell" and quantity > 0:
+        quantity = min(quantity, portfolio["stock"])
+        if quantity > 0:
+            portfolio["cash"] += quantity * current_price
+            portfolio["stock"] -= quantity
+            return quantity
+        return 0
+    return 0
+
+
+@pytest.mark.parametrize("cash", [0.2, 1.0, 100.0, 999.99, 12345.67])
+@pytest.mark.parametrize("price", [0.1, 0.3, 7.0, 29.97, 100.05])
+@pytest.mark.parametrize("action", ["buy", "sell", "hold"])
+def test_single_ticker_matches_execute_trade(cash, price, action):
+    for quantity in [0, 1, 5, 13, 40, 1000]:
+        expected = {"cash": cash, "stock": 10}
+        expected_quantity = execute_trade(expected, action, quantity, price)
+
+        portfolio = Portfolio(["AAPL"], cash)
+        portfolio.positions[0] = 10
+        executed = portfolio.execute_trades([ACTION_CODES[action]], [quantity], [price])
+
+        assert executed[0] == expected_quantity
+        assert portfolio.positions[0] == expected["stock"]
+        assert portfolio.cash == pytest.approx(expected["cash"])
+
+
+def test_unaffordable_buy_fills_whole_shares_the_cash_allows():
+    portfolio = Portfolio(["AAPL"], 1000.0)
+    executed = portfolio.execute_trades([BUY], [50], [30.0])
+
+    assert executed[0] == 1000.0 // 30.0
+    assert portfolio.cash == pytest.approx(1000.0 - 33 * 30.0)
+
+
+def test_over_budget_batch_is_scaled_pro_rata():
+    portfolio = Portfolio(["A", "B"], 1000.0)
+    # The batch costs 2000, twice the cash, so each buy is halved
+    executed = portfolio.execute_trades([BUY, BUY], [100, 20], [10.0, 50.0])
+
+    np.testing.assert_array_equal(executed, [50, 10])
+    assert portfolio.cash == pytest.approx(0.0)
+
+
+def test_over_budget_batch_never_spends_more_than_the_cash():
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        portfolio = Portfolio(["A", "B", "C", "D"], rng.uniform(0, 5000))
+        executed = portfolio.execute_trades(np.full(4, BUY), rng.integers(0, 100, 4), rng.uniform(0.05, 500, 4))
+
+        assert portfolio.cash >= -1e-6
+        np.testing.assert_array_equal(executed, np.floor(executed))
+
+
+def test_sells_are_filled_first_and_fund_the_buys():
+    portfolio = Portfolio(["A", "B"], 0.0)
+    portfolio.positions[:] = [10, 0]
+    executed = portfolio.execute_trades([SELL, BUY], [10, 5], [20.0, 40.0])
+
+    np.testing.assert_array_equal(executed, [10, 5])
+    np.testing.assert_array_equal(portfolio.positions, [0, 5])
+    assert portfolio.cash == pytest.approx(0.0)
+
+
+def test_sells_are_capped_at_holdings():
+    portfolio = Portfolio(["A", "B"], 0.0)
+    portfolio.positions[:] = [3, 0]
+    executed = portfolio.execute_trades([SELL, SELL], [10, 4], [20.0, 40.0])
+
+    np.testing.assert_array_equal(executed, [3, 0])
+    np.testing.assert_array_equal(portfolio.positions, [0, 0])
+    assert portfolio.cash == pytest.approx(60.0)
+
+
+@pytest.mark.parametrize("bad_price", [np.nan, 0.0, -1.0, np.inf])
+def test_trades_without_a_valid_price_are_skipped(bad_price):
+    portfolio = Portfolio(["A", "B", "C"], 1000.0)
+    portfolio.positions[:] = [5, 5, 0]
+    executed = portfolio.execute_trades([SELL, BUY, BUY], [5, 5, 5], [bad_price, bad_price, 10.0])
+
+    np.testing.assert_array_equal(executed, [0, 0, 5])
+    np.testing.assert_array_equal(portfolio.positions, [5, 5, 5])
+    assert portfolio.cash == pytest.approx(950.0)
+
+
+def test_holds_and_zero_quantities_do_nothing():
+    portfolio = Portfolio(["A", "B"], 1000.0)
+    executed = portfolio.execute_trades([HOLD, BUY], [10, 0], [10.0, 10.0])
+
+    np.testing.assert_array_equal(executed, [0, 0])
+    assert portfolio.cash == 1000.0